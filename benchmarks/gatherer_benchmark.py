@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the gatherer from message intake to published collection.
+
+The *bin/gatherer.py* script is loaded, configured with one posttroll
+section, and set up with its own *setup* function. NSSubscriber and
+NoisyPublisher are replaced by the in-process bus of *local_bus.py*, so no
+nameserver is needed. N synthetic granule messages (see
+*region_collector_benchmark.py*) are then pushed on the bus as fast as
+possible.
+
+Reported are the intake rate in messages per second (until all the
+messages went through the collectors), the latency from the reception of
+the last granule of a collection to the publication of the collection, and
+the CPU time used by each thread.
+
+    python benchmarks/gatherer_benchmark.py
+    python benchmarks/gatherer_benchmark.py -n 500 -r 10 --footprints
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+GATHERER = os.path.join(THIS_DIR, os.pardir, 'bin', 'gatherer.py')
+sys.path.insert(0, THIS_DIR)
+
+from posttroll.message import Message
+from six.moves.configparser import RawConfigParser
+
+import region_collector_benchmark as rcb
+from local_bus import LocalBus
+
+
+def load_gatherer():
+    """Load the gatherer script as a module."""
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source('gatherer', GATHERER)
+    spec = importlib.util.spec_from_file_location('gatherer', GATHERER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def configure(gatherer, sequence, regions):
+    """Configure *gatherer* with one posttroll section for *sequence*."""
+    config = RawConfigParser()
+    section = 'bench_' + sequence
+    config.add_section(section)
+    config.set(section, 'regions',
+               ' '.join(region.area_id for region in regions))
+    config.set(section, 'timeliness', '20')
+    config.set(section, 'duration',
+               str(rcb.SEQUENCES[sequence][2].total_seconds()))
+    config.set(section, 'service', '')
+    config.set(section, 'topics', '/bench/' + sequence)
+    config.set(section, 'publish_topic', '/collection/' + sequence)
+    gatherer.CONFIG = config
+    areas = dict((region.area_id, region) for region in regions)
+    gatherer.get_area_def = areas.get
+
+
+def thread_cpu_times():
+    """Get the CPU time used by each thread of the process, by name.
+
+    The times are read from /proc, so this works only on Linux. Elsewhere,
+    the CPU time of the whole process is returned.
+    """
+    task_dir = '/proc/self/task'
+    if not os.path.isdir(task_dir):
+        return {'process': sum(os.times()[:2])}
+    names = dict((getattr(thread, 'native_id', None), thread.name)
+                 for thread in threading.enumerate())
+    tick = float(os.sysconf('SC_CLK_TCK'))
+    res = {}
+    for tid in os.listdir(task_dir):
+        try:
+            with open(os.path.join(task_dir, tid, 'stat')) as fd_:
+                fields = fd_.read().rsplit(')', 1)[1].split()
+        except (IOError, OSError):
+            continue
+        name = names.get(int(tid), 'thread-' + tid)
+        # utime and stime are the 14th and 15th fields
+        res[name] = (int(fields[11]) + int(fields[12])) / tick
+    return res
+
+
+class Counter(object):
+
+    """Count the calls to *fun*, once they are done."""
+
+    def __init__(self, fun):
+        self.fun = fun
+        self.count = 0
+
+    def __call__(self, *args):
+        try:
+            return self.fun(*args)
+        finally:
+            self.count += 1
+
+
+def run(gatherer, sequence, nregions, nmessages, footprints=False,
+        wait=60):
+    """Push *nmessages* granules of *sequence* through the gatherer."""
+    granule_duration = rcb.SEQUENCES[sequence][2]
+    granules = rcb.make_granules(sequence, granule_duration * nmessages,
+                                 footprints=footprints)
+    for granule in granules:
+        granule['uid'] = os.path.basename(granule['uri'])
+    configure(gatherer, sequence, rcb.make_regions(nregions))
+
+    bus = LocalBus()
+    with bus.install(gatherer):
+        gatherer.PUB = bus.publisher('gatherer').start()
+        triggers = gatherer.setup(gatherer.get_metadata)
+        counters = []
+        for granule_trigger in triggers:
+            # Count the messages that went through the collectors
+            granule_trigger._do = Counter(granule_trigger._do)
+            counters.append(granule_trigger._do)
+            granule_trigger.name = 'trigger-' + sequence
+            granule_trigger.start()
+        try:
+            cpu_before = thread_cpu_times()
+            received = {}
+            tic = time.time()
+            for granule in granules:
+                received[granule['uid']] = time.time()
+                bus.publish(Message('/bench/' + sequence, 'file', granule))
+            while (sum(counter.count for counter in counters) <
+                   len(granules) and time.time() - tic < wait):
+                time.sleep(.001)
+            elapsed = time.time() - tic
+            cpu_after = thread_cpu_times()
+        finally:
+            for granule_trigger in triggers:
+                granule_trigger.stop()
+
+    latencies = []
+    for pub_time, encoded in bus.published:
+        collection = Message(rawstr=encoded).data.get('collection', [])
+        uids = [granule['uid'] for granule in collection
+                if granule.get('uid') in received]
+        if uids:
+            latencies.append(pub_time - max(received[uid] for uid in uids))
+    latencies.sort()
+    processed = sum(counter.count for counter in counters)
+    cpu = dict((name, cpu_after[name] - cpu_before.get(name, 0))
+               for name in cpu_after)
+    return {'sequence': sequence,
+            'regions': nregions,
+            'messages': len(granules),
+            'processed': processed,
+            'messages_per_second': processed / elapsed if elapsed else 0.,
+            'collections': len(latencies),
+            'median': rcb.percentile(latencies, 50),
+            'p95': rcb.percentile(latencies, 95),
+            'max': latencies[-1] if latencies else 0.,
+            'cpu': cpu}
+
+
+def report(res):
+    """Print the results of one run."""
+    print("%-6s %4d regions: %4d/%4d messages processed, %8.1f messages/s" %
+          (res['sequence'], res['regions'], res['processed'],
+           res['messages'], res['messages_per_second']))
+    print("    %d collections, latency from last granule (ms): "
+          "median %.2f, p95 %.2f, max %.2f" %
+          (res['collections'], res['median'] * 1000, res['p95'] * 1000,
+           res['max'] * 1000))
+    busy = sorted(((cpu, name) for name, cpu in res['cpu'].items()
+                   if cpu > 0), reverse=True)
+    print("    thread CPU (s): " +
+          ", ".join("%s %.2f" % (name, cpu) for cpu, name in busy))
+
+
+def arg_parse():
+    """Handle input arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--messages", type=int, default=100,
+                        help="number of granule messages per run")
+    parser.add_argument("-r", "--regions", type=int, nargs='+',
+                        default=[1, 10],
+                        help="numbers of regions to benchmark")
+    parser.add_argument("-s", "--sequences", nargs='+',
+                        choices=sorted(rcb.SEQUENCES.keys()),
+                        default=['avhrr'],
+                        help="granule sequences to benchmark")
+    parser.add_argument("--footprints", action="store_true",
+                        help="attach precomputed footprints to the granules")
+    parser.add_argument("-w", "--wait", type=float, default=60,
+                        help="max time to wait for the processing, "
+                        "in seconds")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark."""
+    opts = arg_parse()
+    gatherer = load_gatherer()
+    for sequence in opts.sequences:
+        for nregions in opts.regions:
+            report(run(gatherer, sequence, nregions, opts.messages,
+                       opts.footprints, opts.wait))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""In-process stand-in for the posttroll message bus.
+
+The LocalBus passes encoded messages from its *publish* method and from
+the LocalPublisher instances to the LocalSubscriber instances, with the
+same topic matching as posttroll. The messages are encoded on publication
+and decoded on reception, as on the wire, but no nameserver or socket is
+involved.
+
+The subscribers and publishers are injected in place of NSSubscriber and
+NoisyPublisher with *LocalBus.install*::
+
+    bus = LocalBus()
+    with bus.install(gatherer_module):
+        ...
+"""
+
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+import six
+from posttroll.message import Message
+from six.moves.queue import Queue, Empty
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+_MAGICK = 'pytroll:/'
+
+
+def _to_prefix(topic):
+    """Get the prefix of the encoded messages matching *topic*."""
+    if topic.startswith(_MAGICK):
+        return topic
+    if topic.startswith("/"):
+        return _MAGICK + topic
+    return _MAGICK + "/" + topic
+
+
+class LocalBus(object):
+
+    """Pass messages between local publishers and subscribers.
+
+    The messages sent by the LocalPublishers are also kept, with their time
+    of publication, in *published*.
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = Lock()
+        self.published = []
+
+    def publish(self, message):
+        """Send *message* (a Message or an encoded message) to the
+        subscribers.
+        """
+        if isinstance(message, Message):
+            message = message.encode()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.deliver(message)
+
+    def record(self, message):
+        """Keep a message sent by a publisher."""
+        with self._lock:
+            self.published.append((time.time(), message))
+        self.publish(message)
+
+    def subscribe(self, subscriber):
+        """Add *subscriber* to the bus."""
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Remove *subscriber* from the bus."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscriber(self, services, topics, addr_listener=False,
+                   nameserver="localhost", **kwargs):
+        """Create a subscriber, with the signature of NSSubscriber."""
+        return LocalSubscriber(self, topics)
+
+    def publisher(self, name, port=0, aliases=None, **kwargs):
+        """Create a publisher, with the signature of NoisyPublisher."""
+        return LocalPublisher(self)
+
+    @contextmanager
+    def install(self, *modules):
+        """Use the bus in place of NSSubscriber and NoisyPublisher.
+
+        The classes are replaced in the trigger module, and in the
+        *modules* (for example the gatherer script) through their
+        *publisher*, *NoisyPublisher* and *NSSubscriber* attributes.
+        """
+        patches = [patch('pytroll_collectors.trigger.NSSubscriber',
+                         self.subscriber)]
+        for module in modules:
+            if hasattr(module, 'publisher'):
+                patches.append(patch.object(module.publisher,
+                                            'NoisyPublisher',
+                                            self.publisher))
+            if hasattr(module, 'NoisyPublisher'):
+                patches.append(patch.object(module, 'NoisyPublisher',
+                                            self.publisher))
+            if hasattr(module, 'NSSubscriber'):
+                patches.append(patch.object(module, 'NSSubscriber',
+                                            self.subscriber))
+        for ptch in patches:
+            ptch.start()
+        try:
+            yield self
+        finally:
+            for ptch in reversed(patches):
+                ptch.stop()
+
+
+class LocalSubscriber(object):
+
+    """Subscriber receiving the messages of a LocalBus.
+    """
+
+    def __init__(self, bus, topics):
+        self.bus = bus
+        if isinstance(topics, six.string_types):
+            topics = [topics]
+        self.prefixes = [_to_prefix(topic) for topic in topics]
+        self._queue = Queue()
+        self._running = False
+
+    def start(self):
+        """Start receiving."""
+        self._running = True
+        self.bus.subscribe(self)
+        return self
+
+    def deliver(self, encoded):
+        """Queue the *encoded* message if it matches the topics."""
+        if any(encoded.startswith(prefix) for prefix in self.prefixes):
+            self._queue.put(encoded)
+
+    def recv(self, timeout=None):
+        """Yield the received messages, or None every *timeout* seconds."""
+        while self._running:
+            try:
+                encoded = self._queue.get(timeout=timeout)
+            except Empty:
+                yield None
+                continue
+            yield Message(rawstr=encoded)
+
+    def stop(self):
+        """Stop receiving."""
+        self._running = False
+        self.bus.unsubscribe(self)
+
+
+class LocalPublisher(object):
+
+    """Publisher sending messages on a LocalBus.
+    """
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def start(self):
+        """Start the publisher."""
+        return self
+
+    def send(self, msg):
+        """Send the encoded message *msg*."""
+        self.bus.record(msg)
+
+    def stop(self):
+        """Stop the publisher."""
+        pass
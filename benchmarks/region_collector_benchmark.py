@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the RegionCollector with synthetic granule sequences.
+
+Synthetic VIIRS, AVHRR and MODIS granule sequences are run through
+RegionCollector.collect for 1, 10 and 50 regions, the same way the triggers
+do it. Orbits are computed from the static TLEs in
+*benchmarks/data/tle_fixture.txt*, so no network access or up-to-date TLE
+files are needed.
+
+For each run, the per-granule latency is reported together with the share
+of time spent in orbit geometry (Pass and area_coverage) and in the
+collector bookkeeping. With *--footprints*, the granule footprints are
+precomputed and attached to the metadata, as some producers do, so that
+only the prediction of the neighbouring granules needs orbit geometry.
+
+    python benchmarks/region_collector_benchmark.py
+    python benchmarks/region_collector_benchmark.py -r 10 -s avhrr --profile
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import time
+from datetime import datetime, timedelta
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+TLE_FIXTURE = os.path.join(THIS_DIR, 'data', 'tle_fixture.txt')
+os.environ.setdefault('TLES', TLE_FIXTURE)
+
+import numpy as np
+from pyresample.geometry import AreaDefinition
+
+from trollsched.satpass import Pass
+
+from pytroll_collectors import region_collector
+
+FOOTPRINT_VERTICES = 8
+
+# name: (platform_name, sensor, granule duration, start time)
+# The start times are a few minutes before a pass over euron1 with the TLE
+# fixture.
+SEQUENCES = {'viirs': ('Suomi-NPP', 'viirs', timedelta(seconds=85.4),
+                       datetime(2018, 1, 1, 15, 33)),
+             'avhrr': ('NOAA-19', 'avhrr/3', timedelta(seconds=60),
+                       datetime(2018, 1, 1, 20, 40)),
+             'modis': ('EOS-Terra', 'modis', timedelta(seconds=300),
+                       datetime(2018, 1, 1, 20, 20))}
+
+
+def make_regions(number):
+    """Make *number* regions spread over the globe.
+
+    The first region is the stock *euron1* area, the other ones are
+    1000 km wide laea areas centered on a regular lon/lat grid.
+    """
+    regions = [AreaDefinition('euron1', 'Northern Europe - 1km', 'euron1',
+                              {'proj': 'stere', 'ellps': 'WGS84',
+                               'lat_0': 90.0, 'lon_0': 0.0, 'lat_ts': 60.0},
+                              3072, 3072,
+                              (-1000000.0, -4500000.0,
+                               2072000.0, -1428000.0))]
+    lats = range(-60, 80, 20)
+    lons = range(-180, 180, 30)
+    centers = [(lon, lat) for lat in lats for lon in lons]
+    for idx in range(number - 1):
+        lon, lat = centers[idx % len(centers)]
+        area_id = 'laea_%d_%d_%d' % (idx, lon, lat)
+        regions.append(AreaDefinition(area_id, area_id, area_id,
+                                      {'proj': 'laea', 'ellps': 'WGS84',
+                                       'lat_0': lat, 'lon_0': lon},
+                                      1000, 1000,
+                                      (-500000.0, -500000.0,
+                                       500000.0, 500000.0)))
+    return regions
+
+
+def make_granules(sequence, duration, footprints=False):
+    """Make the granule metadata of *sequence* for *duration*."""
+    platform_name, sensor, granule_duration, start_time = SEQUENCES[sequence]
+    granules = []
+    gr_time = start_time
+    while gr_time < start_time + duration:
+        granule = {'platform_name': platform_name,
+                   'sensor': sensor,
+                   'start_time': gr_time,
+                   'end_time': gr_time + granule_duration,
+                   'uri': '/tmp/%s_%s' % (sequence,
+                                          gr_time.strftime('%H%M%S'))}
+        if footprints:
+            granule['footprint'] = make_footprint(granule)
+        granules.append(granule)
+        gr_time += granule_duration
+    return granules
+
+
+def make_footprint(granule):
+    """Compute the footprint of *granule* as a list of lon/lat corners.
+
+    Like the footprints sent by producers, only a coarse outline of
+    *FOOTPRINT_VERTICES* vertices is kept.
+    """
+    granule_pass = Pass(granule['platform_name'], granule['start_time'],
+                        granule['end_time'], instrument=granule['sensor'])
+    vertices = granule_pass.boundary.contour_poly.vertices
+    step = max(1, len(vertices) // FOOTPRINT_VERTICES)
+    return np.rad2deg(vertices[::step]).tolist()
+
+
+class GeometryTimer(object):
+
+    """Time the geometry computations of the region collectors.
+
+    The timer replaces the *Pass* class used by the region_collector
+    module and the overlap test of the RegionCollector, and adds up the time
+    spent in creating the passes, computing their coverage and intersecting
+    the footprints with the regions.
+    """
+
+    def __init__(self):
+        self.elapsed = 0.
+        self.calls = 0
+        self._depth = 0
+        self._pass_class = region_collector.Pass
+        self._granule_coverage = \
+            region_collector.RegionCollector.granule_coverage
+
+    def timed(self, fun, count=False):
+        """Wrap *fun* so that its (outermost) calls are timed."""
+        def wrapper(*args, **kwargs):
+            self._depth += 1
+            tic = time.time()
+            try:
+                return fun(*args, **kwargs)
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.elapsed += time.time() - tic
+                if count:
+                    self.calls += 1
+        return wrapper
+
+    def __enter__(self):
+        pass_class = self._pass_class
+
+        class TimedPass(pass_class):
+            __init__ = self.timed(pass_class.__init__)
+            area_coverage = self.timed(pass_class.area_coverage, count=True)
+
+        region_collector.Pass = TimedPass
+        region_collector.RegionCollector.granule_coverage = \
+            self.timed(self._granule_coverage)
+        return self
+
+    def __exit__(self, *args):
+        region_collector.Pass = self._pass_class
+        region_collector.RegionCollector.granule_coverage = \
+            self._granule_coverage
+
+
+def percentile(values, perc):
+    """Get the *perc* percentile of sorted *values*."""
+    if not values:
+        return 0.
+    idx = min(len(values) - 1, int(round(perc / 100. * (len(values) - 1))))
+    return values[idx]
+
+
+def run(sequence, nregions, duration, footprints=False):
+    """Run *sequence* for *duration* through *nregions* region collectors."""
+    granule_duration = SEQUENCES[sequence][2]
+    collectors = [region_collector.RegionCollector(region,
+                                                   timedelta(minutes=20),
+                                                   granule_duration)
+                  for region in make_regions(nregions)]
+    granules = make_granules(sequence, duration, footprints=footprints)
+    latencies = []
+    collections = 0
+    with GeometryTimer() as timer:
+        for granule in granules:
+            tic = time.time()
+            for collector in collectors:
+                if collector(granule.copy()):
+                    collections += 1
+            latencies.append(time.time() - tic)
+    latencies.sort()
+    total = sum(latencies)
+    return {'sequence': sequence,
+            'regions': nregions,
+            'granules': len(granules),
+            'collections': collections,
+            'granules_per_second': len(granules) / total if total else 0.,
+            'mean': total / len(latencies),
+            'median': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'max': latencies[-1],
+            'geometry': timer.elapsed,
+            'geometry_calls': timer.calls,
+            'bookkeeping': total - timer.elapsed}
+
+
+def report(res):
+    """Print the results of one run."""
+    total = res['geometry'] + res['bookkeeping']
+    print("%-6s %4d regions: %4d granules, %3d collections, "
+          "%8.1f granules/s" % (res['sequence'], res['regions'],
+                                res['granules'], res['collections'],
+                                res['granules_per_second']))
+    print("    latency (ms): mean %.2f, median %.2f, p95 %.2f, max %.2f" %
+          (res['mean'] * 1000, res['median'] * 1000, res['p95'] * 1000,
+           res['max'] * 1000))
+    print("    geometry: %.3f s (%.1f %%, %d orbit coverages), "
+          "bookkeeping: %.3f s (%.1f %%)" %
+          (res['geometry'], 100. * res['geometry'] / total,
+           res['geometry_calls'], res['bookkeeping'],
+           100. * res['bookkeeping'] / total))
+
+
+def arg_parse():
+    """Handle input arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--regions", type=int, nargs='+',
+                        default=[1, 10, 50],
+                        help="numbers of regions to benchmark")
+    parser.add_argument("-s", "--sequences", nargs='+',
+                        choices=sorted(SEQUENCES.keys()),
+                        default=sorted(SEQUENCES.keys()),
+                        help="granule sequences to benchmark")
+    parser.add_argument("-d", "--duration", type=float, default=10,
+                        help="duration of each sequence, in minutes")
+    parser.add_argument("--footprints", action="store_true",
+                        help="attach precomputed footprints to the granules")
+    parser.add_argument("--profile", action="store_true",
+                        help="print the cProfile statistics of each run")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark."""
+    opts = arg_parse()
+    duration = timedelta(minutes=opts.duration)
+    for sequence in opts.sequences:
+        for nregions in opts.regions:
+            args = (sequence, nregions, duration, opts.footprints)
+            if opts.profile:
+                profiler = cProfile.Profile()
+                res = profiler.runcall(run, *args)
+            else:
+                res = run(*args)
+            report(res)
+            if opts.profile:
+                stats = pstats.Stats(profiler, stream=sys.stdout)
+                stats.sort_stats('cumulative').print_stats(15)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark trollstalker under a storm of new files.
+
+The *bin/trollstalker.py* script is loaded, and a notifier watching a
+temporary directory tree is created with its own *create_notifier*
+function. NoisyPublisher is replaced by the in-process bus of
+*local_bus.py*, so no nameserver is needed. N files are then written in the
+tree by several writer threads, as fast as possible, either in place
+(close_write, announced on IN_CLOSE_WRITE) or in a staging directory and
+then moved in place (moved_to, announced on IN_MOVED_TO).
+
+Reported are the announcement rate in files per second (from the first
+file written to the last message published), the latency from the
+completion of each file (close or rename) to the publication of its
+message, and the numbers of missed and duplicate announcements. Files are
+missed when the inotify queue overflows, see
+/proc/sys/fs/inotify/max_queued_events.
+
+    python benchmarks/trollstalker_benchmark.py
+    python benchmarks/trollstalker_benchmark.py -n 20000 -w 1 8 -d 10 -p hrit
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+TROLLSTALKER = os.path.join(THIS_DIR, os.pardir, 'bin', 'trollstalker.py')
+sys.path.insert(0, THIS_DIR)
+
+from posttroll.message import Message
+
+from local_bus import LocalBus
+
+START_TIME = datetime(2018, 1, 1, 12, 0)
+HRIT_CHANNELS = ['HRV', 'VIS006', 'VIS008', 'IR_016', 'IR_039', 'WV_062',
+                 'WV_073', 'IR_087', 'IR_097', 'IR_108', 'IR_120', 'IR_134']
+HRIT_SEGMENTS = 8
+
+
+def hrpt_name(idx):
+    """Get the name of the HRPT file number *idx*, one per second."""
+    start_time = START_TIME + timedelta(seconds=idx)
+    return 'hrpt_noaa19_%s_%05d.l1b' % (start_time.strftime('%Y%m%d_%H%M%S'),
+                                       idx % 100000)
+
+
+def hrit_name(idx):
+    """Get the name of the HRIT segment number *idx*, all the segments of
+    all the channels every 15 minutes.
+    """
+    slot, idx = divmod(idx, len(HRIT_CHANNELS) * HRIT_SEGMENTS)
+    channel, segment = divmod(idx, HRIT_SEGMENTS)
+    start_time = START_TIME + timedelta(minutes=15 * slot)
+    return 'H-000-MSG4__-MSG4________-%s-%s-%s-__' % (
+        HRIT_CHANNELS[channel].ljust(9, '_'),
+        ('%06d' % (segment + 1)).ljust(9, '_'),
+        start_time.strftime('%Y%m%d%H%M'))
+
+
+# name: (filepattern, function giving the name of the file number idx)
+PATTERNS = {
+    'hrpt': ('hrpt_{platform_name}_{start_time:%Y%m%d_%H%M%S}_'
+             '{orbit_number:05d}.l1b', hrpt_name),
+    'hrit': ('H-000-{platform_name:4s}__-{orig_platform_name:4s}________-'
+             '{channel_name:_<9s}-{segment:_<9s}-{start_time:%Y%m%d%H%M}-__',
+             hrit_name)}
+
+# style: inotify events announcing the files
+STYLES = {'close_write': 'IN_CLOSE_WRITE',
+          'moved_to': 'IN_MOVED_TO'}
+
+
+def load_trollstalker():
+    """Load the trollstalker script as a module."""
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source('trollstalker', TROLLSTALKER)
+    spec = importlib.util.spec_from_file_location('trollstalker',
+                                                  TROLLSTALKER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values, perc):
+    """Get the *perc* percentile of sorted *values*."""
+    if not values:
+        return 0.
+    idx = min(len(values) - 1, int(round(perc / 100. * (len(values) - 1))))
+    return values[idx]
+
+
+def write_files(paths, style, staging, size, completed):
+    """Write the files *paths*, in the *style* way.
+
+    The time of completion of each file is put in *completed*.
+    """
+    data = b'x' * size
+    for path in paths:
+        if style == 'moved_to':
+            tmp_path = os.path.join(staging, os.path.basename(path))
+            with open(tmp_path, 'wb') as fd_:
+                fd_.write(data)
+            os.rename(tmp_path, path)
+        else:
+            with open(path, 'wb') as fd_:
+                fd_.write(data)
+        completed[path] = time.time()
+
+
+def wait_for_messages(bus, nfiles, wait, settle=.5):
+    """Wait for *nfiles* messages on *bus*, and then for *settle* seconds
+    without new message, to catch the duplicates. Give up after *wait*
+    seconds without new message.
+    """
+    count, last_change = 0, time.time()
+    while True:
+        time.sleep(.01)
+        new_count = len(bus.published)
+        if new_count != count:
+            count, last_change = new_count, time.time()
+            continue
+        idle = time.time() - last_change
+        if idle > wait or (count >= nfiles and idle > settle):
+            return
+
+
+def run(trollstalker, style, nfiles, nwriters, ndirs, pattern, size=0,
+        history=0, wait=10):
+    """Announce *nfiles* files written by *nwriters* threads in *ndirs*
+    directories.
+    """
+    filepattern, make_name = PATTERNS[pattern]
+    root = tempfile.mkdtemp(prefix='trollstalker_benchmark_')
+    watched = os.path.join(root, 'watched')
+    staging = os.path.join(root, 'staging')
+    dirs = [os.path.join(watched, 'dir%03d' % idx) for idx in range(ndirs)]
+    for path in dirs + [staging]:
+        os.makedirs(path)
+    paths = [os.path.join(dirs[idx % ndirs], make_name(idx))
+             for idx in range(nfiles)]
+
+    bus = LocalBus()
+    completed = {}
+    try:
+        with bus.install(trollstalker):
+            notifier = trollstalker.create_notifier(
+                '/bench/' + style, 'avhrr/3', 0, filepattern, STYLES[style],
+                [watched], history=history)
+            notifier.start()
+            try:
+                writers = [threading.Thread(target=write_files,
+                                            args=(paths[idx::nwriters], style,
+                                                  staging, size, completed),
+                                            name='writer-%d' % idx)
+                           for idx in range(nwriters)]
+                tic = time.time()
+                for writer in writers:
+                    writer.start()
+                for writer in writers:
+                    writer.join()
+                written = time.time() - tic
+                wait_for_messages(bus, nfiles, wait)
+            finally:
+                notifier.stop()
+    finally:
+        shutil.rmtree(root)
+
+    announced = {}
+    duplicates = 0
+    for pub_time, encoded in bus.published:
+        uri = Message(rawstr=encoded).data['uri']
+        if uri in announced:
+            duplicates += 1
+        else:
+            announced[uri] = pub_time
+    latencies = sorted(pub_time - completed[uri]
+                       for uri, pub_time in announced.items()
+                       if uri in completed)
+    elapsed = max(announced.values()) - tic if announced else 0.
+    return {'style': style,
+            'writers': nwriters,
+            'files': nfiles,
+            'written_per_second': nfiles / written if written else 0.,
+            'announced': len(announced),
+            'announced_per_second': (len(announced) / elapsed
+                                     if elapsed else 0.),
+            'missed': len(set(completed) - set(announced)),
+            'duplicates': duplicates,
+            'median': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else 0.}
+
+
+def report(res):
+    """Print the results of one run."""
+    print("%-11s %3d writers: %6d/%6d files announced, %8.1f files/s "
+          "(written at %.1f files/s)" %
+          (res['style'], res['writers'], res['announced'], res['files'],
+           res['announced_per_second'], res['written_per_second']))
+    print("    latency from completion (ms): median %.2f, p95 %.2f, "
+          "p99 %.2f, max %.2f" %
+          (res['median'] * 1000, res['p95'] * 1000, res['p99'] * 1000,
+           res['max'] * 1000))
+    print("    missed %d, duplicates %d" % (res['missed'], res['duplicates']))
+
+
+def arg_parse():
+    """Handle input arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--files", type=int, default=1000,
+                        help="number of files per run")
+    parser.add_argument("-w", "--writers", type=int, nargs='+',
+                        default=[1, 4],
+                        help="numbers of writer threads to benchmark")
+    parser.add_argument("-d", "--dirs", type=int, default=1,
+                        help="number of watched directories to spread the "
+                        "files over")
+    parser.add_argument("-p", "--pattern", choices=sorted(PATTERNS.keys()),
+                        default='hrpt',
+                        help="naming pattern of the files")
+    parser.add_argument("-s", "--styles", nargs='+',
+                        choices=sorted(STYLES.keys()),
+                        default=sorted(STYLES.keys()),
+                        help="ways of writing the files to benchmark")
+    parser.add_argument("--size", type=int, default=0,
+                        help="size of the files, in bytes")
+    parser.add_argument("--history", type=int, default=0,
+                        help="trollstalker history, to skip the duplicates")
+    parser.add_argument("--wait", type=float, default=10,
+                        help="max time to wait for a new message, "
+                        "in seconds")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark."""
+    opts = arg_parse()
+    trollstalker = load_trollstalker()
+    for style in opts.styles:
+        for nwriters in opts.writers:
+            report(run(trollstalker, style, opts.files, nwriters, opts.dirs,
+                       opts.pattern, opts.size, opts.history, opts.wait))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,7 +24,9 @@
 
 """Gather granule messages to send them in a bunch."""
 
+from collections import OrderedDict
 from datetime import timedelta
+from threading import Lock, Thread
 import time
 import logging
 import logging.handlers
@@ -36,6 +38,8 @@ from six.moves.configparser import RawConfigParser, NoOptionError
 from trollsift import Parser, compose
 from pytroll_collectors import trigger
 from pytroll_collectors import region_collector
+from pytroll_collectors.path_matcher import PathMatcher, PatternTable
+from pytroll_collectors.file_notifiers import ConfigWatcher
 from posttroll import message, publisher
 try:
     from satpy.resample import get_area_def
@@ -46,31 +50,96 @@ except ImportError:
 LOGGER = logging.getLogger(__name__)
 CONFIG = RawConfigParser()
 PUB = None
-
-
-def get_metadata(fname):
-    """Parse metadata from the file."""
-    res = None
-    for section in CONFIG.sections():
+SECTIONS = None
+TRIGGERS = OrderedDict()
+RELOAD_LOCK = Lock()
+
+# Section options that are not granule metadata
+SECTION_OPTIONS = ["watcher", "pattern", "timeliness", "regions",
+                   "timeliness_quantile", "timeliness_window",
+                   "timeliness_min_samples", "platforms", "sensors"]
+
+# Section options defining the trigger, and the collectors
+TRIGGER_OPTIONS = ["watcher", "pattern", "service", "topics", "nameserver",
+                   "publish_topic", "publish_message_after_each_reception",
+                   "publish_new_granule_only", "queue_size",
+                   "queue_timeout"]
+COLLECTOR_OPTIONS = ["regions", "timeliness", "duration",
+                     "timeliness_quantile", "timeliness_window",
+                     "timeliness_min_samples", "platforms", "sensors"]
+
+
+def get_section_table(config):
+    """Precompile the file pattern sections of *config*.
+
+    The static metadata of each section is its options, minus the ones
+    configuring the gathering. When several sections match a file, the
+    last one in *config* is used, so the table holds the sections in
+    reverse order.
+    """
+    patterns = []
+    metadata = []
+    for section in reversed(config.sections()):
         try:
-            parser = Parser(CONFIG.get(section, "pattern"))
+            patterns.append(config.get(section, "pattern"))
         except NoOptionError:
             continue
-        if not parser.validate(fname):
-            continue
-        res = parser.parse(fname)
-        res.update(dict(CONFIG.items(section)))
+        mda = dict(config.items(section))
+        for key in SECTION_OPTIONS:
+            mda.pop(key, None)
+        metadata.append(mda)
+    return PatternTable(patterns, metadata)
+
+
+class SectionMatcher(object):
+
+    """Matcher of the files of the section with the given *pattern*, which
+    are watched with its *glob*.
+
+    The files are looked up in SECTIONS, so they are matched and parsed
+    only once, with the last matching section as in get_metadata.
+    """
 
-        for key in ["watcher", "pattern", "timeliness", "regions"]:
-            res.pop(key, None)
+    def __init__(self, pattern, glob):
+        self.pattern = pattern
+        self.glob = PathMatcher([glob])
 
-        res = trigger.fix_start_end_time(res)
+    def lookup(self, path):
+        """Get the index in SECTIONS of the section matching *path*, and the
+        fields parsed from it.
 
-        if ("sensor" in res) and ("," in res["sensor"]):
-            res["sensor"] = res["sensor"].split(",")
+        (None, None) is returned if *path* doesn't match the section.
+        """
+        sections = SECTIONS
+        index, fields = sections.lookup(path)
+        if index is None:
+            return None, None
+        if (sections.patterns[index] != self.pattern and
+                self.glob.match(path) is None):
+            return None, None
+        return index, fields
 
-        res["uri"] = fname
-        res["filename"] = os.path.basename(fname)
+
+def get_metadata(fname, fields=None):
+    """Parse metadata from the file.
+
+    The *fields* already parsed from *fname* by a SectionMatcher are used
+    instead of parsing it again.
+    """
+    if fields is None:
+        res = SECTIONS.parse(fname)
+    else:
+        res = fields
+    if res is None:
+        return None
+
+    res = trigger.fix_start_end_time(res)
+
+    if ("sensor" in res) and ("," in res["sensor"]):
+        res["sensor"] = res["sensor"].split(",")
+
+    res["uri"] = fname
+    res["filename"] = os.path.basename(fname)
 
     return res
 
@@ -134,74 +203,312 @@ def arg_parse():
     parser.add_argument("-c", "--config-item",
                         help="config item to use (all by default). Can be specified multiply times",
                         action="append")
+    parser.add_argument("-a", "--asyncio",
+                        help="run all the triggers in a single asyncio event "
+                        "loop (python 3 only)",
+                        action="store_true")
     parser.add_argument("config", help="config file to be used")
 
     return parser.parse_args()
 
 
-def setup(decoder):
-    """Setup the granule triggerer.
-    """
+def get_latency_estimator(section):
+    """Get the latency estimator for *section*, if one is configured."""
+    try:
+        quantile = CONFIG.getfloat(section, "timeliness_quantile")
+    except NoOptionError:
+        return None
+    kwargs = {}
+    for key in ["window", "min_samples"]:
+        try:
+            kwargs[key] = CONFIG.getint(section, "timeliness_" + key)
+        except NoOptionError:
+            pass
+    LOGGER.debug("Learning timeliness for %s with quantile %s",
+                 section, str(quantile))
+    return region_collector.LatencyEstimator(quantile, **kwargs)
 
-    granule_triggers = []
 
-    for section in CONFIG.sections():
-        regions = [get_area_def(region)
-                   for region in CONFIG.get(section, "regions").split()]
+def get_collectors(section):
+    """Create the region collectors of *section*."""
+    regions = [get_area_def(region)
+               for region in CONFIG.get(section, "regions").split()]
 
-        timeliness = timedelta(minutes=CONFIG.getint(section, "timeliness"))
+    timeliness = timedelta(minutes=CONFIG.getint(section, "timeliness"))
+    try:
+        duration = timedelta(seconds=CONFIG.getfloat(section, "duration"))
+    except NoOptionError:
+        duration = None
+    latency_estimator = get_latency_estimator(section)
+    constraints = {}
+    for key in ["platforms", "sensors"]:
         try:
-            duration = timedelta(seconds=CONFIG.getfloat(section, "duration"))
+            constraints[key] = CONFIG.get(section, key).split()
         except NoOptionError:
-            duration = None
-        collectors = [region_collector.RegionCollector(region, timeliness, duration)
-                      for region in regions]
+            pass
+    return [region_collector.RegionCollector(region, timeliness,
+                                             duration,
+                                             latency_estimator,
+                                             **constraints)
+            for region in regions]
 
-        try:
-            observer_class = CONFIG.get(section, "watcher")
-            pattern = CONFIG.get(section, "pattern")
-            parser = Parser(pattern)
-            glob = parser.globify()
-        except NoOptionError:
-            observer_class = None
 
-        try:
-            publish_topic = CONFIG.get(section, "publish_topic")
-        except NoOptionError:
-            publish_topic = None
+def get_trigger(section, collectors, decoder, engine=None):
+    """Create the trigger of *section*, feeding *collectors*.
 
-        try:
-            nameserver = CONFIG.get(section, "nameserver")
-        except NoOptionError:
-            nameserver = "localhost"
+    If an asyncio trigger *engine* is given, the trigger is added to it
+    instead of running in its own thread.
+    """
+    if engine is not None:
+        watchdog_trigger = engine.add_watchdog_trigger
+        posttroll_trigger = engine.add_posttroll_trigger
+    else:
+        watchdog_trigger = trigger.WatchDogTrigger
+        posttroll_trigger = trigger.PostTrollTrigger
 
-        try:
-            publish_message_after_each_reception = CONFIG.get(section, "publish_message_after_each_reception")
-            LOGGER.debug("Publish message after each reception config: {}".format(publish_message_after_each_reception))
-        except NoOptionError:
-            publish_message_after_each_reception = False
-
-        if observer_class in ["PollingObserver", "Observer"]:
-            LOGGER.debug("Using %s for %s", observer_class, section)
-            granule_trigger = \
-                trigger.WatchDogTrigger(collectors,
-                                        terminator,
-                                        decoder,
-                                        [glob],
-                                        observer_class,
-                                        publish_topic=publish_topic)
-
-        else:
-            LOGGER.debug("Using posttroll for %s", section)
-            granule_trigger = trigger.PostTrollTrigger(
-                collectors, terminator,
-                CONFIG.get(section, 'service').split(','),
-                CONFIG.get(section, 'topics').split(','),
-                publish_topic=publish_topic, nameserver=nameserver,
-                publish_message_after_each_reception=publish_message_after_each_reception)
-        granule_triggers.append(granule_trigger)
-
-    return granule_triggers
+    try:
+        observer_class = CONFIG.get(section, "watcher")
+        pattern = CONFIG.get(section, "pattern")
+        parser = Parser(pattern)
+        glob = parser.globify()
+    except NoOptionError:
+        observer_class = None
+
+    try:
+        publish_topic = CONFIG.get(section, "publish_topic")
+    except NoOptionError:
+        publish_topic = None
+
+    try:
+        nameserver = CONFIG.get(section, "nameserver")
+    except NoOptionError:
+        nameserver = "localhost"
+
+    try:
+        publish_message_after_each_reception = CONFIG.getboolean(section, "publish_message_after_each_reception")
+        LOGGER.debug("Publish message after each reception config: {}".format(publish_message_after_each_reception))
+    except NoOptionError:
+        publish_message_after_each_reception = False
+
+    try:
+        publish_new_granule_only = CONFIG.getboolean(
+            section, "publish_new_granule_only")
+    except NoOptionError:
+        publish_new_granule_only = False
+
+    if observer_class in ["PollingObserver", "ScandirPollingObserver",
+                          "Observer"]:
+        LOGGER.debug("Using %s for %s", observer_class, section)
+        granule_trigger = watchdog_trigger(collectors,
+                                           terminator,
+                                           decoder,
+                                           [glob],
+                                           observer_class,
+                                           publish_topic=publish_topic,
+                                           publish_message_after_each_reception=publish_message_after_each_reception,
+                                           publish_new_granule_only=publish_new_granule_only,
+                                           matcher=SectionMatcher(pattern,
+                                                                  glob))
+
+    else:
+        LOGGER.debug("Using posttroll for %s", section)
+        services = CONFIG.get(section, 'service').split(',')
+        queue_options = {}
+        if CONFIG.has_option(section, "queue_size"):
+            queue_options["queue_size"] = CONFIG.getint(section,
+                                                        "queue_size")
+        if CONFIG.has_option(section, "queue_timeout"):
+            queue_options["queue_timeout"] = CONFIG.getfloat(
+                section, "queue_timeout")
+        multiplexer = trigger.get_subscription_multiplexer(services,
+                                                           nameserver)
+        granule_trigger = posttroll_trigger(
+            collectors, terminator,
+            services,
+            CONFIG.get(section, 'topics').split(','),
+            publish_topic=publish_topic, nameserver=nameserver,
+            publish_message_after_each_reception=publish_message_after_each_reception,
+            multiplexer=multiplexer,
+            publish_new_granule_only=publish_new_granule_only,
+            **queue_options)
+    return granule_trigger
+
+
+def setup(decoder, engine=None):
+    """Setup the granule triggerer.
+
+    If an asyncio trigger *engine* is given, the triggers are added to it
+    instead of running in their own threads.
+    """
+    global SECTIONS
+    SECTIONS = get_section_table(CONFIG)
+
+    TRIGGERS.clear()
+    for section in CONFIG.sections():
+        TRIGGERS[section] = get_trigger(section, get_collectors(section),
+                                        decoder, engine)
+
+    return list(TRIGGERS.values())
+
+
+def filter_sections(config, config_items):
+    """Keep only the *config_items* sections of *config*, if given.
+
+    Return False if no section is left.
+    """
+    if config_items:
+        for section in config_items:
+            if section not in config.sections():
+                LOGGER.warning(
+                    "No config item called %s found in config file.", section)
+        for section in config.sections():
+            if section not in config_items:
+                config.remove_section(section)
+    return len(config.sections()) > 0
+
+
+def _get_options(config, section, keys):
+    """Get the *keys* options of *section*, or None if there is no section.
+    """
+    if not config.has_section(section):
+        return None
+    return dict((key, config.get(section, key)) for key in keys
+                if config.has_option(section, key))
+
+
+def migrate_collectors(old_collectors, new_collectors):
+    """Keep the *old_collectors* of the regions still in *new_collectors*.
+
+    The kept collectors take the settings of the new ones, but keep their
+    ongoing collection and the reception delays learned so far. The
+    timeout of their ongoing collection follows the change of timeliness.
+
+    The collectors must not be in use meanwhile, see
+    *Trigger.set_collectors*.
+    """
+    old_by_area = dict((collector.region.area_id, collector)
+                       for collector in old_collectors)
+    collectors = []
+    for new in new_collectors:
+        old = old_by_area.pop(new.region.area_id, None)
+        if old is None:
+            collectors.append(new)
+            continue
+        if old.timeout is not None:
+            old_timeliness = old.get_timeliness()
+        old.timeliness = new.timeliness
+        if new.granule_duration is not None:
+            old.granule_duration = new.granule_duration
+        estimator = new.latency_estimator
+        if estimator is not None and old.latency_estimator is not None:
+            for attr in ["quantile", "window", "min_samples"]:
+                setattr(old.latency_estimator, attr,
+                        getattr(estimator, attr))
+            estimator = old.latency_estimator
+        old.latency_estimator = estimator
+        old.platforms = new.platforms
+        old.sensors = new.sensors
+        if old.timeout is not None:
+            old.timeout += old.get_timeliness() - old_timeliness
+        collectors.append(old)
+    for area_id, old in old_by_area.items():
+        if old.timeout is not None:
+            LOGGER.warning("Dropping the ongoing collection for %s", area_id)
+    return collectors
+
+
+def stop_trigger(granule_trigger):
+    """Stop *granule_trigger* and wait for it to finish."""
+    granule_trigger.stop()
+    if isinstance(granule_trigger, Thread) and granule_trigger.is_alive():
+        granule_trigger.join()
+
+
+def reload_config(filename, config_items=None, decoder=get_metadata,
+                  engine=None):
+    """Reload the configuration from *filename*, and update the triggers.
+
+    Only the triggers of the sections that were added, removed or whose
+    trigger options changed are started or stopped. The collectors of the
+    regions that are still configured are passed on to the new triggers
+    with their ongoing collections, and if only collector options changed,
+    the trigger is kept running with the updated collectors.
+
+    With an asyncio *engine*, only the collectors can be updated, adding or
+    restarting triggers needs a restart of the gatherer.
+    """
+    global CONFIG
+    global SECTIONS
+
+    LOGGER.info("Reloading configuration from %s", filename)
+    new_config = RawConfigParser()
+    try:
+        new_config.read(filename)
+    except Exception:
+        LOGGER.exception("Can't read %s, keeping the current configuration",
+                         filename)
+        return
+    if not filter_sections(new_config, config_items):
+        LOGGER.error("No valid config item in %s, "
+                     "keeping the current configuration", filename)
+        return
+
+    with RELOAD_LOCK:
+        old_config = CONFIG
+        CONFIG = new_config
+        SECTIONS = get_section_table(CONFIG)
+
+        for section in list(TRIGGERS.keys()):
+            if new_config.has_section(section):
+                continue
+            if engine is not None:
+                LOGGER.warning("Can't remove %s from the running triggers, "
+                               "restart needed", section)
+                continue
+            LOGGER.info("Removing %s", section)
+            stop_trigger(TRIGGERS.pop(section))
+
+        for section in new_config.sections():
+            old_trigger = TRIGGERS.get(section)
+            if old_trigger is None:
+                if engine is not None:
+                    LOGGER.warning("Can't add %s to the running triggers, "
+                                   "restart needed", section)
+                    continue
+                LOGGER.info("Adding %s", section)
+                TRIGGERS[section] = get_trigger(section,
+                                                get_collectors(section),
+                                                decoder)
+                TRIGGERS[section].start()
+                continue
+
+            old_options = _get_options(old_config, section, TRIGGER_OPTIONS)
+            new_options = _get_options(new_config, section, TRIGGER_OPTIONS)
+            collectors_changed = (
+                _get_options(old_config, section, COLLECTOR_OPTIONS) !=
+                _get_options(new_config, section, COLLECTOR_OPTIONS))
+            if old_options == new_options and not collectors_changed:
+                continue
+            new_collectors = get_collectors(section)
+            if old_options == new_options:
+                LOGGER.info("Updating the collectors of %s", section)
+                old_trigger.set_collectors(new_collectors,
+                                           migrate_collectors)
+            elif engine is not None:
+                LOGGER.warning("Can't restart the trigger of %s, "
+                               "restart needed", section)
+                old_trigger.set_collectors(new_collectors,
+                                           migrate_collectors)
+            else:
+                LOGGER.info("Restarting the trigger of %s", section)
+                # Don't lose the granules received just before the reload
+                old_trigger.process_queue()
+                stop_trigger(old_trigger)
+                # The old collectors are not used anymore
+                collectors = migrate_collectors(old_trigger.collectors,
+                                                new_collectors)
+                TRIGGERS[section] = get_trigger(section, collectors, decoder)
+                TRIGGERS[section].start()
 
 
 def main():
@@ -241,34 +548,45 @@ def main():
     logging.getLogger("posttroll").setLevel(logging.INFO)
     LOGGER = logging.getLogger("gatherer")
 
-    if opts.config_item:
-        for section in opts.config_item:
-            if section not in CONFIG.sections():
-                LOGGER.warning(
-                    "No config item called %s found in config file.", section)
-        for section in CONFIG.sections():
-            if section not in opts.config_item:
-                CONFIG.remove_section(section)
-        if len(CONFIG.sections()) == 0:
-            LOGGER.error("No valid config item provided")
-            return
+    if not filter_sections(CONFIG, opts.config_item):
+        LOGGER.error("No valid config item provided")
+        return
 
     decoder = get_metadata
 
     PUB = publisher.NoisyPublisher("gatherer")
 
-    granule_triggers = setup(decoder)
+    if opts.asyncio:
+        from pytroll_collectors.async_trigger import TriggerEngine
+        engine = TriggerEngine()
+        setup(decoder, engine)
+    else:
+        engine = None
+        setup(decoder)
+
+    def get_granule_triggers():
+        if engine is not None:
+            return [engine]
+        return list(TRIGGERS.values())
+
+    def reload_config_file(pathname, config_items):
+        reload_config(pathname, config_items, decoder, engine)
+
+    config_watcher = ConfigWatcher(os.path.abspath(opts.config),
+                                   opts.config_item, reload_config_file)
 
     PUB.start()
 
-    for granule_trigger in granule_triggers:
+    for granule_trigger in get_granule_triggers():
         granule_trigger.start()
+    config_watcher.start()
     try:
         while True:
             time.sleep(1)
-            for granule_trigger in granule_triggers:
-                if not granule_trigger.is_alive():
-                    raise RuntimeError
+            with RELOAD_LOCK:
+                for granule_trigger in get_granule_triggers():
+                    if not granule_trigger.is_alive():
+                        raise RuntimeError
     except KeyboardInterrupt:
         LOGGER.info("Shutting down...")
     except RuntimeError:
@@ -277,8 +595,10 @@ def main():
         LOGGER.critical('Something went wrong!')
     finally:
         LOGGER.warning('Ending publication the gathering of granules...')
-        for granule_trigger in granule_triggers:
-            granule_trigger.stop()
+        config_watcher.stop()
+        with RELOAD_LOCK:
+            for granule_trigger in get_granule_triggers():
+                granule_trigger.stop()
         PUB.stop()
 
 
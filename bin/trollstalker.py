@@ -37,16 +37,37 @@ import os
 import os.path
 import re
 import datetime as dt
-from collections import deque, OrderedDict
+from collections import OrderedDict, namedtuple
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from threading import Lock
 
 from posttroll.publisher import NoisyPublisher
 from posttroll.message import Message
-from trollsift import Parser, compose
+from trollsift import Parser
 from pytroll_collectors import helper_functions
+from pytroll_collectors.backlog import Backlog
+from pytroll_collectors.history import History, PersistentHistory
+from pytroll_collectors.queues import PublisherQueue
+from pytroll_collectors.stability import StabilityChecker
+from pytroll_collectors.watches import WatchBudget
 
 LOGGER = logging.getLogger(__name__)
 
 
+# Event for the files not reported by inotify
+FileEvent = namedtuple('FileEvent', ['pathname', 'dir', 'mask'])
+
+# Options shared by all the config items of one process
+PROCESS_OPTIONS = ('posttroll_port', 'nameservers', 'publish_rate',
+                   'publish_burst', 'publish_batch_size', 'max_watches',
+                   'watch_max_age')
+
+# Commandline overrides of the options of a single config item
+ITEM_ARGS = ('monitored_dirs', 'topic', 'filepattern', 'event_names',
+             'instrument')
+
+
 class EventHandler(ProcessEvent):
 
     """
@@ -54,16 +75,51 @@ class EventHandler(ProcessEvent):
      *topic* - topic of the published messages
      *posttroll_port* - port number to publish the messages on
      *filepattern* - filepattern for finding information from the filename
+     *history* - number of recently published files to skip if seen again
+     *history_expiry* - time in seconds to skip the published files if seen
+      again, if *history* is 0 there is no limit on the number of files
+     *history_file* - sqlite file keeping the history across restarts
+     *publisher* - started publisher to use, instead of creating one
+     *stability_interval* - if given, the files are published once their
+      size and mtime are unchanged for that many seconds, instead of on the
+      first event
+     *publish_rate*, *publish_burst*, *publish_batch_size* - the messages
+      are sent from a PublisherQueue, in batches of *publish_batch_size* at
+      most *publish_rate* messages per second (0 for no limit), in bursts of
+      *publish_burst*
+     *checksum* - if given, the size and checksum of the files, with this
+      algorithm (see helper_functions.new_checksum), are added to the
+      messages as *filesize* and *checksum* ("<algorithm>:<hex digest>").
+      The files are read by a pool of *checksum_workers* threads
+     *watches* - WatchBudget managing the watches of the directories,
+      instead of creating one for *watchManager*, with at most
+      *max_watches* subdirectories, dropped after *watch_max_age* seconds
+      without new files. If the filepattern has directories (see
+      origin_inotify_base_dir_skip_levels), only the matching
+      subdirectories are watched
     """
 
     def __init__(self, topic, instrument, posttroll_port=0, filepattern=None,
                  aliases=None, tbus_orbit=False, history=0, granule_length=0,
-                 custom_vars=None, nameservers=[], watchManager=None):
+                 custom_vars=None, nameservers=[], watchManager=None,
+                 history_expiry=None, publisher=None,
+                 stability_interval=None, publish_rate=0, publish_burst=1,
+                 publish_batch_size=100, checksum=None, checksum_workers=4,
+                 history_file=None, watches=None, max_watches=None,
+                 watch_max_age=None):
         super(EventHandler, self).__init__()
 
-        self._pub = NoisyPublisher("trollstalker", posttroll_port, topic,
-                                   nameservers=nameservers)
-        self.pub = self._pub.start()
+        if publisher is None:
+            self._pub = NoisyPublisher("trollstalker", posttroll_port, topic,
+                                       nameservers=nameservers)
+            self.pub = PublisherQueue(self._pub.start(),
+                                      batch_size=publish_batch_size,
+                                      rate=publish_rate,
+                                      burst=publish_burst)
+            self.pub.start()
+        else:
+            self._pub = None
+            self.pub = publisher
         self.topic = topic
         self.info = OrderedDict()
         if filepattern is None:
@@ -74,14 +130,59 @@ class EventHandler(ProcessEvent):
         self.custom_vars = custom_vars
         self.tbus_orbit = tbus_orbit
         self.granule_length = granule_length
-        self._deque = deque([], history)
-        self._watchManager = watchManager
-        self._watched_dirs = dict()
+        self._sensors = instrument.split(',') if instrument else []
+        self._skip_levels = None
+        if custom_vars and 'origin_inotify_base_dir_skip_levels' in custom_vars:
+            self._skip_levels = int(
+                custom_vars['origin_inotify_base_dir_skip_levels'])
+        else:
+            LOGGER.debug("No origin_inotify_base_dir_skip_levels in self.custom_vars")
+        self._steps = self._compile_steps()
+        self._dir_parsers = []
+        if self._skip_levels is not None and os.path.dirname(filepattern):
+            self._dir_parsers = [Parser(part) for part in
+                                 os.path.dirname(filepattern).split('/')]
+        if history_expiry and not history:
+            history = None
+        if history_file:
+            self._history = PersistentHistory(history_file, history,
+                                              history_expiry)
+        else:
+            self._history = History(history, history_expiry)
+        if watches is None and watchManager is not None:
+            watches = WatchBudget(watchManager, max_watches=max_watches,
+                                  max_age=watch_max_age,
+                                  dir_filter=self.watches_dir)
+        self.watches = watches
+        # The backlog and the stable files are processed in their own
+        # threads
+        self._lock = Lock()
+        self.checksum = checksum
+        self._checksum_pool = None
+        if checksum:
+            # Fail early for unknown algorithms
+            helper_functions.new_checksum(checksum)
+            self._checksum_pool = ThreadPool(checksum_workers)
+        self._stability = None
+        if stability_interval:
+            self._stability = StabilityChecker(self.process_stable,
+                                               stability_interval)
+            self._stability.start()
 
     def stop(self):
         '''Stop publisher.
         '''
-        self._pub.stop()
+        # The stable files and the checksums still send messages, so they
+        # are waited for before stopping the publisher
+        if self._stability is not None:
+            self._stability.stop()
+        if self._checksum_pool is not None:
+            self._checksum_pool.close()
+            self._checksum_pool.join()
+        if self._pub is not None:
+            self.pub.stop()
+            self._pub.stop()
+        self._history.close()
 
     def __clean__(self):
         '''Clean instance attributes.
@@ -112,6 +213,12 @@ class EventHandler(ProcessEvent):
         LOGGER.debug("trigger: IN_CREATE")
         self.process(event)
 
+    def process_IN_MODIFY(self, event):
+        """When a file is modified, process the associated event.
+        """
+        LOGGER.debug("trigger: IN_MODIFY")
+        self.process(event)
+
     def process_IN_CLOSE_MODIFY(self, event):
         """When a file is modified and closed, process the associated event.
         """
@@ -121,46 +228,97 @@ class EventHandler(ProcessEvent):
     def process_IN_DELETE(self, event):
         """On delete."""
         if (event.mask & pyinotify.IN_ISDIR ):
-            try:
-                try:
-                    self._watchManager.rm_watch(self._watched_dirs[event.pathname], quiet=False)
-                except pyinotify.WatchManagerError:
-                    #As the directory is deleted prior removing the watch will cause a error message
-                    #from pyinotify. This is ok, so just pass the exception.
-                    LOGGER.debug("Removed watch: {}".format(event.pathname))
-                    pass
-                finally:
-                    del self._watched_dirs[event.pathname]
-            except KeyError:
-                LOGGER.warning("Dir {} not watched by inotify. Can not delete watch.".format(event.pathname))
+            if self.watches is not None and self.watches.remove(event.pathname):
+                LOGGER.debug("Removed watch: {}".format(event.pathname))
+            else:
+                LOGGER.debug("Dir {} not watched by inotify. Can not delete watch.".format(event.pathname))
         return
 
     def process(self, event):
         '''Process the event'''
+        with self._lock:
+            self._process(event)
+
+    def process_backlog(self, pathname):
+        '''Process a file found in the backlog'''
+        self.process(FileEvent(pathname, False, 0))
+
+    def process_stable(self, pathname):
+        '''Process a file that is completely written'''
+        with self._lock:
+            self._process_file(FileEvent(pathname, False, 0))
+
+    def matches(self, pathname):
+        '''Check if *pathname* matches the filepattern'''
+        return self.file_parser.validate(self._get_parsed_name(pathname))
+
+    def watches_dir(self, path):
+        '''Check if the directory *path* can hold files matching the
+        filepattern'''
+        if not self._dir_parsers:
+            return True
+        parts = path.split('/')[self._skip_levels:]
+        if len(parts) > len(self._dir_parsers):
+            return False
+        return all(parser.validate(part)
+                   for parser, part in zip(self._dir_parsers, parts))
+
+    def _get_parsed_name(self, pathname):
+        '''Get the part of *pathname* to parse with the filepattern'''
+        if self._skip_levels is not None:
+            return "/".join(pathname.split('/')[self._skip_levels:])
+        return os.path.basename(pathname)
+
+    def _process(self, event):
         # New file created and closed
         if not event.dir:
-            LOGGER.debug("processing %s", event.pathname)
-            # parse information and create self.info OrderedDict{}
-            self.parse_file_info(event)
-            if len(self.info) > 0:
-                # Check if this file has been recently dealt with
-                if event.pathname not in self._deque:
-                    self._deque.append(event.pathname)
-                    message = self.create_message()
-                    LOGGER.info("Publishing message %s", str(message))
-                    self.pub.send(str(message))
-                else:
-                    LOGGER.info("Data has been published recently, skipping.")
-            self.__clean__()
+            if self.watches is not None:
+                self.watches.touch(os.path.dirname(event.pathname))
+            if self._stability is None:
+                self._process_file(event)
+            elif self.matches(event.pathname):
+                # Published once the file is stable
+                self._stability.add(event.pathname)
         elif (event.mask & pyinotify.IN_ISDIR):
             tmask = (pyinotify.IN_CLOSE_WRITE | pyinotify.IN_MOVED_TO |
                      pyinotify.IN_CREATE | pyinotify.IN_DELETE)
-            try:
-                self._watched_dirs.update(self._watchManager.add_watch(event.pathname, tmask))
-                LOGGER.debug("Added watch on dir: {}".format(event.pathname))
-            except AttributeError:
+            if self.watches is None:
                 LOGGER.error("No watchmanager given. Can not add watch on {}".format(event.pathname))
-                pass
+            else:
+                self.watches.add(event.pathname, tmask)
+
+    def _process_file(self, event):
+        LOGGER.debug("processing %s", event.pathname)
+        # parse information and create self.info OrderedDict{}
+        self.parse_file_info(event)
+        if len(self.info) > 0:
+            # Check if this file has been recently dealt with
+            if self._history.add(event.pathname):
+                LOGGER.info("Publishing message for %s", event.pathname)
+                if self._checksum_pool is None:
+                    self.pub.send(self.create_message())
+                else:
+                    # Large files don't hold the events back
+                    self._checksum_pool.apply_async(self._enrich_and_send,
+                                                    (self.create_message(),))
+            else:
+                LOGGER.info("Data has been published recently, skipping.")
+        self.__clean__()
+
+    def _enrich_and_send(self, message):
+        '''Add the size and checksum of the file to *message*, and send it.
+        '''
+        uri = message.data['uri']
+        try:
+            size, checksum = helper_functions.file_checksum(uri,
+                                                            self.checksum)
+        except (IOError, OSError) as err:
+            LOGGER.warning("Can't compute the checksum of %s: %s",
+                           uri, str(err))
+        else:
+            message.data['filesize'] = size
+            message.data['checksum'] = self.checksum + ':' + checksum
+        self.pub.send(message)
 
     def create_message(self):
         """Create broadcasted message
@@ -174,12 +332,7 @@ class EventHandler(ProcessEvent):
         try:
             LOGGER.debug("filter: %s\t event: %s",
                          self.file_parser.fmt, event.pathname)
-            pathname_join = os.path.basename(event.pathname)
-            if 'origin_inotify_base_dir_skip_levels' in self.custom_vars:
-                pathname_list = event.pathname.split('/')
-                pathname_join = "/".join(pathname_list[int(self.custom_vars['origin_inotify_base_dir_skip_levels']):])
-            else:
-                LOGGER.debug("No origin_inotify_base_dir_skip_levels in self.custom_vars")
+            pathname_join = self._get_parsed_name(event.pathname)
 
             self.info = OrderedDict()
             self.info.update(self.file_parser.parse(
@@ -192,61 +345,148 @@ class EventHandler(ProcessEvent):
         else:
             self.info['uri'] = event.pathname
             self.info['uid'] = os.path.basename(event.pathname)
-            self.info['sensor'] = self.instrument.split(',')
+            self.info['sensor'] = list(self._sensors)
             LOGGER.debug("self.info['sensor']: " + str(self.info['sensor']))
 
-            if self.tbus_orbit and "orbit_number" in self.info:
-                LOGGER.info("Changing orbit number by -1!")
-                self.info["orbit_number"] -= 1
-
-            # replace values with corresponding aliases, if any are given
-            if self.aliases:
-                info = self.info.copy()
-                for key in info:
-                    if key in self.aliases:
-                        self.info['orig_' + key] = self.info[key]
-                        self.info[key] = self.aliases[key][str(self.info[key])]
-
-            # add start_time and end_time if not present
-            try:
-                base_time = self.info["time"]
-            except KeyError:
-                try:
-                    base_time = self.info["nominal_time"]
-                except KeyError:
-                    base_time = self.info["start_time"]
-            if "start_time" not in self.info:
-                self.info["start_time"] = base_time
-            if "start_date" in self.info:
-                self.info["start_time"] = \
-                    dt.datetime.combine(self.info["start_date"].date(),
-                                        self.info["start_time"].time())
-                if "end_date" not in self.info:
-                    self.info["end_date"] = self.info["start_date"]
-                del self.info["start_date"]
-            if "end_date" in self.info:
-                self.info["end_time"] = \
-                    dt.datetime.combine(self.info["end_date"].date(),
-                                        self.info["end_time"].time())
-                del self.info["end_date"]
-            if "end_time" not in self.info and self.granule_length > 0:
-                self.info["end_time"] = base_time + \
-                    dt.timedelta(seconds=self.granule_length)
-
-            if "end_time" in self.info:
-                while self.info["start_time"] > self.info["end_time"]:
-                    self.info["end_time"] += dt.timedelta(days=1)
-
-            if self.custom_vars is not None:
-                for var_name in self.custom_vars:
-                    var_pattern = self.custom_vars[var_name]
-                    var_val = None
-                    if '%' in var_pattern:
-                        var_val = helper_functions.create_aligned_datetime_var(
-                            var_pattern, self.info)
-                    if var_val is None:
-                        var_val = compose(var_pattern, self.info)
-                    self.info[var_name] = var_val
+            for step in self._steps:
+                step(self.info)
+
+    def _compile_steps(self):
+        '''Prepare the processing of the parsed info, once for all files.'''
+        steps = []
+        if self.tbus_orbit:
+            steps.append(_decrement_orbit_number)
+
+        # replace values with corresponding aliases, if any are given
+        if self.aliases:
+            steps.append(partial(_apply_aliases, list(self.aliases.items())))
+
+        # add start_time and end_time if not present
+        steps.append(partial(_complete_times,
+                             granule_length=self.granule_length))
+
+        if self.custom_vars is not None:
+            for var_name, var_pattern in self.custom_vars.items():
+                steps.append(partial(
+                    _set_var, var_name,
+                    helper_functions.compile_custom_var(var_pattern)))
+        return steps
+
+
+def _decrement_orbit_number(info):
+    '''Decrement the orbit number, for the TBUS orbit numbering.'''
+    if "orbit_number" in info:
+        LOGGER.info("Changing orbit number by -1!")
+        info["orbit_number"] -= 1
+
+
+def _apply_aliases(aliases, info):
+    '''Replace the values of *info* with their *aliases*, as (key, alias map)
+    items, keeping the original values as orig_<key>.
+    '''
+    for key, alias in aliases:
+        if key in info:
+            info['orig_' + key] = info[key]
+            info[key] = alias[str(info[key])]
+
+
+def _complete_times(info, granule_length=0):
+    '''Add start_time and end_time to *info*, if not present.'''
+    try:
+        base_time = info["time"]
+    except KeyError:
+        try:
+            base_time = info["nominal_time"]
+        except KeyError:
+            base_time = info["start_time"]
+    if "start_time" not in info:
+        info["start_time"] = base_time
+    if "start_date" in info:
+        info["start_time"] = \
+            dt.datetime.combine(info["start_date"].date(),
+                                info["start_time"].time())
+        if "end_date" not in info:
+            info["end_date"] = info["start_date"]
+        del info["start_date"]
+    if "end_date" in info:
+        info["end_time"] = \
+            dt.datetime.combine(info["end_date"].date(),
+                                info["end_time"].time())
+        del info["end_date"]
+    if "end_time" not in info and granule_length > 0:
+        info["end_time"] = base_time + \
+            dt.timedelta(seconds=granule_length)
+
+    if "end_time" in info:
+        while info["start_time"] > info["end_time"]:
+            info["end_time"] += dt.timedelta(days=1)
+
+
+def _set_var(var_name, get_value, info):
+    '''Set the custom variable *var_name* of *info*.'''
+    info[var_name] = get_value(info)
+
+
+class EventDispatcher(ProcessEvent):
+
+    """
+    Event handler dispatching the events of one inotify instance to the
+    EventHandlers of several config items.
+     *publisher* - publisher shared by the EventHandlers, stopped with them
+     *sender* - PublisherQueue of the publisher, stopped with them
+    """
+
+    def __init__(self, publisher=None, sender=None):
+        super(EventDispatcher, self).__init__()
+        self.publisher = publisher
+        self.sender = sender
+        self.handlers = []
+        self._routes = []
+
+    def add_handler(self, handler, monitored_dirs, event_mask):
+        '''Send the events of *event_mask* happening in *monitored_dirs*
+        (recursively) to *handler*.
+        '''
+        dirs = tuple(os.path.join(os.path.abspath(path), '')
+                     for path in monitored_dirs)
+        self.handlers.append(handler)
+        self._routes.append((dirs, event_mask, handler))
+
+    def get_handlers(self, event):
+        '''Get the handlers of *event*.
+
+        The watches of the directories are shared, so the events of the
+        directories go to the first handler watching them only, whatever
+        the events of its item.
+        '''
+        if event.dir:
+            for dirs, event_mask, handler in self._routes:
+                if event.pathname.startswith(dirs):
+                    return [handler]
+            return []
+        return [handler for dirs, event_mask, handler in self._routes
+                if event.mask & event_mask and
+                event.pathname.startswith(dirs)]
+
+    def watches_dir(self, path):
+        '''Check if the directory *path* is needed by one of the handlers.'''
+        return any(handler.watches_dir(path)
+                   for dirs, event_mask, handler in self._routes
+                   if path.startswith(dirs))
+
+    def process_default(self, event):
+        '''Dispatch the event.'''
+        for handler in self.get_handlers(event):
+            handler(event)
+
+    def stop(self):
+        '''Stop the handlers and the publisher.'''
+        for handler in self.handlers:
+            handler.stop()
+        if self.sender is not None:
+            self.sender.stop()
+        if self.publisher is not None:
+            self.publisher.stop()
 
 
 class NewThreadedNotifier(ThreadedNotifier):
@@ -262,21 +502,18 @@ class NewThreadedNotifier(ThreadedNotifier):
 def create_notifier(topic, instrument, posttroll_port, filepattern,
                     event_names, monitored_dirs, aliases=None,
                     tbus_orbit=False, history=0, granule_length=0,
-                    custom_vars=None, nameservers=[]):
+                    custom_vars=None, nameservers=[], history_expiry=None,
+                    stability_interval=None, publish_rate=0, publish_burst=1,
+                    publish_batch_size=100, checksum=None,
+                    checksum_workers=4, history_file=None,
+                    max_watches=None, watch_max_age=None):
     '''Create new notifier'''
 
     # Event handler observes the operations in defined folder
     manager = WatchManager()
 
     # Collect mask for events that are monitored
-    if type(event_names) is not list:
-        event_names = event_names.split(',')
-    event_mask = 0
-    for event in event_names:
-        try:
-            event_mask |= getattr(pyinotify, event)
-        except AttributeError:
-            LOGGER.warning('Event ' + event + ' not found in pyinotify')
+    event_mask = get_event_mask(event_names)
 
     event_handler = EventHandler(topic, instrument,
                                  posttroll_port=posttroll_port,
@@ -287,17 +524,120 @@ def create_notifier(topic, instrument, posttroll_port, filepattern,
                                  granule_length=granule_length,
                                  custom_vars=custom_vars,
                                  nameservers=nameservers,
-                                 watchManager=manager)
+                                 watchManager=manager,
+                                 history_expiry=history_expiry,
+                                 stability_interval=stability_interval,
+                                 publish_rate=publish_rate,
+                                 publish_burst=publish_burst,
+                                 publish_batch_size=publish_batch_size,
+                                 checksum=checksum,
+                                 checksum_workers=checksum_workers,
+                                 history_file=history_file,
+                                 max_watches=max_watches,
+                                 watch_max_age=watch_max_age)
 
     notifier = NewThreadedNotifier(manager, event_handler)
 
     # Add directories and event masks to watch manager
     for monitored_dir in monitored_dirs:
-        manager.add_watch(monitored_dir, event_mask, rec=True)
+        event_handler.watches.add_tree(monitored_dir, event_mask)
 
     return notifier
 
 
+def create_multi_notifier(items, posttroll_port=0, nameservers=[],
+                          publish_rate=0, publish_burst=1,
+                          publish_batch_size=100, max_watches=None,
+                          watch_max_age=None):
+    '''Create a notifier for several config items, sharing one inotify
+    instance and one publisher.
+
+    *items* are dictionaries of options, as given by *read_config_item*.
+    '''
+    manager = WatchManager()
+    pub = NoisyPublisher("trollstalker", posttroll_port,
+                         [item['topic'] for item in items],
+                         nameservers=nameservers)
+    sender = PublisherQueue(pub.start(), batch_size=publish_batch_size,
+                            rate=publish_rate, burst=publish_burst)
+    sender.start()
+    dispatcher = EventDispatcher(publisher=pub, sender=sender)
+    watches = WatchBudget(manager, max_watches=max_watches,
+                          max_age=watch_max_age,
+                          dir_filter=dispatcher.watches_dir)
+
+    dir_masks = OrderedDict()
+    for item in items:
+        event_mask = get_event_mask(item['event_names'])
+        event_handler = EventHandler(item['topic'], item['instrument'],
+                                     filepattern=item['filepattern'],
+                                     aliases=item['aliases'],
+                                     tbus_orbit=item['tbus_orbit'],
+                                     history=item['history'],
+                                     granule_length=item['granule_length'],
+                                     custom_vars=item['custom_vars'],
+                                     watchManager=manager,
+                                     history_expiry=item['history_expiry'],
+                                     publisher=sender,
+                                     stability_interval=item['stability_interval'],
+                                     checksum=item['checksum'],
+                                     checksum_workers=item['checksum_workers'],
+                                     history_file=item['history_file'],
+                                     watches=watches)
+        dispatcher.add_handler(event_handler, item['monitored_dirs'],
+                               event_mask)
+        for monitored_dir in item['monitored_dirs']:
+            monitored_dir = os.path.abspath(monitored_dir)
+            dir_masks[monitored_dir] = (dir_masks.get(monitored_dir, 0) |
+                                        event_mask)
+
+    notifier = NewThreadedNotifier(manager, dispatcher)
+
+    # Watch each directory once, for the events of all the items. A
+    # directory within another one also needs the events of the latter.
+    for monitored_dir, event_mask in dir_masks.items():
+        for other_dir, other_mask in dir_masks.items():
+            if os.path.join(monitored_dir, '').startswith(
+                    os.path.join(other_dir, '')):
+                event_mask |= other_mask
+        watches.add_tree(monitored_dir, event_mask)
+
+    return notifier
+
+
+def get_process_options(items, names):
+    '''Get the options shared by all the config *items*, as keyword
+    arguments of create_multi_notifier.
+
+    Raise ValueError if the items disagree on any of them.
+    '''
+    options = {}
+    for option in PROCESS_OPTIONS:
+        values = [item[option] for item in items]
+        for name, value in zip(names, values):
+            if value != values[0]:
+                raise ValueError("Config items %s and %s disagree on %s, "
+                                 "set it in the DEFAULT section instead" %
+                                 (names[0], name, option))
+        options[option] = values[0]
+    return options
+
+
+def get_event_mask(event_names):
+    '''Get the inotify mask of *event_names* (a list or a comma separated
+    string).
+    '''
+    if type(event_names) is not list:
+        event_names = event_names.split(',')
+    event_mask = 0
+    for event in event_names:
+        try:
+            event_mask |= getattr(pyinotify, event)
+        except AttributeError:
+            LOGGER.warning('Event ' + event + ' not found in pyinotify')
+    return event_mask
+
+
 def parse_vars(config):
     '''Parse custom variables from the config.
 
@@ -319,15 +659,110 @@ def parse_vars(config):
     return vars
 
 
-def main():
-    '''Main(). Commandline parsing and stalker startup.'''
+def read_config_item(config, config_item, args):
+    '''Get the options of *config_item* in *config* (a RawConfigParser, or
+    None), overridden by the commandline *args*.
+    '''
+    if config is not None:
+        config = OrderedDict(config.items(config_item))
+        config['name'] = args.configuration_file
+    else:
+        config = OrderedDict()
 
-    print("Setting timezone to UTC")
-    os.environ["TZ"] = "UTC"
-    time.tzset()
+    monitored_dirs = args.monitored_dirs or config['directory'].split(",")
+    if type(monitored_dirs) is not list:
+        monitored_dirs = [monitored_dirs]
 
-    parser = argparse.ArgumentParser()
+    try:
+        posttroll_port = args.posttroll_port or int(config['posttroll_port'])
+    except (KeyError, ValueError):
+        posttroll_port = args.posttroll_port or 0
 
+    nameservers = args.nameservers or config.get('nameservers')
+    if nameservers:
+        nameservers = nameservers.split(',')
+    else:
+        nameservers = []
+
+    try:
+        history_expiry = float(config['history_expiry'])
+    except KeyError:
+        history_expiry = None
+    try:
+        backlog_max_age = float(config['backlog_max_age'])
+    except KeyError:
+        backlog_max_age = None
+    try:
+        stability_interval = float(config['stability_interval'])
+    except KeyError:
+        stability_interval = None
+    try:
+        max_watches = int(config['max_watches'])
+    except KeyError:
+        max_watches = None
+    try:
+        watch_max_age = float(config['watch_max_age'])
+    except KeyError:
+        watch_max_age = None
+
+    return {'topic': args.topic or config['topic'],
+            'monitored_dirs': monitored_dirs,
+            'filepattern': args.filepattern or config.get('filepattern'),
+            'posttroll_port': posttroll_port,
+            'event_names': (args.event_names or
+                            config.get('event_names') or
+                            'IN_CLOSE_WRITE,IN_MOVED_TO'),
+            'instrument': args.instrument or config.get('instruments'),
+            'history': int(config.get('history', 0)),
+            'history_expiry': history_expiry,
+            'history_file': config.get('history_file'),
+            'max_watches': max_watches,
+            'watch_max_age': watch_max_age,
+            'stability_interval': stability_interval,
+            'publish_rate': float(config.get('publish_rate', 0)),
+            'publish_burst': int(config.get('publish_burst', 1)),
+            'publish_batch_size': int(config.get('publish_batch_size', 100)),
+            'checksum': config.get('checksum'),
+            'checksum_workers': int(config.get('checksum_workers', 4)),
+            'backlog_max_age': backlog_max_age,
+            'backlog_workers': int(config.get('backlog_workers', 4)),
+            'backlog_rate': float(config.get('backlog_rate', 0)),
+            'backlog_batch_size': int(config.get('backlog_batch_size', 100)),
+            'nameservers': nameservers,
+            'aliases': helper_functions.parse_aliases(config),
+            'tbus_orbit': bool(config.get("tbus_orbit", False)),
+            'granule_length': float(config.get("granule", 0)),
+            'custom_vars': parse_vars(config),
+            'stalker_log_config': config.get('stalker_log_config'),
+            'loglevel': config.get('loglevel')}
+
+
+def setup_logging(options):
+    '''Setup the logging from the options of a config item.'''
+    if options['stalker_log_config'] is not None:
+        logging.config.fileConfig(options['stalker_log_config'])
+        return
+    try:
+        loglevel = getattr(logging, options["loglevel"])
+        if loglevel == "":
+            raise AttributeError
+    except (AttributeError, TypeError):
+        loglevel = logging.DEBUG
+    LOGGER.setLevel(loglevel)
+
+    strhndl = logging.StreamHandler()
+    strhndl.setLevel(loglevel)
+    log_format = "[%(asctime)s %(levelname)-8s %(name)s] %(message)s"
+    formatter = logging.Formatter(log_format)
+
+    strhndl.setFormatter(formatter)
+    LOGGER.addHandler(strhndl)
+
+
+def arg_parse():
+    '''Handle input arguments.
+    '''
+    parser = argparse.ArgumentParser()
     parser.add_argument("-d", "--monitored_dirs", dest="monitored_dirs",
                         nargs='+',
                         type=str,
@@ -345,8 +780,10 @@ def main():
                         type=str,
                         help="Name of the config.ini configuration file")
     parser.add_argument("-C", "--config_item",
-                        type=str,
-                        help="Name of the configuration item to use")
+                        type=str, nargs='+', default=[],
+                        help="Names of the configuration items to use. "
+                        "Several items share one inotify instance and "
+                        "one publisher")
     parser.add_argument("-e", "--event_names",
                         type=str, default=None,
                         help="Name of the pyinotify events to monitor")
@@ -365,27 +802,27 @@ def main():
     if len(sys.argv) <= 1:
         parser.print_help()
         sys.exit()
-    else:
-        args = parser.parse_args()
+    args = parser.parse_args()
+    if len(args.config_item) > 1:
+        overrides = ["--" + name for name in ITEM_ARGS
+                     if getattr(args, name)]
+        if overrides:
+            parser.error("%s can't be given with several config items" %
+                         ", ".join(overrides))
+    return args
 
-    # Parse commandline arguments.  If args are given, they override
-    # the configuration file.
 
-    # Check first commandline arguments
-    monitored_dirs = args.monitored_dirs
-    if monitored_dirs == '':
-        monitored_dirs = None
+def main():
+    '''Main(). Commandline parsing and stalker startup.'''
 
-    posttroll_port = args.posttroll_port
-    topic = args.topic
-    event_names = args.event_names
-    instrument = args.instrument
-    nameservers = args.nameservers
+    args = arg_parse()
 
-    filepattern = args.filepattern
-    if args.filepattern == '':
-        filepattern = None
+    print("Setting timezone to UTC")
+    os.environ["TZ"] = "UTC"
+    time.tzset()
 
+    # Parse commandline arguments.  If args are given, they override
+    # the configuration file.
     if args.configuration_file is not None:
         config_fname = args.configuration_file
 
@@ -396,94 +833,73 @@ def main():
 
         config = RawConfigParser()
         config.read(config_fname)
-        config = OrderedDict(config.items(args.config_item))
-        config['name'] = args.configuration_file
-
-        topic = topic or config['topic']
-        monitored_dirs = monitored_dirs or config['directory'].split(",")
-        filepattern = filepattern or config['filepattern']
-        try:
-            posttroll_port = posttroll_port or int(config['posttroll_port'])
-        except (KeyError, ValueError):
-            if posttroll_port is None:
-                posttroll_port = 0
-        try:
-            filepattern = filepattern or config['filepattern']
-        except KeyError:
-            pass
-        try:
-            event_names = event_names or config['event_names']
-        except KeyError:
-            pass
-        try:
-            instrument = instrument or config['instruments']
-        except KeyError:
-            pass
-        try:
-            history = int(config['history'])
-        except KeyError:
-            history = 0
-
-        try:
-            nameservers = nameservers or config['nameservers']
-        except KeyError:
-            nameservers = []
-
-        aliases = helper_functions.parse_aliases(config)
-        tbus_orbit = bool(config.get("tbus_orbit", False))
-
-        granule_length = float(config.get("granule", 0))
-
-        custom_vars = parse_vars(config)
-
-        try:
-            log_config = config["stalker_log_config"]
-        except KeyError:
-            try:
-                loglevel = getattr(logging, config["loglevel"])
-                if loglevel == "":
-                    raise AttributeError
-            except AttributeError:
-                loglevel = logging.DEBUG
-            LOGGER.setLevel(loglevel)
-
-            strhndl = logging.StreamHandler()
-            strhndl.setLevel(loglevel)
-            log_format = "[%(asctime)s %(levelname)-8s %(name)s] %(message)s"
-            formatter = logging.Formatter(log_format)
-
-            strhndl.setFormatter(formatter)
-            LOGGER.addHandler(strhndl)
-        else:
-            logging.config.fileConfig(log_config)
-
-    event_names = event_names or 'IN_CLOSE_WRITE,IN_MOVED_TO'
+        items = [read_config_item(config, config_item, args)
+                 for config_item in args.config_item]
+        setup_logging(items[0])
+    else:
+        items = [read_config_item(None, None, args)]
 
     LOGGER.debug("Logger started")
 
-    if type(monitored_dirs) is not list:
-        monitored_dirs = [monitored_dirs]
-
-    if nameservers:
-        nameservers = nameservers.split(',')
-    else:
-        nameservers = []
-
     # Start watching for new files
-    notifier = create_notifier(topic, instrument, posttroll_port, filepattern,
-                               event_names, monitored_dirs, aliases=aliases,
-                               tbus_orbit=tbus_orbit, history=history,
-                               granule_length=granule_length,
-                               custom_vars=custom_vars,
-                               nameservers=nameservers)
+    if len(items) == 1:
+        options = items[0]
+        notifier = create_notifier(options['topic'], options['instrument'],
+                                   options['posttroll_port'],
+                                   options['filepattern'],
+                                   options['event_names'],
+                                   options['monitored_dirs'],
+                                   aliases=options['aliases'],
+                                   tbus_orbit=options['tbus_orbit'],
+                                   history=options['history'],
+                                   granule_length=options['granule_length'],
+                                   custom_vars=options['custom_vars'],
+                                   nameservers=options['nameservers'],
+                                   history_expiry=options['history_expiry'],
+                                   stability_interval=options['stability_interval'],
+                                   publish_rate=options['publish_rate'],
+                                   publish_burst=options['publish_burst'],
+                                   publish_batch_size=options['publish_batch_size'],
+                                   checksum=options['checksum'],
+                                   checksum_workers=options['checksum_workers'],
+                                   history_file=options['history_file'],
+                                   max_watches=options['max_watches'],
+                                   watch_max_age=options['watch_max_age'])
+        handlers = [notifier._default_proc_fun]
+    else:
+        try:
+            options = get_process_options(items, args.config_item)
+        except ValueError as err:
+            LOGGER.error(str(err))
+            sys.exit(1)
+        notifier = create_multi_notifier(items, **options)
+        handlers = notifier._default_proc_fun.handlers
     notifier.start()
 
+    backlogs = []
+    for options, event_handler in zip(items, handlers):
+        if options['backlog_max_age'] is None:
+            continue
+        # Created after the start of the notifier, so that no file is
+        # missed in between
+        backlog = Backlog(options['monitored_dirs'],
+                          event_handler.process_backlog,
+                          match=event_handler.matches,
+                          max_age=options['backlog_max_age'],
+                          workers=options['backlog_workers'],
+                          rate=options['backlog_rate'],
+                          batch_size=options['backlog_batch_size'])
+        backlog.start()
+        backlogs.append(backlog)
+
     try:
         while True:
             time.sleep(6000000)
     except KeyboardInterrupt:
         LOGGER.info("Interupting TrollStalker")
     finally:
+        for backlog in backlogs:
+            backlog.stop()
         notifier.stop()
 
 if __name__ == "__main__":
@@ -35,13 +35,14 @@ import logging.config
 import os.path
 import datetime as dt
 
+import six
 from posttroll.publisher import NoisyPublisher
 from posttroll.message import Message
-from trollsift import Parser
 
 LOGGER = logging.getLogger(__name__)
 
 
+from pytroll_collectors.path_matcher import PatternTable
 from pytroll_collectors.trigger import AbstractWatchDogProcessor
 
 
@@ -49,23 +50,24 @@ class FilePublisher(AbstractWatchDogProcessor):
 
     def __init__(self, config):
         self.config = config.copy()
-        if isinstance(config["filepattern"], (str, unicode)):
+        if isinstance(config["filepattern"], six.string_types):
             self.config["filepattern"] = [self.config["filepattern"]]
 
-        self.parsers = [Parser(filepattern)
-                        for filepattern in self.config["filepattern"]]
+        # Shared with the watchdog filter, so that the paths are matched
+        # only once
+        self.table = PatternTable(self.config["filepattern"])
+        self.parsers = self.table.parsers
 
         self.aliases = parse_aliases(config)
 
         self.topic = self.config["topic"]
         self.tbus_orbit = self.config.get("tbus_orbit", False)
-        LOGGER.debug("Looking for: %s", str(
-            [parser.globify() for parser in self.parsers]))
+        LOGGER.debug("Looking for: %s", str(self.table.matcher.patterns))
         AbstractWatchDogProcessor.__init__(self,
-                                           [parser.globify()
-                                            for parser in self.parsers],
+                                           self.table.matcher.patterns,
                                            config.get("watcher",
-                                                      "Observer"))
+                                                      "Observer"),
+                                           matcher=self.table)
 
         self._pub = NoisyPublisher("trollstalker",
                                    int(self.config["posttroll_port"]),
@@ -75,7 +77,7 @@ class FilePublisher(AbstractWatchDogProcessor):
         obsolete_keys = ["topic", "filepattern", "tbus_orbit",
                          "posttroll_port", "watch", "config_item", "configuration_file"]
 
-        for key in self.config.keys():
+        for key in list(self.config.keys()):
             if key.startswith("alias_") or key in obsolete_keys:
                 del self.config[key]
 
@@ -89,21 +91,23 @@ class FilePublisher(AbstractWatchDogProcessor):
 
     def process(self, pathname):
         '''Process the event'''
+        self.process_match(pathname, *self.table.lookup(pathname))
+
+    def process_match(self, pathname, pattern_index, fields=None):
+        '''Process the event, for the pattern at *pattern_index* (None if
+        no pattern matches), with the *fields* already parsed from the
+        path (None to parse them here)'''
         # New file created and closed
         LOGGER.debug("processing %s", pathname)
         # parse information and create self.info dict{}
         metadata = self.config.copy()
-        success = False
-        for parser in self.parsers:
-            try:
-                metadata.update(parser.parse(pathname))
-                success = True
-                break
-            except ValueError:
-                pass
-            if not success:
-                LOGGER.warning("Could not find a matching pattern for %s",
-                               pathname)
+        if pattern_index is None:
+            LOGGER.warning("Could not find a matching pattern for %s",
+                           pathname)
+        elif fields is None:
+            metadata.update(self.table.parse(pathname, pattern_index))
+        else:
+            metadata.update(fields)
 
         metadata['uri'] = pathname
         metadata['uid'] = os.path.basename(pathname)
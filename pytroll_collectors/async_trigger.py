@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Triggers sharing a single asyncio event loop.
+
+The TriggerEngine runs the collectors and terminators of all its triggers in
+one event loop thread, instead of one thread per trigger. The timeouts are
+scheduled with *loop.call_at*, and the message and filesystem sources feed
+the triggers through asyncio queues. The posttroll subscribers and the
+watchdog observers still block in their own threads, but they are shared:
+the triggers receive their messages through subscription multiplexers, and
+the triggers watching the filesystem with the same observer class share one
+observer.
+
+This module needs python 3.5 or later.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from threading import Thread, Event
+
+from pytroll_collectors.trigger import (Trigger, PostTrollTrigger,
+                                        AbstractWatchDogProcessor,
+                                        get_subscription_multiplexer,
+                                        total_seconds)
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncTrigger(Trigger):
+
+    """Trigger running in the event loop of a TriggerEngine.
+
+    At most *queue_size* items wait for processing (0 for no limit), the
+    items arriving when the queue is full are dropped.
+    """
+
+    def __init__(self, collectors, terminator, decoder, publish_topic=None,
+                 publish_message_after_each_reception=False,
+                 publish_new_granule_only=False, queue_size=0):
+        Trigger.__init__(self, collectors, terminator,
+                         publish_topic=publish_topic,
+                         publish_message_after_each_reception=publish_message_after_each_reception,
+                         publish_new_granule_only=publish_new_granule_only)
+        self.decoder = decoder
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.loop = None
+        self.queue = None
+        self._timer = None
+
+    def attach(self, loop):
+        """Attach the trigger to *loop*, from within the loop.
+        """
+        self.loop = loop
+        self.queue = asyncio.Queue(self.queue_size)
+        for collector in self.collectors:
+            self.deadlines.update(collector)
+        self.schedule()
+        return loop.create_task(self.consume())
+
+    def set_collectors(self, collectors, migrate=None):
+        """Replace the collectors of the trigger, from any thread."""
+        Trigger.set_collectors(self, collectors, migrate)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.schedule)
+
+    def put_threadsafe(self, item):
+        """Queue *item* for processing, from any thread."""
+        self.loop.call_soon_threadsafe(self._put, item)
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            LOG.warning("Queue full (%d items), dropping %s "
+                        "(%d dropped so far)", self.queue.qsize(), str(item),
+                        self.dropped)
+
+    async def consume(self):
+        """Process the queued items."""
+        while True:
+            item = await self.queue.get()
+            try:
+                self.add_file(item)
+            except Exception:
+                LOG.exception("Something wrong happened in the processing!")
+
+    def add_file(self, item):
+        """On arrival of a file or message.
+        """
+        mda = self.decoder(item)
+        LOG.debug("mda: %s", str(mda))
+        self._do(mda)
+        self.schedule()
+
+    def schedule(self):
+        """Schedule the next timeout in the event loop."""
+        next_timeout = self.deadlines.next()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if next_timeout is None:
+            return
+        wait = total_seconds(next_timeout[0] - datetime.utcnow())
+        LOG.debug("Waiting %s seconds until timeout", str(wait))
+        self._timer = self.loop.call_at(self.loop.time() + max(wait, 0),
+                                        self._on_timeout)
+
+    def _on_timeout(self):
+        self._timer = None
+        self.finish_expired(datetime.utcnow())
+        self.schedule()
+
+
+class PostTrollSource(object):
+
+    """Feed posttroll messages to a trigger, through a multiplexer.
+    """
+
+    def __init__(self, trigger, topics, multiplexer):
+        self.trigger = trigger
+        self.multiplexer = multiplexer
+        self._started = False
+        multiplexer.add(topics, trigger.put_threadsafe)
+
+    def start(self):
+        """Start receiving messages."""
+        self.multiplexer.start()
+        self._started = True
+
+    def is_alive(self):
+        """Check if messages are still received."""
+        return self.multiplexer.is_alive()
+
+    def stop(self):
+        """Stop receiving messages."""
+        self.multiplexer.remove(self.trigger.put_threadsafe)
+        if self._started:
+            self._started = False
+            self.multiplexer.stop()
+
+
+class TriggerEngine(object):
+
+    """Run several triggers in a single asyncio event loop.
+
+    The engine has the same start/stop/is_alive interface as the threaded
+    triggers, so it can be used in their place by the gatherer.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.triggers = []
+        self.sources = []
+        self._observers = {}
+        self._tasks = []
+        self._thread = None
+        self._started = Event()
+        self._error = None
+
+    def add_posttroll_trigger(self, collectors, terminator, services, topics,
+                              publish_topic=None, nameserver="localhost",
+                              publish_message_after_each_reception=False,
+                              multiplexer=None,
+                              publish_new_granule_only=False,
+                              queue_size=0, queue_timeout=None):
+        """Add a trigger acting upon posttroll messages.
+
+        The event loop can't wait for room in the queue, so the messages
+        are dropped at once when the queue is full, and *queue_timeout* is
+        ignored.
+        """
+        trigger = AsyncTrigger(collectors, terminator,
+                               PostTrollTrigger.decode_message,
+                               publish_topic=publish_topic,
+                               publish_message_after_each_reception=publish_message_after_each_reception,
+                               publish_new_granule_only=publish_new_granule_only,
+                               queue_size=queue_size)
+        self.triggers.append(trigger)
+        if multiplexer is None:
+            multiplexer = get_subscription_multiplexer(services, nameserver)
+        self.sources.append(PostTrollSource(trigger, topics, multiplexer))
+        return trigger
+
+    def add_watchdog_trigger(self, collectors, terminator, decoder, patterns,
+                             observer_class_name, publish_topic=None,
+                             publish_message_after_each_reception=False,
+                             publish_new_granule_only=False, matcher=None):
+        """Add a trigger acting upon filesystem events.
+
+        If the *matcher* of the paths parses them, the parsed fields are
+        passed on to the *decoder* after the path.
+        """
+        def decode(item):
+            pathname, fields = item
+            if fields is None:
+                return decoder(pathname)
+            return decoder(pathname, fields)
+
+        def process_match(pathname, pattern_index, fields=None):
+            trigger.put_threadsafe((pathname, fields))
+
+        trigger = AsyncTrigger(collectors, terminator, decode,
+                               publish_topic=publish_topic,
+                               publish_message_after_each_reception=publish_message_after_each_reception,
+                               publish_new_granule_only=publish_new_granule_only)
+        self.triggers.append(trigger)
+        wdp = AbstractWatchDogProcessor(patterns, observer_class_name,
+                                        matcher=matcher)
+        wdp.process_match = process_match
+        # Share the observers between the triggers
+        wdp.observer = self._observers.setdefault(observer_class_name,
+                                                  wdp.observer)
+        for idir in wdp.input_dirs:
+            wdp.observer.schedule(wdp, idir)
+        return trigger
+
+    def start(self):
+        """Start the event loop and the sources."""
+        self._thread = Thread(target=self._run)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+        for observer in self._observers.values():
+            observer.start()
+        for source in self.sources:
+            source.start()
+        LOG.debug("Started %d triggers in the event loop",
+                  len(self.triggers))
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            try:
+                for trigger in self.triggers:
+                    self._tasks.append(trigger.attach(self.loop))
+            except Exception as err:
+                # Passed to start, so the caller doesn't wait forever
+                self._error = err
+            finally:
+                self._started.set()
+            if self._error is None:
+                self.loop.run_forever()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self.loop.run_until_complete(
+                asyncio.gather(*self._tasks, return_exceptions=True))
+            self.loop.close()
+
+    def is_alive(self):
+        """Check if the event loop and the sources are running."""
+        return (self._thread is not None and self._thread.is_alive() and
+                all(source.is_alive() for source in self.sources) and
+                all(observer.is_alive()
+                    for observer in self._observers.values()))
+
+    def stop(self):
+        """Stop the sources and the event loop."""
+        for source in self.sources:
+            source.stop()
+        if self._thread is None:
+            return
+        for observer in self._observers.values():
+            observer.stop()
+        for observer in self._observers.values():
+            observer.join()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
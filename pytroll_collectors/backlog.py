@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Catch up with the files that arrived while a watcher was not running.
+
+Inotify only reports the events happening after the watches are added, so
+the files written while the watcher was down are never announced. The
+Backlog thread scans the watched directories once at startup, and hands
+the files it finds over to a callback, oldest first, in rate-limited
+batches.
+"""
+
+import logging
+import time
+from functools import partial
+from multiprocessing.pool import ThreadPool
+from threading import Thread, Event
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+LOG = logging.getLogger(__name__)
+
+
+def scan_directory(path, match=None):
+    """Scan the directory *path*, non-recursively.
+
+    Return the (mtime, path) of the files matching *match* (a function
+    taking the path of the file, None to take all the files), and the paths
+    of the subdirectories.
+    """
+    files = []
+    subdirs = []
+    try:
+        entries = list(scandir(path))
+    except OSError as err:
+        LOG.warning("Can't scan %s: %s", path, str(err))
+        return files, subdirs
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                subdirs.append(entry.path)
+            elif match is None or match(entry.path):
+                files.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+            # The file disappeared in the meantime
+            continue
+    return files, subdirs
+
+
+def find_files(directories, match=None, newer_than=None, older_than=None,
+               recursive=True, workers=1):
+    """Find the files in *directories*, oldest first.
+
+    Only the files matching *match* (see *scan_directory*), and with an
+    mtime in [*newer_than*, *older_than*) (as epoch times, None for no
+    limit) are returned. The directories of a same depth are scanned in
+    parallel with a pool of *workers* threads.
+    """
+    pool = ThreadPool(workers) if workers > 1 else None
+    scan = partial(scan_directory, match=match)
+    found = []
+    level = list(directories)
+    try:
+        while level:
+            if pool is None:
+                results = [scan(path) for path in level]
+            else:
+                results = pool.map(scan, level)
+            level = []
+            for files, subdirs in results:
+                found.extend(
+                    (mtime, path) for mtime, path in files
+                    if ((newer_than is None or mtime >= newer_than) and
+                        (older_than is None or mtime < older_than)))
+                if recursive:
+                    level.extend(subdirs)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    found.sort()
+    return [path for mtime, path in found]
+
+
+class Backlog(Thread):
+
+    """Pass the files of *directories* to *callback*, once.
+
+    The files last modified within *max_age* seconds (None for no limit)
+    before the creation of the Backlog are taken, so the Backlog should be
+    created once the live watching is started. The files are passed in
+    batches of *batch_size*, at most *rate* files per second (0 for no
+    limit). See *find_files* for the other arguments.
+    """
+
+    def __init__(self, directories, callback, match=None, max_age=None,
+                 recursive=True, workers=4, rate=0, batch_size=100):
+        Thread.__init__(self)
+        self.daemon = True
+        self.start_time = time.time()
+        self.directories = directories
+        self.callback = callback
+        self.match = match
+        self.max_age = max_age
+        self.recursive = recursive
+        self.workers = workers
+        self.rate = rate
+        self.batch_size = batch_size
+        self._stop_event = Event()
+
+    def run(self):
+        newer_than = None
+        if self.max_age is not None:
+            newer_than = self.start_time - self.max_age
+        paths = find_files(self.directories, self.match,
+                           newer_than=newer_than,
+                           older_than=self.start_time,
+                           recursive=self.recursive,
+                           workers=self.workers)
+        LOG.info("Found %d files in the backlog", len(paths))
+        for idx in range(0, len(paths), self.batch_size):
+            if self._stop_event.is_set():
+                return
+            tic = time.time()
+            batch = paths[idx:idx + self.batch_size]
+            for path in batch:
+                try:
+                    self.callback(path)
+                except Exception:
+                    LOG.exception("Can't process %s", path)
+            if self.rate > 0:
+                wait = len(batch) / float(self.rate) - (time.time() - tic)
+                if wait > 0 and self._stop_event.wait(wait):
+                    return
+        LOG.info("Backlog done")
+
+    def stop(self):
+        """Stop passing the files."""
+        self._stop_event.set()
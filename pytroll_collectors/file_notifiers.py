@@ -1,5 +1,14 @@
+"""Notifiers for file system events.
+"""
+
+import logging
+import os
+from fnmatch import fnmatch
+
 import pyinotify
 
+LOGGER = logging.getLogger(__name__)
+
 # Generic event handler
 
 
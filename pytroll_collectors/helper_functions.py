@@ -27,8 +27,11 @@
 
 import os
 import datetime as dt
+import hashlib
 import re
 import logging
+import zlib
+from functools import partial
 from six.moves.urllib.parse import urlparse
 import netifaces
 import socket
@@ -38,6 +41,9 @@ from trollsift import compose
 LOG = logging.getLogger(__name__)
 
 
+_VAR_PATTERN = re.compile('{(.*?)(!(.*?))?(\\:(.*?))?(\\|(.*?))?}')
+
+
 def create_aligned_datetime_var(var_pattern, info_dict):
     """
     uses *var_patterns* like "{time:%Y%m%d%H%M|align(15)}"
@@ -46,9 +52,20 @@ def create_aligned_datetime_var(var_pattern, info_dict):
     Useful to equalize small time differences in name of files
     belonging to the same timeslot)
     """
-    mtch = re.match(
-        '{(.*?)(!(.*?))?(\\:(.*?))?(\\|(.*?))?}',
-        var_pattern)
+    get_value = compile_aligned_datetime_var(var_pattern)
+    if get_value is None:
+        return None
+    return get_value(info_dict)
+
+
+def compile_aligned_datetime_var(var_pattern):
+    """
+    Prepare *var_pattern* (see *create_aligned_datetime_var*) once, for
+    many info dicts. Return a function computing the datetime from an info
+    dict (None if the value isn't a datetime), or None if *var_pattern*
+    isn't a field.
+    """
+    mtch = _VAR_PATTERN.match(var_pattern)
 
     if mtch is None:
         return None
@@ -57,28 +74,45 @@ def create_aligned_datetime_var(var_pattern, info_dict):
     key = mtch.groups()[0]
     # format_spec = mtch.groups()[4]
     transform = mtch.groups()[6]
-    date_val = info_dict[key]
-
-    if not isinstance(date_val, dt.datetime):
-        return None
-
-    # only for datetime types
-    res = date_val
+    align_params = None
     if transform:
         align_params = _parse_align_time_transform(transform)
+    if align_params:
+        steps = dt.timedelta(minutes=align_params[0])
+        offset = dt.timedelta(minutes=align_params[1])
+        intervals_to_add = align_params[2]
+
+    def get_value(info_dict):
+        date_val = info_dict[key]
+        # only for datetime types
+        if not isinstance(date_val, dt.datetime):
+            return None
         if align_params:
-            res = align_time(
-                date_val,
-                dt.timedelta(minutes=align_params[0]),
-                dt.timedelta(minutes=align_params[1]),
-                align_params[2])
+            return align_time(date_val, steps, offset, intervals_to_add)
+        return date_val
+
+    return get_value
+
+
+def compile_custom_var(var_pattern):
+    """
+    Prepare the custom variable *var_pattern*, a trollsift pattern or an
+    aligned datetime pattern (see *create_aligned_datetime_var*), once.
+    Return a function computing the value of the variable from an info
+    dict.
+    """
+    get_datetime = None
+    if '%' in var_pattern:
+        get_datetime = compile_aligned_datetime_var(var_pattern)
 
-    if res is None:
-        # fallback to default compose when no special handling needed
-        # NOTE: This will fail, there's no `var_val`!!!
-        res = compose(var_val, self.info)
+    def get_value(info_dict):
+        if get_datetime is not None:
+            var_val = get_datetime(info_dict)
+            if var_val is not None:
+                return var_val
+        return compose(var_pattern, info_dict)
 
-    return res
+    return get_value
 
 
 def _parse_align_time_transform(transform_spec):
@@ -153,6 +187,48 @@ def parse_aliases(config):
     return aliases
 
 
+class _ZlibChecksum(object):
+
+    """hashlib-like wrapper of a zlib checksum function.
+    """
+
+    def __init__(self, func, value):
+        self._func = func
+        self._value = value
+
+    def update(self, data):
+        self._value = self._func(data, self._value)
+
+    def hexdigest(self):
+        return '%08x' % (self._value & 0xffffffff)
+
+
+def new_checksum(algorithm):
+    """Create a hashlib-like checksum object for *algorithm*: crc32,
+    adler32, or any algorithm of hashlib (md5, sha256, blake2b...).
+    Raise ValueError for unknown algorithms.
+    """
+    if algorithm == 'crc32':
+        return _ZlibChecksum(zlib.crc32, 0)
+    if algorithm == 'adler32':
+        return _ZlibChecksum(zlib.adler32, 1)
+    return hashlib.new(algorithm)
+
+
+def file_checksum(path, algorithm='crc32', chunk_size=1024 * 1024):
+    """Get the size and the checksum (as a hex string) of the file *path*,
+    read in chunks of *chunk_size* bytes. See *new_checksum* for the
+    *algorithm*.
+    """
+    checksum = new_checksum(algorithm)
+    size = 0
+    with open(path, 'rb') as fd_:
+        for chunk in iter(partial(fd_.read, chunk_size), b''):
+            size += len(chunk)
+            checksum.update(chunk)
+    return size, checksum.hexdigest()
+
+
 def get_local_ips():
     inet_addrs = [netifaces.ifaddresses(iface).get(netifaces.AF_INET)
                   for iface in netifaces.interfaces()]
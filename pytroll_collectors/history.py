@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""History of the recently processed files, for duplicate suppression.
+"""
+
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+LOG = logging.getLogger(__name__)
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class History(object):
+
+    """Remember the last *maxlen* keys, for at most *expiry* seconds.
+
+    *maxlen* None means no limit on the number of keys, 0 that nothing is
+    remembered. *expiry* None means that the keys never expire. The keys
+    are forgotten in the order they were added, the lookups and additions
+    are done in constant time.
+    """
+
+    def __init__(self, maxlen=None, expiry=None):
+        self.maxlen = maxlen
+        self.expiry = expiry
+        # key: time of addition, in order of addition
+        self._entries = OrderedDict()
+        self._latest = None
+
+    def __len__(self):
+        self._expire(self._now())
+        return len(self._entries)
+
+    def __contains__(self, key):
+        self._expire(self._now())
+        return key in self._entries
+
+    def _now(self):
+        return _clock()
+
+    def add(self, key):
+        """Add *key* to the history.
+
+        Return False if *key* is already in the history, True otherwise.
+        """
+        now = self._now()
+        self._expire(now)
+        if key in self._entries:
+            return False
+        if self.maxlen == 0:
+            return True
+        if self._latest is not None and now < self._latest:
+            # The keys expire from the oldest one, so the times are kept in
+            # order if the clock steps back
+            now = self._latest
+        self._entries[key] = now
+        self._latest = now
+        if self.maxlen is not None and len(self._entries) > self.maxlen:
+            self._entries.popitem(last=False)
+        return True
+
+    def _expire(self, now):
+        if self.expiry is None:
+            return
+        limit = now - self.expiry
+        entries = self._entries
+        while entries:
+            key = next(iter(entries))
+            if entries[key] > limit:
+                break
+            del entries[key]
+
+    def clear(self):
+        """Forget all the keys."""
+        self._entries.clear()
+
+    def close(self):
+        """Release the resources of the history."""
+        pass
+
+
+class PersistentHistory(History):
+
+    """History kept in the sqlite database *filename*, to survive restarts.
+
+    The keys are loaded in memory at creation, where they are looked up,
+    and written through to the database when added. The database is pruned
+    every *prune_every* additions. The times of addition are wall-clock
+    times, so the *expiry* also runs while the program is stopped. If the
+    clock steps back, the keys added meanwhile get the latest time of
+    addition, and expire no earlier than the keys added before.
+    """
+
+    def __init__(self, filename, maxlen=None, expiry=None, prune_every=1000):
+        History.__init__(self, maxlen, expiry)
+        self.filename = filename
+        self.prune_every = prune_every
+        self._additions = 0
+        self._lock = Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        # Cheaper commits, still safe from application crashes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS history "
+                             "(key TEXT PRIMARY KEY, added REAL)")
+        self._prune()
+        for key, added in self._db.execute(
+                "SELECT key, added FROM history ORDER BY added, rowid"):
+            self._entries[key] = added
+            self._latest = added
+        LOG.debug("Loaded %d entries from %s", len(self._entries), filename)
+
+    def _now(self):
+        return time.time()
+
+    def add(self, key):
+        """Add *key* to the history.
+
+        Return False if *key* is already in the history, True otherwise.
+        """
+        with self._lock:
+            if not History.add(self, key):
+                return False
+            if key not in self._entries:
+                # Nothing is remembered
+                return True
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO history "
+                                 "VALUES (?, ?)", (key, self._entries[key]))
+            self._additions += 1
+            if self._additions % self.prune_every == 0:
+                self._prune()
+            return True
+
+    def _prune(self):
+        with self._db:
+            if self.expiry is not None:
+                self._db.execute("DELETE FROM history WHERE added <= ?",
+                                 (self._now() - self.expiry, ))
+            if self.maxlen is not None:
+                self._db.execute("DELETE FROM history WHERE key NOT IN "
+                                 "(SELECT key FROM history "
+                                 "ORDER BY added DESC, rowid DESC "
+                                 "LIMIT ?)",
+                                 (self.maxlen, ))
+
+    def clear(self):
+        """Forget all the keys."""
+        with self._lock:
+            History.clear(self)
+            with self._db:
+                self._db.execute("DELETE FROM history")
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._db.close()
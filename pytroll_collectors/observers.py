@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Incremental polling observer for large directories on network mounts.
+
+The stock watchdog PollingObserver stats every file of the watched
+directories on each poll. The ScandirPollingObserver keeps an index of the
+directory entries instead, and on each poll:
+
+- skips listing the directory if its mtime did not change,
+- only stats the entries that are not in the index yet, or that changed
+  during the last few polls (files still being written),
+
+so the cost of a poll follows the churn of the directory, not its size.
+Only the new files (FileCreatedEvent) and the files that changed since the
+last poll (FileModifiedEvent) are reported. Subdirectories are not watched.
+"""
+
+import logging
+import os
+
+from watchdog.events import (FileCreatedEvent, FileModifiedEvent,
+                             DirDeletedEvent)
+from watchdog.observers.api import (BaseObserver, EventEmitter,
+                                    DEFAULT_EMITTER_TIMEOUT,
+                                    DEFAULT_OBSERVER_TIMEOUT)
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+LOG = logging.getLogger(__name__)
+
+
+class DirectoryIndex(object):
+
+    """Index of the files of *path*, as name: (inode, size, mtime).
+
+    The files that changed are stat'ed on each scan until they stay
+    unchanged for *settle_scans* scans.
+    """
+
+    def __init__(self, path, settle_scans=3):
+        self.path = path
+        self.settle_scans = settle_scans
+        self.entries = {}
+        # Names that changed recently, with the number of scans left
+        self.unstable = {}
+        self._dir_mtime = None
+        self._confirmed = False
+
+    def scan(self):
+        """Scan the directory.
+
+        Return the paths of the new files and of the modified files, none
+        on the first scan. The directory is only listed if its mtime changed
+        since the last listing, plus once more to catch the changes
+        happening within the mtime resolution of the filesystem.
+        """
+        created = []
+        modified = []
+        dir_mtime = os.stat(self.path).st_mtime
+        if self._dir_mtime is None:
+            # Initial listing, the existing files are not reported
+            self._dir_mtime = dir_mtime
+            self._list([], [])
+            self.unstable = {}
+        elif dir_mtime != self._dir_mtime:
+            self._dir_mtime = dir_mtime
+            self._confirmed = False
+            self._list(created, modified)
+        elif not self._confirmed:
+            self._confirmed = True
+            self._list(created, modified)
+        else:
+            self._check_unstable(modified)
+        return created, modified
+
+    def _list(self, created, modified):
+        entries = self.entries
+        unstable = {}
+        seen = set()
+        for entry in scandir(self.path):
+            try:
+                if entry.is_dir():
+                    continue
+                name = entry.name
+                seen.add(name)
+                old = entries.get(name)
+                inode = entry.inode()
+                if (old is not None and old[0] == inode and
+                        name not in self.unstable):
+                    continue
+                stat = entry.stat()
+            except OSError:
+                # The file disappeared in the meantime
+                continue
+            new = (inode, stat.st_size, stat.st_mtime)
+            entries[name] = new
+            if old is None or old[0] != inode:
+                created.append(entry.path)
+                unstable[name] = self.settle_scans
+            elif old != new:
+                modified.append(entry.path)
+                unstable[name] = self.settle_scans
+            elif self.unstable[name] > 1:
+                unstable[name] = self.unstable[name] - 1
+        if len(seen) != len(entries):
+            for name in set(entries) - seen:
+                del entries[name]
+        self.unstable = unstable
+
+    def _check_unstable(self, modified):
+        entries = self.entries
+        unstable = {}
+        for name, scans_left in self.unstable.items():
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                entries.pop(name, None)
+                continue
+            old = entries[name]
+            new = (old[0], stat.st_size, stat.st_mtime)
+            if new != old:
+                entries[name] = new
+                modified.append(path)
+                unstable[name] = self.settle_scans
+            elif scans_left > 1:
+                unstable[name] = scans_left - 1
+        self.unstable = unstable
+
+
+class ScandirPollingEmitter(EventEmitter):
+
+    """Emitter polling a directory through a DirectoryIndex.
+    """
+
+    def __init__(self, event_queue, watch, timeout=DEFAULT_EMITTER_TIMEOUT,
+                 **kwargs):
+        EventEmitter.__init__(self, event_queue, watch, timeout=timeout,
+                              **kwargs)
+        self._index = DirectoryIndex(self.watch.path)
+
+    def on_thread_start(self):
+        self._index.scan()
+
+    def queue_events(self, timeout):
+        # timeout is the polling interval
+        if self.stopped_event.wait(timeout):
+            return
+        try:
+            created, modified = self._index.scan()
+        except OSError:
+            LOG.warning("Can't scan %s anymore", self.watch.path)
+            self.queue_event(DirDeletedEvent(self.watch.path))
+            self.stop()
+            return
+        for path in created:
+            self.queue_event(FileCreatedEvent(path))
+        for path in modified:
+            self.queue_event(FileModifiedEvent(path))
+
+
+class ScandirPollingObserver(BaseObserver):
+
+    """Polling observer scanning the directories incrementally.
+    """
+
+    def __init__(self, timeout=DEFAULT_OBSERVER_TIMEOUT):
+        BaseObserver.__init__(self, emitter_class=ScandirPollingEmitter,
+                              timeout=timeout)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Match paths against several glob or trollsift patterns at once.
+"""
+
+import os.path
+import re
+from collections import OrderedDict
+
+from trollsift import Parser
+
+MAGIC_CHARS = re.compile('[*?[]')
+
+
+def glob_to_regex(pattern):
+    """Translate the shell *pattern* to a regular expression.
+
+    The translation follows the semantics of fnmatch, but gives a bare
+    expression that can be combined with other ones.
+    """
+    res = []
+    idx, length = 0, len(pattern)
+    while idx < length:
+        char = pattern[idx]
+        idx += 1
+        if char == '*':
+            res.append('.*')
+        elif char == '?':
+            res.append('.')
+        elif char == '[':
+            end = idx
+            if end < length and pattern[end] == '!':
+                end += 1
+            if end < length and pattern[end] == ']':
+                end += 1
+            while end < length and pattern[end] != ']':
+                end += 1
+            if end >= length:
+                res.append('\\[')
+            else:
+                stuff = pattern[idx:end].replace('\\', '\\\\')
+                idx = end + 1
+                if stuff[0] == '!':
+                    stuff = '^' + stuff[1:]
+                elif stuff[0] == '^':
+                    stuff = '\\' + stuff
+                res.append('[%s]' % stuff)
+        else:
+            res.append(re.escape(char))
+    return ''.join(res)
+
+
+def _compile(indexed_patterns):
+    """Compile one regex out of the (index, pattern) pairs."""
+    alternatives = ['(?P<p%d>%s)' % (idx, glob_to_regex(pattern))
+                    for idx, pattern in indexed_patterns]
+    return re.compile('(?s)(?:' + '|'.join(alternatives) + r')\Z')
+
+
+class PathMatcher(object):
+
+    """Match paths against several glob *patterns* at once.
+
+    All the patterns of a directory are compiled into one regular
+    expression, so a path is matched or rejected with a single dictionary
+    lookup and regex match. The patterns having wildcards in their
+    directory part are compiled together and tried on all paths.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        by_dir = OrderedDict()
+        wild = []
+        for idx, pattern in enumerate(self.patterns):
+            dirname = os.path.dirname(pattern)
+            if MAGIC_CHARS.search(dirname):
+                wild.append((idx, pattern))
+            else:
+                by_dir.setdefault(dirname, []).append((idx, pattern))
+        self._by_dir = dict((dirname, _compile(indexed_patterns))
+                            for dirname, indexed_patterns in by_dir.items())
+        self._wild = _compile(wild) if wild else None
+        self.directories = list(by_dir.keys())
+
+    def match(self, path):
+        """Get the index of the first pattern matching *path*, or None."""
+        res = None
+        regex = self._by_dir.get(os.path.dirname(path))
+        if regex is not None:
+            mtch = regex.match(path)
+            if mtch is not None:
+                res = int(mtch.lastgroup[1:])
+        if self._wild is not None:
+            mtch = self._wild.match(path)
+            if mtch is not None:
+                idx = int(mtch.lastgroup[1:])
+                if res is None or idx < res:
+                    res = idx
+        return res
+
+    def lookup(self, path):
+        """Get the index of the first pattern matching *path* and the fields
+        parsed from it, here always None. (None, None) if no pattern
+        matches.
+        """
+        return self.match(path), None
+
+    def __contains__(self, path):
+        return self.match(path) is not None
+
+
+class PatternTable(object):
+
+    """Table of trollsift *patterns*, each with its static *metadata*.
+
+    The globs of all the patterns are compiled into one PathMatcher, so the
+    pattern of a path is found with a single match before it is parsed.
+    """
+
+    def __init__(self, patterns, metadata=None):
+        self.patterns = list(patterns)
+        self.parsers = [Parser(pattern) for pattern in self.patterns]
+        if metadata is None:
+            metadata = [{}] * len(self.patterns)
+        self.metadata = [dict(mda) for mda in metadata]
+        self.matcher = PathMatcher([parser.globify()
+                                    for parser in self.parsers])
+
+    def __len__(self):
+        return len(self.parsers)
+
+    def lookup(self, path):
+        """Get the index of the first pattern matching *path*, and the fields
+        parsed from it updated with the static metadata of the pattern.
+
+        (None, None) is returned if no pattern matches.
+        """
+        index = self.matcher.match(path)
+        if index is None:
+            return None, None
+        # The globs are looser than the patterns they come from
+        for index in range(index, len(self.parsers)):
+            try:
+                res = self.parsers[index].parse(path)
+            except ValueError:
+                continue
+            res.update(self.metadata[index])
+            return index, res
+        return None, None
+
+    def match(self, path):
+        """Get the index of the first pattern matching *path*, or None."""
+        return self.lookup(path)[0]
+
+    def parse(self, path, index=None):
+        """Parse *path* with the first matching pattern.
+
+        If the *index* of the pattern to use is known, *path* is not matched
+        again. The parsed fields are returned updated with the static
+        metadata of the pattern, or None if no pattern matches.
+        """
+        if index is None:
+            return self.lookup(path)[1]
+        res = self.parsers[index].parse(path)
+        res.update(self.metadata[index])
+        return res
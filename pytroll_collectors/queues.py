@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Queues between the reception and the processing of files and messages.
+"""
+
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from threading import Condition, Lock, Thread, Event
+
+from six.moves.queue import Empty
+
+LOG = logging.getLogger(__name__)
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class WorkQueue(object):
+
+    """Bounded FIFO queue, coalescing the items with the same key.
+
+    An item put with a *key* already waiting in the queue replaces the
+    waiting item, keeping its place in the queue. When the queue holds
+    *maxsize* items (0 for no limit), *put* blocks until some room is made,
+    or until its *timeout* expires, in which case the item is dropped.
+
+    The depth, high-water mark and the number of received, coalesced and
+    dropped items are available as attributes, and through *stats*.
+    """
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._counter = itertools.count()
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self.high_water_mark = 0
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @property
+    def depth(self):
+        """Number of items waiting in the queue."""
+        return len(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item, key=None, block=True, timeout=None):
+        """Put *item* in the queue.
+
+        Return False if the item was dropped because the queue is full.
+        """
+        with self._lock:
+            self.received += 1
+            if key is not None and key in self._items:
+                self._items[key] = item
+                self.coalesced += 1
+                return True
+            if self.maxsize > 0 and not self._wait_for_room(block, timeout):
+                self.dropped += 1
+                LOG.warning("Queue full (%d items), dropping %s "
+                            "(%d dropped so far)",
+                            len(self._items), str(key or item), self.dropped)
+                return False
+            if key is None:
+                key = (WorkQueue, next(self._counter))
+            self._items[key] = item
+            self.high_water_mark = max(self.high_water_mark,
+                                       len(self._items))
+            self._not_empty.notify()
+            return True
+
+    def _wait_for_room(self, block, timeout):
+        if timeout is not None:
+            end_time = _clock() + timeout
+        while len(self._items) >= self.maxsize:
+            if not block:
+                return False
+            if timeout is None:
+                self._not_full.wait()
+            else:
+                remaining = end_time - _clock()
+                if remaining <= 0:
+                    return False
+                self._not_full.wait(remaining)
+        return True
+
+    def get(self, block=True, timeout=None):
+        """Remove and return the oldest item.
+
+        Raise Empty if no item is available (within *timeout*).
+        """
+        with self._lock:
+            if timeout is not None:
+                end_time = _clock() + timeout
+            while not self._items:
+                if not block:
+                    raise Empty
+                if timeout is None:
+                    self._not_empty.wait()
+                else:
+                    remaining = end_time - _clock()
+                    if remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            item = self._items.popitem(last=False)[1]
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        """Remove and return the oldest item, raise Empty if there is none."""
+        return self.get(block=False)
+
+    def get_batch(self, max_items, timeout=None):
+        """Remove and return the oldest items, at most *max_items*.
+
+        Wait for at least one item, and raise Empty if none is available
+        within *timeout*.
+        """
+        with self._lock:
+            if timeout is not None:
+                end_time = _clock() + timeout
+            while not self._items:
+                if timeout is None:
+                    self._not_empty.wait()
+                else:
+                    remaining = end_time - _clock()
+                    if remaining <= 0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            items = [self._items.popitem(last=False)[1]
+                     for _ in range(min(max_items, len(self._items)))]
+            self._not_full.notify(len(items))
+            return items
+
+    def stats(self):
+        """Get the queue metrics as a dictionary."""
+        with self._lock:
+            return {'depth': len(self._items),
+                    'high_water_mark': self.high_water_mark,
+                    'received': self.received,
+                    'coalesced': self.coalesced,
+                    'dropped': self.dropped}
+
+
+class TokenBucket(object):
+
+    """Allow *rate* events per second on average, in bursts of at most
+    *burst* events.
+    """
+
+    def __init__(self, rate, burst=1, now=None):
+        self.rate = float(rate)
+        self.burst = burst
+        self.tokens = burst
+        self._time = _clock() if now is None else now
+
+    def delay(self, now=None):
+        """Take a token, and return the time to wait before using it."""
+        if now is None:
+            now = _clock()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self._time) * self.rate)
+        self._time = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.
+        return -self.tokens / self.rate
+
+
+class PublisherQueue(Thread):
+
+    """Send messages through *publisher* from a thread of its own.
+
+    The messages given to *send* are queued (*maxsize* messages at most, 0
+    for no limit), and taken from the queue in batches of at most
+    *batch_size*. They are encoded and sent at most *rate* messages per
+    second on average (0 for no limit), in bursts of at most *burst*
+    messages.
+
+    The queue depth and the latency from *send* to the actual sending are
+    available through *stats*.
+    """
+
+    def __init__(self, publisher, batch_size=100, rate=0, burst=1,
+                 maxsize=0):
+        Thread.__init__(self)
+        self.daemon = True
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.queue = WorkQueue(maxsize)
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.sent = 0
+        self.latency_max = 0.
+        self._latency_total = 0.
+        self._stop_event = Event()
+
+    def send(self, msg):
+        """Queue *msg* (a posttroll Message or an encoded message)."""
+        self.queue.put((_clock(), msg))
+
+    def run(self):
+        while True:
+            try:
+                batch = self.queue.get_batch(self.batch_size, timeout=.5)
+            except Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+            for queued, msg in batch:
+                # Once stopping, the remaining messages are sent at once
+                if (self.bucket is not None and
+                        not self._stop_event.is_set()):
+                    wait = self.bucket.delay()
+                    if wait > 0:
+                        self._stop_event.wait(wait)
+                try:
+                    encoded = str(msg)
+                    LOG.debug("Sending %s", encoded)
+                    self.publisher.send(encoded)
+                except Exception:
+                    LOG.exception("Can't send %s", str(msg))
+                    continue
+                latency = _clock() - queued
+                self.sent += 1
+                self._latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+
+    def stats(self):
+        """Get the queue and latency metrics as a dictionary."""
+        stats = self.queue.stats()
+        stats['sent'] = self.sent
+        stats['latency_max'] = self.latency_max
+        stats['latency_mean'] = (self._latency_total / self.sent
+                                 if self.sent else 0.)
+        return stats
+
+    def stop(self, timeout=10):
+        """Send the queued messages, for at most *timeout* seconds, and
+        stop.
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        LOG.debug("Publisher queue: %s", str(self.stats()))
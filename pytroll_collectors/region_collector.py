@@ -26,8 +26,12 @@
 """
 
 import os
+from collections import OrderedDict
 from datetime import timedelta, datetime
 
+import numpy as np
+from pyresample.boundary import AreaDefBoundary
+from pyresample.spherical import SphPolygon
 from trollsched.satpass import Pass
 
 import logging
@@ -42,13 +46,21 @@ class RegionCollector(object):
     """This is the region collector. It collects granules that overlap on a
     region of interest and return the collection of granules when it's done.
 
-    *timeliness* defines the max allowed age of the granule.
+    *timeliness* defines the max allowed age of the granule. If a
+    *latency_estimator* is given, the timeliness learned from the observed
+    reception delays of the platform is used instead, when available.
+
+    The collection can be restricted to granules from given *platforms*
+    and *sensors* (collections of names, None for no restriction).
 
     """
 
     def __init__(self, region,
                  timeliness=timedelta(seconds=600),
-                 granule_duration=None):
+                 granule_duration=None,
+                 latency_estimator=None,
+                 platforms=None,
+                 sensors=None):
         self.region = region  # area def
         self.granule_times = set()
         self.granules = []
@@ -58,6 +70,12 @@ class RegionCollector(object):
         self.granule_duration = granule_duration
         self.last_file_added = False
         self.sensor = None
+        self.platform = None
+        self.latency_estimator = latency_estimator
+        self.platforms = platforms and set(platforms)
+        self.sensors = sensors and set(sensors)
+        self._region_boundary = None
+        self._region_cap = False
 
     def __call__(self, granule_metadata):
         return self.collect(granule_metadata)
@@ -96,6 +114,10 @@ class RegionCollector(object):
 
         granule_metadata['end_time'] = end_time
 
+        if self.latency_estimator is not None:
+            self.latency_estimator.add(platform, start_time,
+                                       datetime.utcnow() - end_time)
+
         LOG.debug("Adding area ID to metadata: %s", str(self.region.area_id))
         granule_metadata['collection_area_id'] = self.region.area_id
 
@@ -121,7 +143,7 @@ class RegionCollector(object):
                         new_timeout = (max(self.planned_granule_times -
                                            self.granule_times) +
                                        self.granule_duration +
-                                       self.timeliness)
+                                       self.get_timeliness())
                     except ValueError:
                         LOG.error("Calculation of new timeout failed, "
                                   "keeping previous timeout.")
@@ -150,12 +172,11 @@ class RegionCollector(object):
         self.sensor = granule_metadata["sensor"]
         if isinstance(self.sensor, list):
             self.sensor = self.sensor[0]
-        granule_pass = Pass(platform, start_time, end_time,
-                            instrument=self.sensor)
 
         # If file is within region, make pass prediction to know what to wait
         # for
-        if granule_pass.area_coverage(self.region) > 0:
+        if self.granule_coverage(granule_metadata, platform,
+                                 start_time, end_time) > 0:
             self.granule_times.add(start_time)
             self.granules.append(granule_metadata)
             self.last_file_added = True
@@ -163,6 +184,7 @@ class RegionCollector(object):
             # Computation of the predicted granules within the region
 
             if not self.planned_granule_times:
+                self.platform = platform
                 self.planned_granule_times.add(start_time)
                 LOG.info("Added %s (%s) granule to area %s",
                          platform,
@@ -194,7 +216,7 @@ class RegionCollector(object):
                          str(sorted(self.planned_granule_times)))
                 self.timeout = (max(self.planned_granule_times) +
                                 self.granule_duration +
-                                self.timeliness)
+                                self.get_timeliness())
                 LOG.info("Planned timeout for %s: %s", self.region.name,
                          self.timeout.isoformat())
 
@@ -220,6 +242,79 @@ class RegionCollector(object):
                       str(self.region.area_id))
             return self.finish()
 
+    def get_timeliness(self):
+        """Get the timeliness for the platform of the current collection."""
+        if self.latency_estimator is None or self.platform is None:
+            return self.timeliness
+        return self.latency_estimator.get_timeliness(self.platform,
+                                                     self.timeliness)
+
+    @property
+    def region_boundary(self):
+        """Get the boundary polygon of the region, computed only once."""
+        if self._region_boundary is None:
+            try:
+                self._region_boundary = self.region.poly
+            except AttributeError:
+                self._region_boundary = AreaDefBoundary(
+                    self.region, frequency=100).contour_poly
+        return self._region_boundary
+
+    @property
+    def region_cap(self):
+        """Get the spherical cap enclosing the region, computed only once."""
+        if self._region_cap is False:
+            self._region_cap = bounding_cap(self.region_boundary.vertices)
+        return self._region_cap
+
+    def accepts(self, platform_names, sensors):
+        """Check if granules from *platform_names* and *sensors* are taken.
+        """
+        if self.platforms and not self.platforms.intersection(platform_names):
+            return False
+        if self.sensors and not self.sensors.intersection(sensors):
+            return False
+        return True
+
+    def may_overlap(self, granule_metadata, granule_cache=None):
+        """Check cheaply if the granule can overlap the region.
+
+        Only the footprint carried in *granule_metadata* is used, so granules
+        without footprint may always overlap. The footprint cap is kept in
+        *granule_cache*, so it is computed only once when the same
+        dictionary is passed for all the collectors checking the granule.
+        """
+        if granule_cache is None:
+            granule_cache = {}
+        try:
+            footprint_cap = granule_cache["footprint_cap"]
+        except KeyError:
+            footprint_cap = get_footprint_cap(granule_metadata)
+            granule_cache["footprint_cap"] = footprint_cap
+        if footprint_cap is None or self.region_cap is None:
+            return True
+        return caps_intersect(footprint_cap, self.region_cap)
+
+    def granule_coverage(self, granule_metadata, platform,
+                         start_time, end_time):
+        """Get the ratio of coverage of the granule on the region.
+
+        The footprint carried in *granule_metadata* is used when available,
+        otherwise the granule geometry is computed from the orbit of
+        *platform*.
+        """
+        footprint = get_footprint(granule_metadata)
+        if footprint is None:
+            granule_pass = Pass(platform, start_time, end_time,
+                                instrument=self.sensor)
+            return granule_pass.area_coverage(self.region)
+
+        LOG.debug("Using footprint from the message for the overlap test")
+        inter = footprint.intersection(self.region_boundary)
+        if inter is None:
+            return 0
+        return inter.area() / self.region_boundary.area()
+
     def is_swath_complete(self):
         '''Check if the swath is complete'''
         if self.granule_times:
@@ -229,7 +324,7 @@ class RegionCollector(object):
                 new_timeout = (max(self.planned_granule_times -
                                    self.granule_times) +
                                self.granule_duration +
-                               self.timeliness)
+                               self.get_timeliness())
             except ValueError:
                 LOG.error("Calculation of new timeout failed, "
                           "keeping previous timeout.")
@@ -249,6 +344,7 @@ class RegionCollector(object):
         self.granules = []
         self.planned_granule_times = set()
         self.timeout = None
+        self.platform = None
 
     def finish(self):
         '''Finish collection, add area ID to metadata, cleanup and return
@@ -270,6 +366,135 @@ class RegionCollector(object):
         return self.last_file_added
 
 
+class LatencyEstimator(object):
+
+    """Learn the reception delays of the granules, per platform.
+
+    The delay of a granule is the time between its end time and its
+    reception. Once *min_samples* delays are known for a platform, the
+    *quantile* of its last *window* delays is used as timeliness. The same
+    granule is counted only once, so the estimator can be shared between
+    the collectors of a trigger.
+    """
+
+    def __init__(self, quantile=0.95, window=100, min_samples=10):
+        self.quantile = quantile
+        self.window = window
+        self.min_samples = min_samples
+        self._delays = {}
+
+    def add(self, platform, start_time, delay):
+        """Add the reception *delay* of the granule starting at *start_time*.
+        """
+        delays = self._delays.setdefault(platform, OrderedDict())
+        if start_time in delays:
+            return
+        delays[start_time] = max(delay, timedelta(0))
+        while len(delays) > self.window:
+            delays.popitem(last=False)
+
+    def get_timeliness(self, platform, default=None):
+        """Get the learned timeliness of *platform*.
+
+        *default* is returned as long as not enough delays are known.
+        """
+        delays = self._delays.get(platform)
+        if not delays or len(delays) < self.min_samples:
+            return default
+        delays = sorted(delays.values())
+        idx = min(len(delays) - 1, int(self.quantile * len(delays)))
+        return delays[idx]
+
+
+def get_footprint(granule_metadata):
+    """Get the granule footprint from *granule_metadata* as a SphPolygon.
+
+    The footprint is read from the *footprint* item, given either as a
+    GeoJSON polygon (geometry or feature) or as a list of (lon, lat) corner
+    coordinates in degrees. None is returned if no usable footprint is found.
+    """
+    coords = _get_footprint_coords(granule_metadata)
+    if coords is None:
+        return None
+    poly = SphPolygon(coords)
+    # The inside of a SphPolygon is defined by clockwise vertices, whereas
+    # GeoJSON exterior rings are counter-clockwise
+    if poly.area() > 2 * np.pi:
+        poly = SphPolygon(coords[::-1])
+    return poly
+
+
+def _get_footprint_coords(granule_metadata):
+    """Get the footprint vertices from *granule_metadata*, in radians."""
+    footprint = granule_metadata.get("footprint")
+    if not footprint:
+        return None
+
+    try:
+        if isinstance(footprint, dict):
+            footprint = footprint.get("geometry", footprint)
+            if footprint["type"] != "Polygon":
+                LOG.warning("Unsupported footprint type: %s",
+                            footprint["type"])
+                return None
+            # Only the exterior ring is used
+            footprint = footprint["coordinates"][0]
+        coords = np.array(footprint, dtype=np.float64)[:, :2]
+    except (KeyError, IndexError, TypeError, ValueError):
+        LOG.warning("Malformed footprint in metadata: %s", str(footprint))
+        return None
+
+    if np.all(coords[0] == coords[-1]):
+        coords = coords[:-1]
+    if len(coords) < 3:
+        LOG.warning("Not enough vertices in footprint: %s", str(footprint))
+        return None
+    return np.deg2rad(coords)
+
+
+def get_footprint_cap(granule_metadata):
+    """Get the spherical cap enclosing the footprint of the granule.
+
+    None is returned if there is no usable footprint.
+    """
+    coords = _get_footprint_coords(granule_metadata)
+    if coords is None:
+        return None
+    return bounding_cap(coords)
+
+
+def bounding_cap(vertices):
+    """Get a spherical cap enclosing the polygon of lon/lat *vertices*.
+
+    The *vertices* are given in radians. The cap is returned as the unit
+    vector of its center and its angular radius. None is returned if the
+    polygon is too large to fit in a cap smaller than a hemisphere, as the
+    edges of the polygon could then leave the cap.
+    """
+    lons, lats = vertices[:, 0], vertices[:, 1]
+    xyz = np.column_stack((np.cos(lats) * np.cos(lons),
+                           np.cos(lats) * np.sin(lons),
+                           np.sin(lats)))
+    center = xyz.sum(axis=0)
+    norm = np.sqrt(center.dot(center))
+    if norm < 1e-9:
+        return None
+    center /= norm
+    radius = np.arccos(np.clip(xyz.dot(center), -1, 1)).max()
+    if radius >= np.pi / 2:
+        return None
+    return center, radius
+
+
+def caps_intersect(cap1, cap2):
+    """Check if the spherical caps *cap1* and *cap2* intersect."""
+    center1, radius1 = cap1
+    center2, radius2 = cap2
+    distance = np.arccos(np.clip(center1.dot(center2), -1, 1))
+    # Allow for rounding errors
+    return distance <= radius1 + radius2 + 1e-6
+
+
 def read_granule_metadata(filename):
     """Read granule metadata.
     """
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Detection of the files that are completely written.
+
+On network filesystems, IN_CLOSE_WRITE is not reliable, and IN_CREATE or
+IN_MODIFY come before the file is complete. The StabilityChecker waits
+instead for the size and mtime of the files to stay unchanged for some
+time. The pending files are kept in a TimerWheel, and the files that are
+due are stat'ed together, so one thread serves any number of files.
+"""
+
+import logging
+import math
+import os
+import time
+from threading import Thread, Event, Lock
+
+LOG = logging.getLogger(__name__)
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class TimerWheel(object):
+
+    """Schedule keys to expire after a delay.
+
+    The time is divided in ticks of *tick* seconds, and the keys are spread
+    over *slots* slots, one per tick, with the number of turns of the wheel
+    left before they expire. Scheduling and cancelling are done in constant
+    time, advancing in time proportional to the number of ticks and of
+    expired keys.
+    """
+
+    def __init__(self, tick=1.0, slots=512, now=None):
+        self.tick = tick
+        self._slots = [dict() for _ in range(slots)]
+        # key: index of its slot
+        self._where = {}
+        self._current = 0
+        # Time of the current tick
+        self._time = _clock() if now is None else now
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key, delay):
+        """Make *key* expire in *delay* seconds, at the latest one tick
+        later. A scheduled key is rescheduled.
+        """
+        self.cancel(key)
+        ticks = max(1, int(math.ceil(delay / float(self.tick))))
+        index = (self._current + ticks) % len(self._slots)
+        self._slots[index][key] = (ticks - 1) // len(self._slots)
+        self._where[key] = index
+
+    def cancel(self, key):
+        """Unschedule *key*, if scheduled."""
+        index = self._where.pop(key, None)
+        if index is not None:
+            del self._slots[index][key]
+
+    def advance(self, now=None):
+        """Advance the wheel to *now*, and return the expired keys."""
+        if now is None:
+            now = _clock()
+        expired = []
+        while self._time + self.tick <= now:
+            self._time += self.tick
+            self._current = (self._current + 1) % len(self._slots)
+            slot = self._slots[self._current]
+            if not slot:
+                continue
+            for key, turns in list(slot.items()):
+                if turns:
+                    slot[key] = turns - 1
+                else:
+                    del slot[key]
+                    del self._where[key]
+                    expired.append(key)
+        return expired
+
+
+class StabilityChecker(Thread):
+
+    """Pass the files to *callback* once their size and mtime stayed
+    unchanged for *interval* seconds.
+
+    The files are stat'ed one *tick* after being added, and then every
+    *interval* until two stats are equal. A file added again while pending
+    starts over. The files that disappear are dropped.
+    """
+
+    def __init__(self, callback, interval, tick=None):
+        Thread.__init__(self)
+        self.daemon = True
+        self.callback = callback
+        self.interval = interval
+        if tick is None:
+            tick = min(1.0, interval)
+        self._wheel = TimerWheel(tick)
+        # path: last (size, mtime), None if not stat'ed yet
+        self._stats = {}
+        self._lock = Lock()
+        self._stop_event = Event()
+
+    @property
+    def pending(self):
+        """Number of files waiting to be stable."""
+        return len(self._stats)
+
+    def add(self, path):
+        """Wait for *path* to be stable."""
+        with self._lock:
+            self._stats[path] = None
+            self._wheel.schedule(path, 0)
+
+    def run(self):
+        while not self._stop_event.wait(self._wheel.tick):
+            self._process_due()
+        # The files due by now are checked a last time
+        self._process_due()
+        if self.pending:
+            LOG.warning("Stopped with %d files not stable yet", self.pending)
+
+    def _process_due(self):
+        with self._lock:
+            due = self._wheel.advance()
+        for path in self.check(due):
+            try:
+                self.callback(path)
+            except Exception:
+                LOG.exception("Can't process %s", path)
+
+    def check(self, paths):
+        """Stat *paths*, and return the ones that are stable. The others are
+        checked again in *interval* seconds.
+        """
+        stable = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                LOG.debug("%s disappeared before being stable", path)
+                with self._lock:
+                    if path not in self._wheel:
+                        self._stats.pop(path, None)
+                continue
+            new = (stat.st_size, stat.st_mtime)
+            with self._lock:
+                if path in self._wheel:
+                    # Added again in the meantime
+                    continue
+                if self._stats.get(path) == new:
+                    del self._stats[path]
+                    stable.append(path)
+                else:
+                    self._stats[path] = new
+                    self._wheel.schedule(path, self.interval)
+        return stable
+
+    def stop(self, timeout=None):
+        """Stop checking the files, and wait for the stable ones to be
+        processed.
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
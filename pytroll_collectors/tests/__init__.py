@@ -30,7 +30,18 @@ from pytroll_collectors.tests import (test_helper_functions,
                                       test_trigger,
                                       test_global_mosaic,
                                       test_image_scaler,
-                                      test_segments)
+                                      test_segments,
+                                      test_region_collector,
+                                      test_async_trigger,
+                                      test_path_matcher,
+                                      test_observers,
+                                      test_queues,
+                                      test_history,
+                                      test_backlog,
+                                      test_stability,
+                                      test_watches,
+                                      test_gatherer,
+                                      test_trollstalker)
 
 
 def suite():
@@ -46,5 +57,16 @@ def suite():
     mysuite.addTests(test_global_mosaic.suite())
     mysuite.addTests(test_image_scaler.suite())
     mysuite.addTests(test_segments.suite())
+    mysuite.addTests(test_region_collector.suite())
+    mysuite.addTests(test_async_trigger.suite())
+    mysuite.addTests(test_path_matcher.suite())
+    mysuite.addTests(test_observers.suite())
+    mysuite.addTests(test_queues.suite())
+    mysuite.addTests(test_history.suite())
+    mysuite.addTests(test_backlog.suite())
+    mysuite.addTests(test_stability.suite())
+    mysuite.addTests(test_watches.suite())
+    mysuite.addTests(test_gatherer.suite())
+    mysuite.addTests(test_trollstalker.suite())
 
     return mysuite
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the asyncio trigger engine
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+
+try:
+    from pytroll_collectors.async_trigger import TriggerEngine
+except (ImportError, SyntaxError):
+    TriggerEngine = None
+
+
+class FakeMessage(object):
+
+    def __init__(self, subject, data):
+        self.subject = subject
+        self.data = data
+
+
+def _make_collector(timeout=None):
+    collector = MagicMock()
+    collector.timeout = timeout
+    collector.return_value = None
+    return collector
+
+
+@unittest.skipIf(TriggerEngine is None, "asyncio is not available")
+class TestTriggerEngine(unittest.TestCase):
+
+    @patch('pytroll_collectors.trigger.NSSubscriber')
+    def test_posttroll_triggers(self, nssub):
+        now = datetime.utcnow()
+        collector1 = _make_collector(now + timedelta(seconds=.2))
+        collector2 = _make_collector(now + timedelta(seconds=.1))
+        finished = []
+
+        def terminator(obj, publish_topic=None):
+            finished.append(obj)
+
+        engine = TriggerEngine()
+        engine.add_posttroll_trigger([collector1], terminator, [''], ['/a'])
+        engine.add_posttroll_trigger([collector2], terminator, [''], ['/b'])
+        mda = {"start_time": now, "end_time": now}
+        nssub.return_value.start.return_value.recv.return_value = \
+            iter([FakeMessage('/a/file', mda), FakeMessage('/b/file', mda),
+                  FakeMessage('/b/file', mda)])
+
+        engine.start()
+        time.sleep(.4)
+        engine.stop()
+        # Only one subscriber for both triggers
+        self.assertEqual(nssub.call_count, 1)
+        self.assertEqual(sorted(nssub.call_args[0][1]),
+                         ['pytroll://a', 'pytroll://b'])
+        self.assertEqual(collector1.call_count, 1)
+        self.assertEqual(collector2.call_count, 2)
+        self.assertEqual(collector1.finish.call_count, 1)
+        self.assertEqual(collector2.finish.call_count, 1)
+        self.assertEqual(len(finished), 2)
+        self.assertFalse(engine.is_alive())
+
+    @patch('pytroll_collectors.trigger.NSSubscriber')
+    def test_start_failure(self, nssub):
+        engine = TriggerEngine()
+        engine.add_posttroll_trigger([_make_collector()], None, [''], ['/a'])
+        trigger = engine.add_posttroll_trigger([_make_collector()], None,
+                                               [''], ['/b'])
+        trigger.schedule = MagicMock(side_effect=ValueError)
+        self.assertRaises(ValueError, engine.start)
+        self.assertFalse(engine.is_alive())
+        self.assertTrue(engine.loop.is_closed())
+        nssub.assert_not_called()
+        engine.stop()
+        self.assertEqual(engine.sources[0].multiplexer._users, 0)
+
+    def test_watchdog_triggers(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            collectors = [_make_collector(), _make_collector()]
+            decoder = MagicMock(return_value={"uri": "somefile"})
+            engine = TriggerEngine()
+            engine.add_watchdog_trigger(
+                [collectors[0]], None, decoder,
+                [os.path.join(tmpdir, "*.txt")], "Observer")
+            engine.add_watchdog_trigger(
+                [collectors[1]], None, decoder,
+                [os.path.join(tmpdir, "*.dat")], "Observer")
+            # Both triggers share the same observer
+            self.assertEqual(len(engine._observers), 1)
+
+            engine.start()
+            try:
+                with open(os.path.join(tmpdir, "file.txt"), "w") as fd_:
+                    fd_.write("data")
+                time.sleep(.5)
+            finally:
+                engine.stop()
+            decoder.assert_called_once_with(os.path.join(tmpdir, "file.txt"))
+            self.assertEqual(collectors[0].call_count, 1)
+            self.assertEqual(collectors[1].call_count, 0)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+def suite():
+    """The suite for test_async_trigger
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestTriggerEngine))
+
+    return mysuite
+
+if __name__ == '__main__':
+    unittest.main()
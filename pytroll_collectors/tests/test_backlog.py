@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the backlog
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pytroll_collectors.backlog import Backlog, find_files
+
+
+def _touch(path, age):
+    with open(path, 'w') as fd_:
+        fd_.write('data')
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+class TestBacklog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        subdir = os.path.join(self.tmpdir, 'sub', 'subsub')
+        os.makedirs(subdir)
+        self.old = os.path.join(self.tmpdir, 'old.h5')
+        self.recent = os.path.join(subdir, 'recent.h5')
+        self.newest = os.path.join(self.tmpdir, 'newest.h5')
+        _touch(self.old, 7200)
+        _touch(self.recent, 60)
+        _touch(self.newest, 10)
+        _touch(os.path.join(self.tmpdir, 'recent.txt'), 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def match(self, path):
+        return path.endswith('.h5')
+
+    def test_find_files(self):
+        for workers in [1, 3]:
+            self.assertEqual(find_files([self.tmpdir], self.match,
+                                        workers=workers),
+                             [self.old, self.recent, self.newest])
+        self.assertEqual(find_files([self.tmpdir], self.match,
+                                    newer_than=time.time() - 3600,
+                                    older_than=time.time() - 30),
+                         [self.recent])
+        self.assertEqual(find_files([self.tmpdir], self.match,
+                                    recursive=False),
+                         [self.old, self.newest])
+        self.assertEqual(find_files([os.path.join(self.tmpdir, 'missing')]),
+                         [])
+
+    def test_rate_limited_batches(self):
+        processed = []
+        backlog = Backlog([self.tmpdir], processed.append, match=self.match,
+                          max_age=3600, rate=20, batch_size=1)
+        tic = time.time()
+        backlog.start()
+        backlog.join(5)
+        self.assertEqual(processed, [self.recent, self.newest])
+        self.assertGreaterEqual(time.time() - tic, .09)
+
+    def test_stop(self):
+        processed = []
+        backlog = Backlog([self.tmpdir], processed.append, rate=1,
+                          batch_size=1)
+        backlog.start()
+        time.sleep(.1)
+        backlog.stop()
+        backlog.join(1)
+        self.assertFalse(backlog.is_alive())
+        self.assertEqual(len(processed), 1)
+
+
+def suite():
+    """The suite for test_backlog
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestBacklog))
+
+    return mysuite
+
+
+if __name__ == '__main__':
+    unittest.main()
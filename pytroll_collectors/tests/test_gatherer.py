@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the configuration reloading of the gatherer
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+
+from six.moves.configparser import RawConfigParser
+
+from pytroll_collectors.queues import WorkQueue
+
+GATHERER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        os.pardir, os.pardir, 'bin', 'gatherer.py')
+
+
+def load_gatherer():
+    """Load the gatherer script as a module."""
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source('gatherer', GATHERER)
+    spec = importlib.util.spec_from_file_location('gatherer', GATHERER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+gatherer = load_gatherer()
+
+CONFIG = """[viirs]
+regions = %(regions)s
+timeliness = %(timeliness)d
+duration = 60
+service =
+topics = %(topics)s
+"""
+
+
+def make_collector(area_id, minutes):
+    """Make a region collector for *area_id*."""
+    return gatherer.region_collector.RegionCollector(
+        MagicMock(area_id=area_id), timedelta(minutes=minutes),
+        timedelta(seconds=60))
+
+
+class TestMigrateCollectors(unittest.TestCase):
+
+    def test_migrate(self):
+        timeout = datetime(2018, 1, 1, 12, 0)
+        old = [make_collector('a', 10), make_collector('b', 10)]
+        old[0].timeout = timeout
+        new = [make_collector('a', 20), make_collector('c', 20)]
+        collectors = gatherer.migrate_collectors(old, new)
+        self.assertIs(collectors[0], old[0])
+        self.assertIs(collectors[1], new[1])
+        self.assertEqual(len(collectors), 2)
+        self.assertEqual(collectors[0].timeliness, timedelta(minutes=20))
+        # The ongoing collection follows the new timeliness
+        self.assertEqual(collectors[0].timeout,
+                         timeout + timedelta(minutes=10))
+
+
+class TestGetMetadata(unittest.TestCase):
+
+    def setUp(self):
+        config = RawConfigParser()
+        config.add_section('first')
+        config.set('first', 'pattern',
+                   '/data/{platform_name}_{start_time:%Y%m%d}.h5')
+        config.set('first', 'format', 'first')
+        config.add_section('second')
+        config.set('second', 'pattern',
+                   '/data/{platforms}_{start_time:%Y%m%d}.h5')
+        config.set('second', 'format', 'second')
+        config.set('second', 'regions', 'euron1')
+        config.set('second', 'duration', '60')
+        config.add_section('messages')
+        config.set('messages', 'topics', '/a')
+        self.sections = gatherer.get_section_table(config)
+
+    def test_last_section_wins(self):
+        with patch.object(gatherer, 'SECTIONS', self.sections):
+            res = gatherer.get_metadata('/data/noaa19_20180101.h5')
+            self.assertIsNone(gatherer.get_metadata('/data/noaa19.txt'))
+        self.assertEqual(res['format'], 'second')
+        self.assertEqual(res['start_time'], datetime(2018, 1, 1))
+        self.assertEqual(res['uri'], '/data/noaa19_20180101.h5')
+        # The options of the section are not metadata, but the parsed
+        # fields of the same names are
+        self.assertNotIn('regions', res)
+        self.assertEqual(res['platforms'], 'noaa19')
+
+    def test_section_matcher(self):
+        matcher = gatherer.SectionMatcher('/data/{platform_name}.txt',
+                                          '/data/*.txt')
+        first = gatherer.SectionMatcher(
+            '/data/{platform_name}_{start_time:%Y%m%d}.h5', '/data/*_*.h5')
+        with patch.object(gatherer, 'SECTIONS', self.sections):
+            self.assertEqual(matcher.lookup('/data/noaa19_20180101.h5'),
+                             (None, None))
+            index, fields = first.lookup('/data/noaa19_20180101.h5')
+            with patch.object(self.sections, 'parse') as parse:
+                res = gatherer.get_metadata('/data/noaa19_20180101.h5',
+                                            fields)
+            self.assertFalse(parse.called)
+        # The file of the first section takes the metadata of the last one
+        self.assertEqual(index, 0)
+        self.assertEqual(res['format'], 'second')
+        self.assertEqual(res['start_time'], datetime(2018, 1, 1))
+        self.assertEqual(res['uri'], '/data/noaa19_20180101.h5')
+
+
+class TestReloadConfig(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'gatherer.ini')
+        self.write_config()
+        gatherer.CONFIG = RawConfigParser()
+        gatherer.CONFIG.read(self.filename)
+        self.old_trigger = MagicMock()
+        self.old_trigger.collectors = [make_collector('a', 10)]
+        gatherer.TRIGGERS.clear()
+        gatherer.TRIGGERS['viirs'] = self.old_trigger
+        self.patches = [patch.object(gatherer, 'get_area_def',
+                                     side_effect=lambda name:
+                                     MagicMock(area_id=name)),
+                        patch.object(gatherer, 'get_trigger')]
+        for ptch in self.patches:
+            ptch.start()
+
+    def tearDown(self):
+        for ptch in self.patches:
+            ptch.stop()
+        gatherer.TRIGGERS.clear()
+        shutil.rmtree(self.tmpdir)
+
+    def write_config(self, regions='a', timeliness=10, topics='/a',
+                     extra=''):
+        with open(self.filename, 'w') as fd_:
+            fd_.write(CONFIG % {'regions': regions,
+                                'timeliness': timeliness,
+                                'topics': topics} + extra)
+
+    def test_unchanged(self):
+        gatherer.reload_config(self.filename)
+        self.assertFalse(self.old_trigger.set_collectors.called)
+        self.assertFalse(self.old_trigger.stop.called)
+
+    def test_collectors_changed(self):
+        self.write_config(regions='a b', timeliness=20)
+        gatherer.reload_config(self.filename)
+        self.assertFalse(self.old_trigger.stop.called)
+        collectors, migrate = self.old_trigger.set_collectors.call_args[0]
+        # The collectors are migrated by the trigger itself
+        self.assertIs(migrate, gatherer.migrate_collectors)
+        self.assertEqual([collector.region.area_id
+                          for collector in collectors], ['a', 'b'])
+        self.assertIs(gatherer.TRIGGERS['viirs'], self.old_trigger)
+
+    def test_trigger_changed(self):
+        self.write_config(topics='/b')
+        gatherer.reload_config(self.filename)
+        self.old_trigger.stop.assert_called_once_with()
+        collectors = gatherer.get_trigger.call_args[0][1]
+        self.assertIs(collectors[0], self.old_trigger.collectors[0])
+        new_trigger = gatherer.get_trigger.return_value
+        new_trigger.start.assert_called_once_with()
+        self.assertIs(gatherer.TRIGGERS['viirs'], new_trigger)
+
+    def test_trigger_changed_drains_queue(self):
+        old_trigger = gatherer.trigger.FileTrigger(
+            self.old_trigger.collectors, MagicMock(), MagicMock(),
+            work_queue=WorkQueue())
+        gatherer.TRIGGERS['viirs'] = old_trigger
+        old_trigger.add_file('/data/granule1')
+        old_trigger.add_file('/data/granule2')
+        self.write_config(topics='/b')
+        with patch.object(old_trigger, '_do') as do_:
+            gatherer.reload_config(self.filename)
+        self.assertEqual([call[0][0] for call in do_.call_args_list],
+                         ['/data/granule1', '/data/granule2'])
+        self.assertEqual(len(old_trigger.work_queue), 0)
+        self.assertIs(gatherer.TRIGGERS['viirs'],
+                      gatherer.get_trigger.return_value)
+
+    def test_sections_added_and_removed(self):
+        with open(self.filename, 'w') as fd_:
+            fd_.write((CONFIG % {'regions': 'a', 'timeliness': 10,
+                                 'topics': '/a'}).replace('[viirs]',
+                                                          '[avhrr]'))
+        gatherer.reload_config(self.filename)
+        self.old_trigger.stop.assert_called_once_with()
+        self.assertEqual(list(gatherer.TRIGGERS.keys()), ['avhrr'])
+        gatherer.TRIGGERS['avhrr'].start.assert_called_once_with()
+
+    def test_unreadable_config(self):
+        with open(self.filename, 'w') as fd_:
+            fd_.write('[viirs')
+        gatherer.reload_config(self.filename)
+        self.assertIs(gatherer.TRIGGERS['viirs'], self.old_trigger)
+        self.assertFalse(self.old_trigger.stop.called)
+
+
+def suite():
+    """The suite for test_gatherer
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestMigrateCollectors))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestGetMetadata))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestReloadConfig))
+
+    return mysuite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,10 +23,17 @@
 """Unit testing some general purpose helper functions
 """
 
+import hashlib
+import os
+import tempfile
 import unittest
+import zlib
 from datetime import datetime
 
-from pytroll_collectors.helper_functions import create_aligned_datetime_var
+from pytroll_collectors.helper_functions import (create_aligned_datetime_var,
+                                                 compile_aligned_datetime_var,
+                                                 compile_custom_var,
+                                                 file_checksum)
 
 
 class TestTimeUtilities(unittest.TestCase):
@@ -112,18 +119,63 @@ class TestTimeUtilities(unittest.TestCase):
         # Assert
         self.assertEqual(result, datetime(2015, 1, 9, 16, 30, 0))
 
+    def test_compile_aligned_datetime_var(self):
+        """Test the compile_aligned_datetime_var function"""
+        get_value = compile_aligned_datetime_var(
+            "{start_time:%Y%m%d%H%M%S|align(15)}")
+        for minute, aligned in [(59, 45), (14, 0)]:
+            self.assertEqual(
+                get_value({'start_time': datetime(2015, 1, 9, 16, minute)}),
+                datetime(2015, 1, 9, 16, aligned))
+        self.assertIsNone(get_value({'start_time': '201501091659'}))
+        self.assertIsNone(compile_aligned_datetime_var("no field"))
+
+    def test_compile_custom_var(self):
+        """Test the compile_custom_var function"""
+        info = {'start_time': datetime(2015, 1, 9, 16, 59),
+                'platform_name': 'NOAA-19'}
+        get_value = compile_custom_var("{start_time:%Y%m%d%H%M|align(15)}")
+        self.assertEqual(get_value(info), datetime(2015, 1, 9, 16, 45))
+        get_value = compile_custom_var("{platform_name}_{start_time:%H%M}")
+        self.assertEqual(get_value(info), "NOAA-19_1659")
+
     def tearDown(self):
         """Closing down
         """
         pass
 
 
+class TestFileChecksum(unittest.TestCase):
+
+    def setUp(self):
+        self.data = os.urandom(10000)
+        fd_, self.path = tempfile.mkstemp()
+        os.write(fd_, self.data)
+        os.close(fd_)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_checksums(self):
+        """Test the file_checksum function"""
+        self.assertEqual(file_checksum(self.path, 'crc32', chunk_size=999),
+                         (10000, '%08x' % (zlib.crc32(self.data) &
+                                           0xffffffff)))
+        self.assertEqual(file_checksum(self.path, 'adler32'),
+                         (10000, '%08x' % (zlib.adler32(self.data) &
+                                           0xffffffff)))
+        self.assertEqual(file_checksum(self.path, 'sha256', chunk_size=999),
+                         (10000, hashlib.sha256(self.data).hexdigest()))
+        self.assertRaises(ValueError, file_checksum, self.path, 'nohash')
+
+
 def suite():
     """The suite for test_trollduction
     """
     loader = unittest.TestLoader()
     mysuite = unittest.TestSuite()
     mysuite.addTest(loader.loadTestsFromTestCase(TestTimeUtilities))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestFileChecksum))
 
     return mysuite
 
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the history
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from pytroll_collectors.history import History, PersistentHistory
+
+
+class TestHistory(unittest.TestCase):
+
+    def test_maxlen(self):
+        history = History(3)
+        for key in 'abcd':
+            self.assertTrue(history.add(key))
+        self.assertFalse(history.add('b'))
+        self.assertEqual(len(history), 3)
+        # The oldest key is forgotten first
+        self.assertNotIn('a', history)
+        self.assertTrue(history.add('a'))
+        self.assertNotIn('b', history)
+
+    def test_nothing_remembered(self):
+        history = History(0)
+        self.assertTrue(history.add('a'))
+        self.assertTrue(history.add('a'))
+        self.assertEqual(len(history), 0)
+
+    @patch('pytroll_collectors.history._clock')
+    def test_expiry(self, clock):
+        clock.return_value = 0
+        history = History(expiry=10)
+        history.add('a')
+        clock.return_value = 5
+        history.add('b')
+        self.assertFalse(history.add('a'))
+        clock.return_value = 12
+        # The duplicate did not extend the window of 'a'
+        self.assertNotIn('a', history)
+        self.assertIn('b', history)
+        self.assertTrue(history.add('a'))
+        clock.return_value = 30
+        self.assertEqual(len(history), 0)
+
+    def test_clear(self):
+        history = History()
+        history.add('a')
+        history.clear()
+        self.assertTrue(history.add('a'))
+
+
+class TestPersistentHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, 'history.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_restart(self):
+        history = PersistentHistory(self.filename, maxlen=2)
+        for key in 'abc':
+            self.assertTrue(history.add(key))
+        self.assertFalse(history.add('c'))
+        history.close()
+        history = PersistentHistory(self.filename, maxlen=2)
+        self.assertEqual(len(history), 2)
+        self.assertFalse(history.add('b'))
+        self.assertFalse(history.add('c'))
+        self.assertTrue(history.add('a'))
+        history.close()
+
+    def test_expiry_across_restarts(self):
+        history = PersistentHistory(self.filename, expiry=60)
+        history.add('old')
+        history.add('new')
+        # Make 'old' older than the expiry
+        with history._db:
+            history._db.execute("UPDATE history SET added = ? "
+                                "WHERE key = 'old'", (time.time() - 120, ))
+        history.close()
+        history = PersistentHistory(self.filename, expiry=60)
+        self.assertNotIn('old', history)
+        self.assertIn('new', history)
+        rows = history._db.execute("SELECT key FROM history").fetchall()
+        self.assertEqual(rows, [('new', )])
+        history.clear()
+        history.close()
+        history = PersistentHistory(self.filename, expiry=60)
+        self.assertEqual(len(history), 0)
+        history.close()
+
+    @patch('pytroll_collectors.history.time.time')
+    def test_clock_stepping_back(self, wall_clock):
+        wall_clock.return_value = 1000
+        history = PersistentHistory(self.filename, expiry=60, maxlen=2)
+        history.add('a')
+        wall_clock.return_value = 500
+        history.add('b')
+        # 'b' doesn't expire before 'a', in memory as in the database
+        wall_clock.return_value = 561
+        self.assertIn('b', history)
+        history.close()
+        history = PersistentHistory(self.filename, expiry=60, maxlen=2)
+        self.assertIn('b', history)
+        # The keys are still forgotten in order of addition
+        history.add('c')
+        self.assertEqual(sorted(history._entries), ['b', 'c'])
+        history.close()
+        history = PersistentHistory(self.filename, expiry=60, maxlen=2)
+        self.assertEqual(sorted(history._entries), ['b', 'c'])
+        wall_clock.return_value = 1060
+        self.assertEqual(len(history), 0)
+        history.close()
+
+    def test_prune(self):
+        history = PersistentHistory(self.filename, maxlen=2, prune_every=4)
+        for key in 'abcd':
+            history.add(key)
+        count = history._db.execute("SELECT COUNT(*) FROM history")
+        self.assertEqual(count.fetchone()[0], 2)
+        history.close()
+
+
+def suite():
+    """The suite for test_history
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestHistory))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestPersistentHistory))
+
+    return mysuite
+
+
+if __name__ == '__main__':
+    unittest.main()
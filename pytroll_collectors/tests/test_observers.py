@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Unittests for the observers
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+try:
+    from pytroll_collectors.observers import (DirectoryIndex,
+                                              ScandirPollingObserver)
+except ImportError:
+    DirectoryIndex = None
+
+
+def _write(path, data='data'):
+    with open(path, 'a') as fd_:
+        fd_.write(data)
+
+
+@unittest.skipIf(DirectoryIndex is None, "watchdog is not available")
+class TestDirectoryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for idx in range(5):
+            _write(os.path.join(self.tmpdir, 'old%d' % idx))
+        os.mkdir(os.path.join(self.tmpdir, 'subdir'))
+        self.index = DirectoryIndex(self.tmpdir)
+        self.assertEqual(self.index.scan(), ([], []))
+        self.assertEqual(len(self.index.entries), 5)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_new_and_grown_files(self):
+        new = os.path.join(self.tmpdir, 'new')
+        _write(new)
+        self.assertEqual(self.index.scan(), ([new], []))
+        _write(new, 'more data')
+        self.assertEqual(self.index.scan(), ([], [new]))
+        self.assertEqual(self.index.scan(), ([], []))
+        os.remove(new)
+        self.index.scan()
+        self.assertNotIn('new', self.index.entries)
+
+    def test_unchanged_directory_is_not_listed(self):
+        new = os.path.join(self.tmpdir, 'new')
+        _write(new)
+        self.index.scan()
+        with patch('pytroll_collectors.observers.scandir') as scandir:
+            # One more listing to catch changes within the mtime resolution
+            scandir.return_value = os.scandir(self.tmpdir)
+            self.index.scan()
+            self.assertEqual(scandir.call_count, 1)
+            _write(new, 'more data')
+            self.assertEqual(self.index.scan(), ([], [new]))
+            for _ in range(3):
+                self.assertEqual(self.index.scan(), ([], []))
+            # The file settled, and is not checked anymore
+            self.assertEqual(self.index.unstable, {})
+            self.assertEqual(scandir.call_count, 1)
+
+    def test_only_new_entries_are_stat(self):
+        stats = []
+
+        class Entry(object):
+
+            def __init__(self, entry):
+                self.entry = entry
+
+            def __getattr__(self, name):
+                return getattr(self.entry, name)
+
+            def stat(self):
+                stats.append(self.entry.name)
+                return self.entry.stat()
+
+        def counting_scandir(path):
+            return [Entry(entry) for entry in os.scandir(path)]
+
+        new = os.path.join(self.tmpdir, 'new')
+        _write(new)
+        with patch('pytroll_collectors.observers.scandir', counting_scandir):
+            self.index.scan()
+        self.assertEqual(stats, ['new'])
+
+    def test_replaced_file(self):
+        old = os.path.join(self.tmpdir, 'old0')
+        tmp = os.path.join(self.tmpdir, '.tmp')
+        _write(tmp)
+        os.rename(tmp, old)
+        created, modified = self.index.scan()
+        self.assertEqual(created, [old])
+
+
+@unittest.skipIf(DirectoryIndex is None, "watchdog is not available")
+class TestScandirPollingObserver(unittest.TestCase):
+
+    def test_events(self):
+        from watchdog.events import FileSystemEventHandler
+
+        events = []
+
+        class Handler(FileSystemEventHandler):
+
+            def on_any_event(self, event):
+                events.append((event.event_type, event.src_path))
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            _write(os.path.join(tmpdir, 'old'))
+            observer = ScandirPollingObserver(timeout=.05)
+            observer.schedule(Handler(), tmpdir)
+            observer.start()
+            try:
+                time.sleep(.1)
+                _write(os.path.join(tmpdir, 'new'))
+                time.sleep(.3)
+            finally:
+                observer.stop()
+                observer.join()
+            self.assertEqual(events,
+                             [('created', os.path.join(tmpdir, 'new'))])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+def suite():
+    """The suite for test_observers
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestDirectoryIndex))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestScandirPollingObserver))
+
+    return mysuite
+
+if __name__ == '__main__':
+    unittest.main()
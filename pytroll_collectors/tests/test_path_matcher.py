@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the path matcher
+"""
+
+import unittest
+from datetime import datetime
+from fnmatch import fnmatch
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+
+from pytroll_collectors.path_matcher import (PathMatcher, PatternTable,
+                                             glob_to_regex)
+
+
+class TestPathMatcher(unittest.TestCase):
+
+    patterns = ['/data/avhrr/hrpt_*_{0,1}.l1b',
+                '/data/avhrr/hrpt_noaa??_*.l1b',
+                '/data/viirs/SV[MI]0[!9]_npp_*.h5',
+                '/data/*/any_[^x]*.txt',
+                '/data/avhrr/*']
+
+    paths = ['/data/avhrr/hrpt_noaa19_{0,1}.l1b',
+             '/data/avhrr/hrpt_noaa19_20180101.l1b',
+             '/data/avhrr/hrpt_metop01_20180101.l1b',
+             '/data/avhrr/other.txt',
+             '/data/avhrr/any_file.txt',
+             '/data/viirs/SVM01_npp_d20180101.h5',
+             '/data/viirs/SVM09_npp_d20180101.h5',
+             '/data/viirs/SVI05_npp_d20180101.h5',
+             '/data/viirs/any_^file.txt',
+             '/data/viirs/any_xfile.txt',
+             '/data/viirs/sub/any_file.txt',
+             '/data/modis/MOD021KM.hdf',
+             '/elsewhere/hrpt_noaa19_20180101.l1b']
+
+    def test_same_as_fnmatch(self):
+        matcher = PathMatcher(self.patterns)
+        for path in self.paths:
+            expected = None
+            for idx, pattern in enumerate(self.patterns):
+                if fnmatch(path, pattern):
+                    expected = idx
+                    break
+            self.assertEqual(matcher.match(path), expected, path)
+
+    def test_pattern_index(self):
+        matcher = PathMatcher(self.patterns)
+        self.assertEqual(matcher.match('/data/avhrr/hrpt_noaa19_1.l1b'), 1)
+        self.assertEqual(matcher.match('/data/avhrr/any_^file.txt'), 3)
+        self.assertEqual(matcher.match('/data/avhrr/other.txt'), 4)
+        self.assertIsNone(matcher.match('/data/modis/MOD021KM.hdf'))
+        self.assertIn('/data/viirs/SVM01_npp_d20180101.h5', matcher)
+        self.assertNotIn('/data/viirs/SVM09_npp_d20180101.h5', matcher)
+
+    def test_directories(self):
+        matcher = PathMatcher(self.patterns)
+        self.assertEqual(matcher.directories, ['/data/avhrr', '/data/viirs'])
+        self.assertIsNone(PathMatcher([]).match('/data/avhrr/other.txt'))
+
+    def test_glob_to_regex(self):
+        self.assertEqual(glob_to_regex('a*b?.c'), r'a.*b.\.c')
+        self.assertEqual(glob_to_regex('[!a]'), '[^a]')
+        self.assertEqual(glob_to_regex('[a'), r'\[a')
+
+
+class TestPatternTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = PatternTable(
+            ['/data/hrpt_{platform_name}_{start_time:%Y%m%d_%H%M}.l1b',
+             '/data/hrpt_{platform_name}_{orbit_number:5d}.l1b',
+             '/data/{platform_name}_{start_time:%Y%m%d_%H%M}.l1b'],
+            [{'sensor': 'avhrr/3', 'variant': 'DR'},
+             {'sensor': 'avhrr/3'},
+             {'sensor': 'avhrr/3', 'variant': 'EARS'}])
+
+    def test_parse(self):
+        res = self.table.parse('/data/hrpt_noaa19_20180101_1200.l1b')
+        self.assertEqual(res, {'platform_name': 'noaa19',
+                               'start_time': datetime(2018, 1, 1, 12, 0),
+                               'sensor': 'avhrr/3',
+                               'variant': 'DR'})
+        self.assertIsNone(self.table.parse('/data/noaa19.txt'))
+        # The static metadata is not shared between the results
+        res['sensor'] = 'mhs'
+        self.assertEqual(self.table.metadata[0]['sensor'], 'avhrr/3')
+
+    def test_glob_matches_but_pattern_does_not(self):
+        table = PatternTable(['/data/{platform_name}_{start_time:%Y%m%d}.l1b',
+                              '/data/{name}.l1b'])
+        # The glob of the first pattern matches, but not the pattern itself
+        path = '/data/noaa19_abcdefgh.l1b'
+        self.assertEqual(table.matcher.match(path), 0)
+        self.assertEqual(table.match(path), 1)
+        self.assertEqual(table.parse(path), {'name': 'noaa19_abcdefgh'})
+
+    def test_lookup(self):
+        path = '/data/hrpt_noaa19_12345.l1b'
+        self.assertEqual(self.table.lookup(path),
+                         (1, {'platform_name': 'noaa19',
+                              'orbit_number': 12345,
+                              'sensor': 'avhrr/3'}))
+        self.assertEqual(self.table.lookup('/data/noaa19.txt'), (None, None))
+        self.assertEqual(PathMatcher(['/data/*.l1b']).lookup(path), (0, None))
+
+    def test_single_parse(self):
+        path = '/data/hrpt_noaa19_12345.l1b'
+        for parser in self.table.parsers:
+            parser.validate = MagicMock()
+        with patch.object(self.table.parsers[1], 'parse',
+                          wraps=self.table.parsers[1].parse) as parse:
+            self.table.lookup(path)
+        parse.assert_called_once_with(path)
+        for parser in self.table.parsers:
+            parser.validate.assert_not_called()
+
+    def test_known_index(self):
+        path = '/data/hrpt_noaa19_20180101_1200.l1b'
+        self.assertEqual(self.table.parse(path, 2)['variant'], 'EARS')
+
+
+def suite():
+    """The suite for test_path_matcher
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestPathMatcher))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestPatternTable))
+
+    return mysuite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Unittests for the queues
+"""
+
+import time
+import unittest
+from threading import Thread
+
+from six.moves.queue import Empty
+
+from pytroll_collectors.queues import WorkQueue, TokenBucket, PublisherQueue
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def test_fifo(self):
+        queue = WorkQueue()
+        for item in range(5):
+            queue.put(item)
+        self.assertEqual(queue.depth, 5)
+        self.assertEqual([queue.get() for _ in range(5)], list(range(5)))
+        self.assertRaises(Empty, queue.get_nowait)
+        self.assertRaises(Empty, queue.get, timeout=.01)
+
+    def test_coalesce(self):
+        queue = WorkQueue()
+        queue.put('a1', key='a')
+        queue.put('b1', key='b')
+        queue.put('a2', key='a')
+        queue.put('none1')
+        queue.put('none2')
+        self.assertEqual(len(queue), 4)
+        self.assertEqual([queue.get() for _ in range(4)],
+                         ['a2', 'b1', 'none1', 'none2'])
+        # Once processed, the key can be queued again
+        queue.put('a3', key='a')
+        self.assertEqual(queue.get(), 'a3')
+        self.assertEqual(queue.stats(), {'depth': 0,
+                                         'high_water_mark': 4,
+                                         'received': 6,
+                                         'coalesced': 1,
+                                         'dropped': 0})
+
+    def test_drop_when_full(self):
+        queue = WorkQueue(2)
+        self.assertTrue(queue.put(1, key=1))
+        self.assertTrue(queue.put(2, key=2))
+        self.assertFalse(queue.put(3, block=False))
+        self.assertFalse(queue.put(4, timeout=.01))
+        # Coalescing needs no room
+        self.assertTrue(queue.put(5, key=1))
+        self.assertEqual(queue.dropped, 2)
+        self.assertEqual(queue.high_water_mark, 2)
+
+    def test_backpressure(self):
+        queue = WorkQueue(1)
+        queue.put(1)
+        consumed = []
+
+        def consume():
+            time.sleep(.05)
+            consumed.append(queue.get())
+
+        thread = Thread(target=consume)
+        thread.start()
+        self.assertTrue(queue.put(2, timeout=1))
+        thread.join()
+        self.assertEqual(consumed, [1])
+        self.assertEqual(queue.get(), 2)
+        self.assertEqual(queue.dropped, 0)
+
+    def test_get_batch(self):
+        queue = WorkQueue()
+        for item in range(5):
+            queue.put(item)
+        self.assertEqual(queue.get_batch(3), [0, 1, 2])
+        self.assertEqual(queue.get_batch(3), [3, 4])
+        self.assertRaises(Empty, queue.get_batch, 3, timeout=.01)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_rate(self):
+        bucket = TokenBucket(10, burst=2, now=0)
+        self.assertEqual(bucket.delay(now=0), 0)
+        self.assertEqual(bucket.delay(now=0), 0)
+        self.assertAlmostEqual(bucket.delay(now=0), .1)
+        self.assertAlmostEqual(bucket.delay(now=0), .2)
+        # The burst is limited, however long the idle time
+        self.assertEqual(bucket.delay(now=10), 0)
+        self.assertEqual(bucket.delay(now=10), 0)
+        self.assertAlmostEqual(bucket.delay(now=10), .1)
+
+
+class FakePublisher(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append((time.time(), msg))
+
+
+class TestPublisherQueue(unittest.TestCase):
+
+    def test_send(self):
+        publisher = FakePublisher()
+        queue = PublisherQueue(publisher, batch_size=2)
+        queue.start()
+        for msg in range(5):
+            queue.send(msg)
+        queue.stop()
+        self.assertEqual([msg for _, msg in publisher.sent],
+                         ['0', '1', '2', '3', '4'])
+        stats = queue.stats()
+        self.assertEqual(stats['sent'], 5)
+        self.assertEqual(stats['depth'], 0)
+        self.assertGreaterEqual(stats['latency_max'], stats['latency_mean'])
+
+    def test_rate(self):
+        publisher = FakePublisher()
+        queue = PublisherQueue(publisher, rate=50)
+        for msg in range(6):
+            queue.send(msg)
+        queue.start()
+        time.sleep(.3)
+        queue.stop()
+        times = [sent for sent, _ in publisher.sent]
+        self.assertEqual(len(times), 6)
+        self.assertGreaterEqual(times[-1] - times[0], .09)
+
+
+def suite():
+    """The suite for test_queues
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestWorkQueue))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestTokenBucket))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestPublisherQueue))
+
+    return mysuite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the region collector
+"""
+
+import unittest
+from datetime import datetime, timedelta
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from pyresample.geometry import AreaDefinition
+
+from pytroll_collectors.region_collector import (RegionCollector,
+                                                 LatencyEstimator,
+                                                 get_footprint,
+                                                 get_footprint_cap)
+
+
+def _make_region():
+    return AreaDefinition('box', 'box', 'box',
+                          {'proj': 'longlat', 'datum': 'WGS84'},
+                          100, 100, (-5, -5, 5, 5))
+
+
+def _make_metadata(start_time, footprint=None):
+    mda = {'platform_name': 'NOAA-19',
+           'sensor': 'avhrr/3',
+           'start_time': start_time,
+           'end_time': start_time + timedelta(minutes=1),
+           'uri': '/tmp/granule'}
+    if footprint is not None:
+        mda['footprint'] = footprint
+    return mda
+
+
+OVERLAPPING = {"type": "Polygon",
+               "coordinates": [[[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]]}
+DISJOINT = [[20, 20], [30, 20], [30, 30], [20, 30]]
+
+
+class TestGetFootprint(unittest.TestCase):
+
+    def test_missing(self):
+        self.assertIsNone(get_footprint({}))
+
+    def test_geojson(self):
+        poly = get_footprint({'footprint': OVERLAPPING})
+        self.assertEqual(len(poly.vertices), 4)
+        # Counter-clockwise rings are reoriented to cover the small area
+        self.assertLess(poly.area(), 0.1)
+
+    def test_geojson_feature(self):
+        poly = get_footprint({'footprint': {'type': 'Feature',
+                                            'geometry': OVERLAPPING}})
+        self.assertEqual(len(poly.vertices), 4)
+
+    def test_corners(self):
+        poly = get_footprint({'footprint': DISJOINT})
+        self.assertEqual(len(poly.vertices), 4)
+        self.assertLess(poly.area(), 0.1)
+
+    def test_malformed(self):
+        self.assertIsNone(get_footprint({'footprint': [[1, 2], [3, 4]]}))
+        point = {'type': 'Point', 'coordinates': [1, 2]}
+        self.assertIsNone(get_footprint({'footprint': point}))
+        self.assertIsNone(get_footprint({'footprint': 'garbage'}))
+
+
+class TestRegionCollector(unittest.TestCase):
+
+    @patch('pytroll_collectors.region_collector.Pass')
+    def test_footprint_not_overlapping(self, pass_):
+        collector = RegionCollector(_make_region(),
+                                    granule_duration=timedelta(minutes=1))
+        start_time = datetime(2018, 1, 1, 12, 0)
+        res = collector(_make_metadata(start_time, DISJOINT))
+        self.assertIsNone(res)
+        self.assertFalse(pass_.called)
+        self.assertFalse(collector.granules)
+
+    @patch('pytroll_collectors.region_collector.Pass')
+    def test_footprint_overlapping(self, pass_):
+        # The neighbouring granules are still predicted from the orbit
+        pass_.return_value.area_coverage.return_value = 0
+        collector = RegionCollector(_make_region(),
+                                    granule_duration=timedelta(minutes=1))
+        start_time = datetime(2018, 1, 1, 12, 0)
+        res = collector(_make_metadata(start_time, OVERLAPPING))
+        self.assertEqual(len(res), 1)
+        self.assertEqual(res[0]['collection_area_id'], 'box')
+        for call in pass_.call_args_list:
+            self.assertNotEqual(call[0][1], start_time)
+
+    @patch('pytroll_collectors.region_collector.Pass')
+    def test_no_footprint(self, pass_):
+        pass_.return_value.area_coverage.return_value = 0
+        collector = RegionCollector(_make_region(),
+                                    granule_duration=timedelta(minutes=1))
+        start_time = datetime(2018, 1, 1, 12, 0)
+        self.assertIsNone(collector(_make_metadata(start_time)))
+        pass_.assert_called_once_with('NOAA-19', start_time,
+                                      start_time + timedelta(minutes=1),
+                                      instrument='avhrr/3')
+
+
+class TestPrefiltering(unittest.TestCase):
+
+    def test_accepts(self):
+        collector = RegionCollector(_make_region(),
+                                    platforms=['NOAA-19', 'NOAA-18'],
+                                    sensors=['avhrr/3'])
+        self.assertTrue(collector.accepts(('NOAA-19', None), ('avhrr/3', )))
+        self.assertTrue(collector.accepts(('noaa19', 'NOAA-19'),
+                                          ('avhrr/3', 'mhs')))
+        self.assertFalse(collector.accepts(('Metop-B', None), ('avhrr/3', )))
+        self.assertFalse(collector.accepts(('NOAA-19', None), ('mhs', )))
+        collector = RegionCollector(_make_region())
+        self.assertTrue(collector.accepts(('Metop-B', None), ('viirs', )))
+
+    def test_may_overlap(self):
+        collector = RegionCollector(_make_region())
+        self.assertTrue(collector.may_overlap({'footprint': OVERLAPPING}))
+        self.assertFalse(collector.may_overlap({'footprint': DISJOINT}))
+        self.assertTrue(collector.may_overlap({}))
+        # Footprints larger than a hemisphere can't be prefiltered
+        huge = [[0, 0], [120, 0], [-120, 0]]
+        self.assertIsNone(get_footprint_cap({'footprint': huge}))
+        self.assertTrue(collector.may_overlap({'footprint': huge}))
+
+    def test_footprint_cap_is_computed_once(self):
+        collectors = [RegionCollector(_make_region()) for _ in range(2)]
+        footprint = list(DISJOINT)
+        with patch('pytroll_collectors.region_collector.get_footprint_cap',
+                   wraps=get_footprint_cap) as footprint_cap:
+            granule_cache = {}
+            for collector in collectors:
+                self.assertFalse(collector.may_overlap(
+                    {'footprint': footprint}, granule_cache))
+            self.assertEqual(footprint_cap.call_count, 1)
+            # A new granule reusing the same list gets its own cap
+            footprint[:] = OVERLAPPING['coordinates'][0]
+            self.assertTrue(collectors[0].may_overlap(
+                {'footprint': footprint}, {}))
+            self.assertEqual(footprint_cap.call_count, 2)
+
+
+class TestLatencyEstimator(unittest.TestCase):
+
+    def test_quantile(self):
+        estimator = LatencyEstimator(quantile=0.9, window=10, min_samples=5)
+        start_time = datetime(2018, 1, 1, 12, 0)
+        for idx in range(4):
+            estimator.add('NOAA-19', start_time + timedelta(minutes=idx),
+                          timedelta(seconds=idx))
+        # Not enough samples yet
+        default = timedelta(minutes=15)
+        self.assertEqual(estimator.get_timeliness('NOAA-19', default),
+                         default)
+        for idx in range(4, 20):
+            estimator.add('NOAA-19', start_time + timedelta(minutes=idx),
+                          timedelta(seconds=idx))
+        # Only the last 10 delays are used
+        self.assertEqual(estimator.get_timeliness('NOAA-19', default),
+                         timedelta(seconds=19))
+        self.assertEqual(estimator.get_timeliness('Metop-B', default),
+                         default)
+
+    def test_same_granule_counted_once(self):
+        estimator = LatencyEstimator(quantile=0.5, window=10, min_samples=2)
+        start_time = datetime(2018, 1, 1, 12, 0)
+        estimator.add('NOAA-19', start_time, timedelta(seconds=10))
+        estimator.add('NOAA-19', start_time, timedelta(seconds=10))
+        self.assertIsNone(estimator.get_timeliness('NOAA-19'))
+        estimator.add('NOAA-19', start_time + timedelta(minutes=1),
+                      timedelta(seconds=-10))
+        self.assertEqual(estimator.get_timeliness('NOAA-19'),
+                         timedelta(seconds=10))
+
+    @patch('pytroll_collectors.region_collector.Pass')
+    def test_collector_timeout(self, pass_):
+        # The granule is received before its end time: no delay
+        start_time = datetime.utcnow()
+        # The next granule is expected too
+        pass_.return_value.area_coverage.side_effect = [1, 1, 0, 0]
+        estimator = LatencyEstimator(min_samples=1)
+        estimator.add('NOAA-19', start_time - timedelta(minutes=10),
+                      timedelta(seconds=30))
+        collector = RegionCollector(_make_region(),
+                                    timeliness=timedelta(minutes=20),
+                                    granule_duration=timedelta(minutes=1),
+                                    latency_estimator=estimator)
+        self.assertIsNone(collector(_make_metadata(start_time)))
+        self.assertEqual(collector.timeout,
+                         start_time + timedelta(minutes=2, seconds=30))
+
+    @patch('pytroll_collectors.region_collector.Pass')
+    def test_other_platform_keeps_timeout(self, pass_):
+        start_time = datetime.utcnow()
+        pass_.return_value.area_coverage.side_effect = [1, 1, 0, 0]
+        estimator = LatencyEstimator(min_samples=1)
+        estimator.add('NOAA-19', start_time - timedelta(minutes=10),
+                      timedelta(seconds=30))
+        estimator.add('Metop-B', start_time - timedelta(minutes=10),
+                      timedelta(seconds=0))
+        collector = RegionCollector(_make_region(),
+                                    timeliness=timedelta(minutes=20),
+                                    granule_duration=timedelta(minutes=1),
+                                    latency_estimator=estimator)
+        collector(_make_metadata(start_time))
+        timeout = start_time + timedelta(minutes=2, seconds=30)
+        self.assertEqual(collector.timeout, timeout)
+        # A granule of another platform doesn't change the latency used
+        mda = _make_metadata(start_time, DISJOINT)
+        mda['platform_name'] = 'Metop-B'
+        self.assertIsNone(collector(mda))
+        self.assertEqual(collector.platform, 'NOAA-19')
+        self.assertEqual(collector.timeout, timeout)
+        collector.finish()
+        self.assertIsNone(collector.platform)
+
+
+def suite():
+    """The suite for test_region_collector
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestGetFootprint))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestRegionCollector))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestPrefiltering))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestLatencyEstimator))
+
+    return mysuite
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the stability checks
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from pytroll_collectors.stability import TimerWheel, StabilityChecker
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def test_expiry(self):
+        wheel = TimerWheel(tick=1, slots=4, now=0)
+        wheel.schedule('a', 2)
+        wheel.schedule('b', 2.5)
+        # More than one turn of the wheel
+        wheel.schedule('c', 9)
+        self.assertEqual(len(wheel), 3)
+        self.assertEqual(wheel.advance(1.5), [])
+        self.assertEqual(wheel.advance(2), ['a'])
+        self.assertEqual(wheel.advance(3), ['b'])
+        self.assertEqual(wheel.advance(8.9), [])
+        self.assertEqual(wheel.advance(9), ['c'])
+        self.assertEqual(len(wheel), 0)
+
+    def test_reschedule_and_cancel(self):
+        wheel = TimerWheel(tick=1, slots=4, now=0)
+        wheel.schedule('a', 1)
+        wheel.schedule('b', 1)
+        wheel.schedule('a', 3)
+        wheel.cancel('b')
+        self.assertNotIn('b', wheel)
+        self.assertEqual(wheel.advance(2), [])
+        self.assertEqual(wheel.advance(3), ['a'])
+
+
+class TestStabilityChecker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'file')
+        with open(self.path, 'w') as fd_:
+            fd_.write('data')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_check(self):
+        checker = StabilityChecker(None, 10)
+        checker.add(self.path)
+        self.assertEqual(checker.check([self.path]), [])
+        self.assertIn(self.path, checker._wheel)
+        # Still being written
+        checker._wheel.cancel(self.path)
+        with open(self.path, 'a') as fd_:
+            fd_.write('more data')
+        self.assertEqual(checker.check([self.path]), [])
+        checker._wheel.cancel(self.path)
+        self.assertEqual(checker.check([self.path]), [self.path])
+        self.assertEqual(checker.pending, 0)
+
+    def test_disappeared(self):
+        checker = StabilityChecker(None, 10)
+        checker.add(self.path)
+        checker._wheel.cancel(self.path)
+        os.remove(self.path)
+        self.assertEqual(checker.check([self.path]), [])
+        self.assertEqual(checker.pending, 0)
+
+    def test_published_once_stable(self):
+        stable = []
+        checker = StabilityChecker(stable.append, .2, tick=.05)
+        checker.start()
+        checker.add(self.path)
+        time.sleep(.1)
+        self.assertEqual(stable, [])
+        time.sleep(.4)
+        checker.stop()
+        self.assertEqual(stable, [self.path])
+
+    def test_stop(self):
+        stable = []
+        processing = threading.Event()
+
+        def callback(path):
+            processing.set()
+            time.sleep(.2)
+            stable.append(path)
+        checker = StabilityChecker(callback, .05, tick=.05)
+        checker.start()
+        checker.add(self.path)
+        processing.wait(5)
+        checker.stop()
+        # Joined once the stable file is processed
+        self.assertFalse(checker.is_alive())
+        self.assertEqual(stable, [self.path])
+
+    @patch('pytroll_collectors.stability.LOG')
+    def test_stop_with_pending_files(self, log):
+        checker = StabilityChecker(None, 10, tick=.05)
+        checker.start()
+        checker.add(self.path)
+        time.sleep(.2)
+        checker.stop()
+        self.assertFalse(checker.is_alive())
+        log.warning.assert_called_once_with(
+            "Stopped with %d files not stable yet", 1)
+
+
+def suite():
+    """The suite for test_stability
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestTimerWheel))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestStabilityChecker))
+
+    return mysuite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,10 +25,16 @@
 
 import unittest
 try:
-    from unittest.mock import patch
+    from unittest.mock import patch, MagicMock
 except ImportError:
-    from mock import patch
-from pytroll_collectors.trigger import PostTrollTrigger
+    from mock import patch, MagicMock
+from pytroll_collectors.trigger import (Trigger, PostTrollTrigger, FileTrigger,
+                                        InotifyTrigger, DeadlineHeap,
+                                        CollectorRouter,
+                                        SubscriptionMultiplexer,
+                                        AbstractWatchDogProcessor,
+                                        WatchDogTrigger)
+from pytroll_collectors.path_matcher import PatternTable
 from datetime import datetime, timedelta
 import time
 
@@ -65,6 +71,456 @@ class TestPostTrollTrigger(unittest.TestCase):
         ptt.stop()
         self.assertTrue(collector.timeout is None)
 
+    @patch('pytroll_collectors.trigger.NSSubscriber')
+    def test_queued_messages(self, nssub):
+        now = datetime.utcnow()
+        collector = MagicMock()
+        collector.timeout = None
+        collector.return_value = None
+        ptt = PostTrollTrigger([collector], None, None, None)
+        ptt.add_file(FakeMessage({"uid": "a", "start_time": now,
+                                  "end_time": now}))
+        ptt.add_file(FakeMessage({"uid": "b", "start_time": now,
+                                  "end_time": now}))
+        ptt.add_file(FakeMessage({"uid": "a", "start_time": now,
+                                  "end_time": now}))
+        self.assertEqual(ptt.work_queue.depth, 2)
+        self.assertEqual(ptt.work_queue.coalesced, 1)
+        # The collectors are not run on reception
+        self.assertFalse(collector.called)
+        ptt.process_queue()
+        self.assertEqual([call[0][0]['uid']
+                          for call in collector.call_args_list], ['a', 'b'])
+        self.assertEqual(ptt.work_queue.depth, 0)
+
+
+class FakeSubjectMessage(FakeMessage):
+
+    def __init__(self, subject, data):
+        FakeMessage.__init__(self, data)
+        self.subject = subject
+
+
+class TestSubscriptionMultiplexer(unittest.TestCase):
+
+    def test_dispatch(self):
+        mplex = SubscriptionMultiplexer([''])
+        res_a, res_ab = [], []
+        mplex.add(['/a'], res_a.append)
+        mplex.add(['/a/b', 'pytroll://c'], res_ab.append)
+        msgs = [FakeSubjectMessage(subject, {})
+                for subject in ['/a/x', '/a/b/y', '/c', '/d']]
+        for msg in msgs:
+            mplex.dispatch(msg)
+        self.assertEqual(res_a, msgs[:2])
+        self.assertEqual(res_ab, msgs[1:3])
+        mplex.remove(res_a.append)
+        mplex.dispatch(msgs[0])
+        self.assertEqual(len(res_a), 2)
+
+    @patch('pytroll_collectors.trigger.NSSubscriber')
+    def test_resubscribe(self, nssub):
+        nssub.return_value.start.return_value.recv.side_effect = \
+            lambda timeout: iter([time.sleep(.01)])
+        mplex = SubscriptionMultiplexer([''], nameserver='ns')
+        mplex.add(['/a'], None)
+        mplex.add(['/a/b'], 'ab')
+        mplex.start()
+        mplex.start()
+        wait_for(lambda: nssub.call_count == 1)
+        nssub.assert_called_once_with([''], ['pytroll://a', 'pytroll://a/b'],
+                                      True, nameserver='ns')
+        # Covered topic, no need to resubscribe
+        mplex.add(['/a/c'], None)
+        time.sleep(.1)
+        self.assertEqual(nssub.call_count, 1)
+        # The reader thread subscribes anew, and closes the old subscriber
+        mplex.add(['/b'], 'b')
+        wait_for(lambda: nssub.call_count == 2)
+        self.assertEqual(nssub.call_args[0][1],
+                         ['pytroll://a', 'pytroll://a/b', 'pytroll://a/c',
+                          'pytroll://b'])
+        wait_for(lambda: nssub.return_value.stop.call_count == 1)
+        # Removing a covered topic keeps the subscription
+        mplex.remove('ab')
+        time.sleep(.1)
+        self.assertEqual(nssub.call_count, 2)
+        mplex.remove('b')
+        wait_for(lambda: nssub.call_count == 3)
+        self.assertEqual(nssub.call_args[0][1],
+                         ['pytroll://a', 'pytroll://a/c'])
+        mplex.stop()
+        self.assertTrue(mplex.is_alive())
+        mplex.stop()
+        self.assertFalse(mplex.is_alive())
+        self.assertEqual(nssub.return_value.stop.call_count, 3)
+
+    @patch('pytroll_collectors.trigger.NSSubscriber')
+    def test_errors(self, nssub):
+        msgs = [FakeSubjectMessage('/a/file', {'uid': 'f1'}),
+                FakeSubjectMessage('/a/file', {'uid': 'f2'})]
+
+        def recv(timeout):
+            if recv.failed:
+                return iter([msgs.pop(0) if msgs else time.sleep(.01)])
+            recv.failed = True
+            raise IOError("Connection lost")
+        recv.failed = False
+        nssub.return_value.start.return_value.recv.side_effect = recv
+        failing = MagicMock(side_effect=ValueError)
+        received = MagicMock()
+        mplex = SubscriptionMultiplexer([''])
+        mplex.add(['/a'], failing)
+        mplex.add(['/a'], received)
+        mplex.start()
+        wait_for(lambda: received.call_count == 2)
+        mplex.stop()
+        # Subscribed anew after the failure
+        self.assertEqual(nssub.call_count, 2)
+        self.assertEqual(failing.call_count, 2)
+
+    @patch('pytroll_collectors.trigger.NSSubscriber')
+    def test_shared_by_triggers(self, nssub):
+        now = datetime.utcnow()
+        mda = {"start_time": now, "duration": 60}
+        nssub.return_value.start.return_value.recv.return_value = \
+            iter([FakeSubjectMessage('/a/file', mda)])
+        collectors = [rc_mock() for idx in range(2)]
+        mplex = SubscriptionMultiplexer([''])
+        ptts = [PostTrollTrigger([collector], None, [''], ['/a'],
+                                 multiplexer=mplex)
+                for collector in collectors]
+        for ptt in ptts:
+            ptt.start()
+        time.sleep(.2)
+        for ptt in ptts:
+            ptt.stop()
+        self.assertEqual(nssub.call_count, 1)
+        for collector in collectors:
+            self.assertEqual(collector.call_count, 1)
+            self.assertEqual(collector.call_args[0][0]["end_time"],
+                             now + timedelta(seconds=60))
+        # The shared message is left untouched
+        self.assertIn("duration", mda)
+        self.assertNotIn("end_time", mda)
+
+    @patch('pytroll_collectors.queues.LOG')
+    def test_bounded_intake(self, log):
+        mplex = SubscriptionMultiplexer([''])
+        ptt = PostTrollTrigger([rc_mock()], None, [''], ['/a'],
+                               multiplexer=mplex, queue_size=2,
+                               queue_timeout=0)
+        # The trigger thread is not started, so nothing is processed
+        for uid in ['f1', 'f2', 'f1', 'f3', 'f4']:
+            mplex.dispatch(FakeSubjectMessage('/a/file', {'uid': uid}))
+        stats = ptt.work_queue.stats()
+        self.assertEqual(stats['depth'], 2)
+        self.assertEqual(stats['coalesced'], 1)
+        self.assertEqual(stats['dropped'], 2)
+        # Each dropped uid is logged
+        self.assertEqual([call[0][2] for call in log.warning.call_args_list],
+                         ['f3', 'f4'])
+
+    def test_unbounded_intake_by_default(self):
+        mplex = SubscriptionMultiplexer([''])
+        ptt = PostTrollTrigger([rc_mock()], None, [''], ['/a'],
+                               multiplexer=mplex)
+        for idx in range(2000):
+            mplex.dispatch(FakeSubjectMessage('/a/file',
+                                              {'uid': 'f%d' % idx}))
+        stats = ptt.work_queue.stats()
+        self.assertEqual(stats['depth'], 2000)
+        self.assertEqual(stats['dropped'], 0)
+
+
+def wait_for(condition, timeout=5):
+    """Wait for *condition* to be true, for at most *timeout* seconds."""
+    end_time = time.time() + timeout
+    while not condition() and time.time() < end_time:
+        time.sleep(.01)
+
+
+def rc_mock():
+    """Make a mock region collector."""
+    collector = MagicMock()
+    collector.timeout = None
+    collector.return_value = None
+    return collector
+
+
+class FakeCollector(object):
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.region = None
+
+    def finish(self):
+        self.timeout = None
+        return [{}]
+
+    def is_last_file_added(self):
+        return False
+
+
+class TestDeadlineHeap(unittest.TestCase):
+
+    def test_pop_expired(self):
+        now = datetime(2018, 1, 1, 12, 0)
+        col1 = FakeCollector(now - timedelta(seconds=1))
+        col2 = FakeCollector(now + timedelta(seconds=1))
+        col3 = FakeCollector(now - timedelta(seconds=2))
+        heap = DeadlineHeap()
+        for col in [col1, col2, col3]:
+            heap.update(col)
+        self.assertEqual(heap.next(), (col3.timeout, col3))
+        self.assertEqual(heap.pop_expired(now), [col3, col1])
+        self.assertEqual(heap.pop_expired(now), [])
+        self.assertEqual(heap.next(), (col2.timeout, col2))
+
+    def test_outdated_entries(self):
+        now = datetime(2018, 1, 1, 12, 0)
+        col1 = FakeCollector(now - timedelta(seconds=1))
+        col2 = FakeCollector(now - timedelta(seconds=2))
+        heap = DeadlineHeap()
+        heap.update(col1)
+        heap.update(col2)
+        # Changed and rescheduled
+        col1.timeout = now + timedelta(seconds=1)
+        heap.update(col1)
+        # Changed without rescheduling
+        col2.timeout = now + timedelta(seconds=2)
+        self.assertEqual(heap.pop_expired(now), [])
+        self.assertEqual(heap.next(), (col1.timeout, col1))
+        self.assertEqual(heap.pop_expired(now + timedelta(seconds=3)),
+                         [col1, col2])
+        col1.timeout = None
+        heap.update(col1)
+        self.assertIsNone(heap.next())
+
+
+class RoutedCollector(FakeCollector):
+
+    def __init__(self, platforms, overlap=True, timeout=None):
+        FakeCollector.__init__(self, timeout)
+        self.platforms = platforms
+        self.overlap = overlap
+        self.accepts_calls = 0
+
+    def accepts(self, platform_names, sensors):
+        self.accepts_calls += 1
+        return bool(self.platforms.intersection(platform_names))
+
+    def may_overlap(self, metadata, granule_cache):
+        return self.overlap
+
+
+class TestCollectorRouter(unittest.TestCase):
+
+    def test_route(self):
+        collectors = [RoutedCollector({'NOAA-19'}),
+                      RoutedCollector({'Metop-B'}),
+                      RoutedCollector({'NOAA-19'}, overlap=False),
+                      RoutedCollector({'NOAA-19'}, overlap=False,
+                                      timeout=datetime.utcnow()),
+                      FakeCollector()]
+        router = CollectorRouter(collectors)
+        mda = {'platform_name': 'NOAA-19', 'sensor': ['avhrr/3', 'mhs']}
+        self.assertEqual(router.route(mda),
+                         [collectors[0], collectors[3], collectors[4]])
+        mda = {'platform_name': 'Metop-B', 'sensor': 'avhrr/3'}
+        self.assertEqual(router.route(mda), [collectors[1], collectors[4]])
+        # The platform and sensor matching is computed only once
+        router.route(mda)
+        self.assertEqual(collectors[0].accepts_calls, 2)
+
+
+class TestFileTrigger(unittest.TestCase):
+
+    def test_multiple_timeouts(self):
+        now = datetime.utcnow()
+        collectors = [FakeCollector(now - timedelta(seconds=1)),
+                      FakeCollector(now - timedelta(seconds=2)),
+                      FakeCollector(now + timedelta(hours=1))]
+        finished = []
+
+        def terminator(obj, publish_topic=None):
+            finished.append(obj)
+
+        trigger = FileTrigger(collectors, terminator, None)
+        trigger.start()
+        time.sleep(.1)
+        trigger.stop()
+        trigger.join()
+        self.assertEqual(len(finished), 2)
+        self.assertIsNone(collectors[0].timeout)
+        self.assertIsNone(collectors[1].timeout)
+        self.assertIsNotNone(collectors[2].timeout)
+
+    def test_set_collectors(self):
+        now = datetime.utcnow()
+        collectors = [FakeCollector(now + timedelta(seconds=.1)),
+                      FakeCollector(now + timedelta(seconds=.1))]
+        finished = []
+
+        def terminator(obj, publish_topic=None):
+            finished.append(obj)
+
+        trigger = FileTrigger(collectors[:1], terminator, None)
+        trigger.start()
+        # The removed collector is not finished anymore
+        trigger.set_collectors(collectors[1:])
+        time.sleep(.2)
+        trigger.stop()
+        trigger.join()
+        self.assertEqual(len(finished), 1)
+        self.assertIsNotNone(collectors[0].timeout)
+        self.assertIsNone(collectors[1].timeout)
+
+    def test_set_collectors_migrate(self):
+        now = datetime.utcnow()
+        collectors = [FakeCollector(now + timedelta(seconds=10)),
+                      FakeCollector(now + timedelta(seconds=20))]
+        trigger = FileTrigger(collectors[:1], None, None)
+        migrate = MagicMock(return_value=collectors[1:])
+        trigger.set_collectors(['new'], migrate)
+        migrate.assert_called_once_with(collectors[:1], ['new'])
+        self.assertEqual(trigger.collectors, collectors[1:])
+        self.assertEqual(trigger.deadlines.next(),
+                         (collectors[1].timeout, collectors[1]))
+
+
+class GrowingCollector(FakeCollector):
+
+    """Collect every granule, until *size* granules are collected."""
+
+    def __init__(self, size):
+        FakeCollector.__init__(self)
+        self.size = size
+        self.granules = []
+        self.last_file_added = False
+
+    def __call__(self, granule):
+        self.granules.append(granule)
+        self.last_file_added = True
+        if len(self.granules) == self.size:
+            return self.finish()
+
+    def finish(self):
+        granules = self.granules
+        self.granules = []
+        return granules
+
+    def finish_without_reset(self):
+        return self.granules
+
+    def is_last_file_added(self):
+        return self.last_file_added
+
+
+class TestPublishAfterEachReception(unittest.TestCase):
+
+    def setUp(self):
+        self.published = []
+
+    def terminator(self, granules, publish_topic=None):
+        self.published.append([granule['uri'] for granule in granules])
+
+    def test_every_collector_publishes(self):
+        collectors = [GrowingCollector(3), GrowingCollector(2)]
+        trigger = Trigger(collectors, self.terminator,
+                          publish_message_after_each_reception=True)
+        for uri in ['a', 'b', 'c']:
+            trigger._do({'uri': uri})
+        self.assertEqual(self.published,
+                         [['a'], ['a'],
+                          ['a', 'b'], ['a', 'b'],
+                          ['a', 'b', 'c'], ['c']])
+
+    def test_new_granule_only(self):
+        collectors = [GrowingCollector(2)]
+        sequence_numbers = []
+
+        def terminator(granules, publish_topic=None):
+            self.terminator(granules)
+            sequence_numbers.extend(granule['sequence_number']
+                                    for granule in granules)
+
+        trigger = Trigger(collectors, terminator,
+                          publish_new_granule_only=True)
+        self.assertTrue(trigger.publish_message_after_each_reception)
+        for uri in ['a', 'b', 'c']:
+            trigger._do({'uri': uri})
+        self.assertEqual(self.published, [['a'], ['b'], ['c']])
+        self.assertEqual(sequence_numbers, [1, 2, 1])
+
+
+class TestInotifyTrigger(unittest.TestCase):
+
+    def test_process_events(self):
+        trigger = InotifyTrigger([], None, None,
+                                 ['/data/*.h5', '/data/hrpt_*.l1b'])
+        trigger.add_file = MagicMock()
+        event = MagicMock(spec=['pathname'])
+        event.pathname = '/data/hrpt_noaa19.l1b'
+        trigger.process_IN_CLOSE_WRITE(event)
+        trigger.add_file.assert_called_once_with('/data/hrpt_noaa19.l1b')
+        event.pathname = '/data/hrpt_noaa19.txt'
+        trigger.process_IN_MOVED_TO(event)
+        self.assertEqual(trigger.add_file.call_count, 1)
+
+
+class TestWatchDogProcessor(unittest.TestCase):
+
+    def test_shared_pattern_table(self):
+        table = PatternTable(['/data/hrpt_{platform_name}_{orbit:05d}.l1b',
+                              '/data/hrpt_{platform_name}_{date}.l1b'])
+        processor = AbstractWatchDogProcessor(table.matcher.patterns,
+                                              matcher=table)
+        processor.process_match = MagicMock()
+        event = MagicMock(spec=['src_path'])
+        event.src_path = '/data/hrpt_noaa19_12345.l1b'
+        processor.on_created(event)
+        processor.process_match.assert_called_once_with(
+            '/data/hrpt_noaa19_12345.l1b', 0,
+            {'platform_name': 'noaa19', 'orbit': 12345})
+        # Matching the glob of the first pattern, but not the pattern
+        event.src_path = '/data/hrpt_noaa19_2018.l1b'
+        processor.on_created(event)
+        processor.process_match.assert_called_with(
+            '/data/hrpt_noaa19_2018.l1b', 1,
+            {'platform_name': 'noaa19', 'date': '2018'})
+        event.src_path = '/data/avhrr_noaa19_2018.l1b'
+        processor.on_created(event)
+        self.assertEqual(processor.process_match.call_count, 2)
+
+    def test_default_matcher(self):
+        processor = AbstractWatchDogProcessor(['/data/hrpt_*.l1b'])
+        processor.process = MagicMock()
+        event = MagicMock(spec=['src_path'])
+        event.src_path = '/data/hrpt_noaa19_12345.l1b'
+        processor.on_created(event)
+        event.src_path = '/data/avhrr_noaa19_2018.l1b'
+        processor.on_created(event)
+        processor.process.assert_called_once_with(
+            '/data/hrpt_noaa19_12345.l1b')
+
+    def test_fields_passed_to_decoder(self):
+        table = PatternTable(['/data/hrpt_{platform_name}_{orbit:05d}.l1b'])
+        decoder = MagicMock(return_value=None)
+        trigger = WatchDogTrigger([], None, decoder, table.matcher.patterns,
+                                  'Observer', matcher=table)
+        event = MagicMock(spec=['src_path'])
+        event.src_path = '/data/hrpt_noaa19_12345.l1b'
+        trigger.wdp.on_created(event)
+        decoder.assert_called_once_with(
+            '/data/hrpt_noaa19_12345.l1b',
+            {'platform_name': 'noaa19', 'orbit': 12345})
+        # Without parsing matcher, the decoder parses the path
+        trigger = WatchDogTrigger([], None, decoder, table.matcher.patterns,
+                                  'Observer')
+        trigger.wdp.on_created(event)
+        decoder.assert_called_with('/data/hrpt_noaa19_12345.l1b')
+
 
 def suite():
     """The suite for test_trigger
@@ -72,6 +528,14 @@ def suite():
     loader = unittest.TestLoader()
     mysuite = unittest.TestSuite()
     mysuite.addTest(loader.loadTestsFromTestCase(TestPostTrollTrigger))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestDeadlineHeap))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestCollectorRouter))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestFileTrigger))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestInotifyTrigger))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestWatchDogProcessor))
+    mysuite.addTest(loader.loadTestsFromTestCase(
+        TestPublishAfterEachReception))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestSubscriptionMultiplexer))
 
     return mysuite
 
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the config items sharing one trollstalker process
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+try:
+    from unittest.mock import patch, MagicMock
+except ImportError:
+    from mock import patch, MagicMock
+
+import pyinotify
+from posttroll.message import Message
+from six.moves import StringIO
+from six.moves.configparser import RawConfigParser
+
+TROLLSTALKER = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, os.pardir, 'bin', 'trollstalker.py')
+
+
+def load_trollstalker():
+    """Load the trollstalker script as a module."""
+    try:
+        import importlib.util
+    except ImportError:
+        import imp
+        return imp.load_source('trollstalker', TROLLSTALKER)
+    spec = importlib.util.spec_from_file_location('trollstalker',
+                                                  TROLLSTALKER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+trollstalker = load_trollstalker()
+
+
+def read_items(config, names):
+    """Read the config items *names*, without commandline overrides."""
+    args = argparse.Namespace(configuration_file='trollstalker.ini',
+                              monitored_dirs=[], posttroll_port=0,
+                              nameservers=None, topic=None, filepattern=None,
+                              event_names=None, instrument=None)
+    return [trollstalker.read_config_item(config, name, args)
+            for name in names]
+
+
+def wait_for(condition, timeout=5):
+    """Wait for *condition* to be true, for at most *timeout* seconds."""
+    end_time = time.time() + timeout
+    while not condition() and time.time() < end_time:
+        time.sleep(.01)
+
+
+class TestEventHandler(unittest.TestCase):
+
+    def test_stop(self):
+        handler = trollstalker.EventHandler('/a', None, publisher=MagicMock(),
+                                            stability_interval=1,
+                                            checksum='md5')
+        handler._stability.stop()
+        handler._checksum_pool.close()
+        calls = MagicMock()
+        handler._stability = calls.stability
+        handler._checksum_pool = calls.pool
+        handler.pub = calls.pub
+        handler._pub = calls.noisy_publisher
+        handler.stop()
+        # The stable files and the checksums are sent before stopping
+        self.assertEqual([call[0] for call in calls.mock_calls],
+                         ['stability.stop', 'pool.close', 'pool.join',
+                          'pub.stop', 'noisy_publisher.stop'])
+
+
+class TestEventDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.dispatcher = trollstalker.EventDispatcher()
+        self.handlers = [MagicMock(), MagicMock()]
+        self.dispatcher.add_handler(self.handlers[0], ['/data/a'],
+                                    pyinotify.IN_CLOSE_WRITE)
+        self.dispatcher.add_handler(self.handlers[1], ['/data', '/other'],
+                                    pyinotify.IN_CLOSE_WRITE |
+                                    pyinotify.IN_MOVED_TO)
+
+    def get_handlers(self, pathname, mask, isdir=False):
+        event = trollstalker.FileEvent(pathname, isdir, mask)
+        return self.dispatcher.get_handlers(event)
+
+    def test_routing(self):
+        self.assertEqual(self.get_handlers('/data/a/file',
+                                           pyinotify.IN_CLOSE_WRITE),
+                         self.handlers)
+        self.assertEqual(self.get_handlers('/data/a/file',
+                                           pyinotify.IN_MOVED_TO),
+                         self.handlers[1:])
+        self.assertEqual(self.get_handlers('/data/ab/file',
+                                           pyinotify.IN_CLOSE_WRITE),
+                         self.handlers[1:])
+        self.assertEqual(self.get_handlers('/other/file',
+                                           pyinotify.IN_CLOSE_WRITE),
+                         self.handlers[1:])
+        self.assertEqual(self.get_handlers('/data/a/file',
+                                           pyinotify.IN_DELETE), [])
+        self.assertEqual(self.get_handlers('/tmp/file',
+                                           pyinotify.IN_CLOSE_WRITE), [])
+
+    def test_directories(self):
+        mask = pyinotify.IN_CREATE | pyinotify.IN_CLOSE_WRITE
+        event = trollstalker.FileEvent('/data/a/file', False, mask)
+        self.dispatcher.process_default(event)
+        for handler in self.handlers:
+            handler.assert_called_once_with(event)
+        # The watches are shared, so only one handler adds the new ones
+        event = trollstalker.FileEvent('/data/a/dir', True, mask)
+        self.dispatcher.process_default(event)
+        self.handlers[0].assert_called_with(event)
+        self.assertEqual(self.handlers[1].call_count, 1)
+        # Whatever the events of the items
+        mask = pyinotify.IN_DELETE | pyinotify.IN_ISDIR
+        event = trollstalker.FileEvent('/data/a/dir', True, mask)
+        self.assertEqual(self.dispatcher.get_handlers(event),
+                         self.handlers[:1])
+        event = trollstalker.FileEvent('/data/b/dir', True, mask)
+        self.assertEqual(self.dispatcher.get_handlers(event),
+                         self.handlers[1:])
+        event = trollstalker.FileEvent('/tmp/dir', True, mask)
+        self.assertEqual(self.dispatcher.get_handlers(event), [])
+
+    def test_watches_dir(self):
+        self.handlers[0].watches_dir.return_value = False
+        self.handlers[1].watches_dir.return_value = True
+        self.assertTrue(self.dispatcher.watches_dir('/data/a/dir'))
+        self.handlers[1].watches_dir.return_value = False
+        self.assertFalse(self.dispatcher.watches_dir('/data/a/dir'))
+        self.handlers[0].watches_dir.reset_mock()
+        self.assertFalse(self.dispatcher.watches_dir('/other/dir'))
+        self.handlers[0].watches_dir.assert_not_called()
+
+    def test_stop(self):
+        calls = MagicMock()
+        dispatcher = trollstalker.EventDispatcher(publisher=calls.publisher,
+                                                  sender=calls.sender)
+        dispatcher.add_handler(calls.handler1, ['/data'], 0)
+        dispatcher.add_handler(calls.handler2, ['/data'], 0)
+        dispatcher.stop()
+        # The queued messages are sent before the publisher stops
+        self.assertEqual([call[0] for call in calls.mock_calls],
+                         ['handler1.stop', 'handler2.stop', 'sender.stop',
+                          'publisher.stop'])
+
+
+class TestCreateMultiNotifier(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        for path in ['a/sub', 'b', 'staging']:
+            os.makedirs(os.path.join(self.tmpdir, path))
+        self.config = RawConfigParser()
+        self.config.add_section('a')
+        self.config.set('a', 'topic', '/a')
+        self.config.set('a', 'directory', os.path.join(self.tmpdir, 'a'))
+        self.config.set('a', 'filepattern', 'a_{start_time:%Y%m%d%H%M}.txt')
+        self.config.set('a', 'event_names', 'IN_CLOSE_WRITE')
+        self.config.add_section('b')
+        self.config.set('b', 'topic', '/b')
+        self.config.set('b', 'directory', self.tmpdir)
+        self.config.set('b', 'filepattern', 'b_{start_time:%Y%m%d%H%M}.txt')
+        self.config.set('b', 'event_names', 'IN_MOVED_TO')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def create_notifier(self):
+        items = read_items(self.config, ['a', 'b'])
+        options = trollstalker.get_process_options(items, ['a', 'b'])
+        return trollstalker.create_multi_notifier(items, **options)
+
+    @patch.object(trollstalker, 'NoisyPublisher')
+    def test_shared_watches(self, noisy_publisher):
+        notifier = self.create_notifier()
+        dispatcher = notifier._default_proc_fun
+        watches = dispatcher.handlers[0].watches
+        self.assertIs(dispatcher.handlers[1].watches, watches)
+        self.assertEqual(len(watches), 5)
+        # One publisher for both items
+        noisy_publisher.assert_called_once()
+        self.assertEqual(noisy_publisher.call_args[0][2], ['/a', '/b'])
+
+        manager = notifier._watch_manager
+
+        def get_mask(path):
+            path = os.path.join(self.tmpdir, path)
+            return manager.get_watch(manager.get_wd(path)).mask
+
+        # A directory within another one also gets the events of the latter
+        both = pyinotify.IN_CLOSE_WRITE | pyinotify.IN_MOVED_TO
+        self.assertEqual(get_mask('a') & both, both)
+        self.assertEqual(get_mask('a/sub') & both, both)
+        self.assertEqual(get_mask('b') & both, pyinotify.IN_MOVED_TO)
+        dispatcher.stop()
+
+    @patch.object(trollstalker, 'NoisyPublisher')
+    def test_routing_and_stop(self, noisy_publisher):
+        send = noisy_publisher.return_value.start.return_value.send
+        notifier = self.create_notifier()
+        notifier.start()
+        try:
+            for path in ['a/a_201801010001.txt', 'a/sub/a_201801010002.txt',
+                         'b/b_201801010003.txt', 'b/a_201801010004.txt']:
+                with open(os.path.join(self.tmpdir, path), 'w') as fd_:
+                    fd_.write('data')
+            for name in ['b_201801010005.txt', 'a_201801010006.txt']:
+                staging = os.path.join(self.tmpdir, 'staging', name)
+                with open(staging, 'w') as fd_:
+                    fd_.write('data')
+                os.rename(staging, os.path.join(self.tmpdir, 'a', name))
+            wait_for(lambda: send.call_count >= 3)
+            time.sleep(.2)
+        finally:
+            notifier.stop()
+        sent = sorted((msg.subject, os.path.relpath(msg.data['uri'],
+                                                    self.tmpdir))
+                      for msg in (Message(rawstr=call[0][0])
+                                  for call in send.call_args_list))
+        self.assertEqual(sent, [('/a', 'a/a_201801010001.txt'),
+                                ('/a', 'a/sub/a_201801010002.txt'),
+                                ('/b', 'a/b_201801010005.txt')])
+        dispatcher = notifier._default_proc_fun
+        self.assertFalse(dispatcher.sender.is_alive())
+        noisy_publisher.return_value.stop.assert_called_once_with()
+
+
+    @patch.object(trollstalker, 'NoisyPublisher')
+    def test_deleted_directories(self, noisy_publisher):
+        self.config.set('a', 'event_names', 'IN_CLOSE_WRITE,IN_CREATE')
+        notifier = self.create_notifier()
+        watches = notifier._default_proc_fun.handlers[0].watches
+        self.assertEqual(watches.stats()['watches'], 5)
+        notifier.start()
+        try:
+            new_dir = os.path.join(self.tmpdir, 'a', 'new')
+            os.mkdir(new_dir)
+            wait_for(lambda: new_dir in watches)
+            nested_dir = os.path.join(new_dir, 'nested')
+            os.mkdir(nested_dir)
+            wait_for(lambda: nested_dir in watches)
+            self.assertEqual(watches.stats()['watches'], 7)
+            # No item has IN_DELETE, but the watch is removed anyway
+            os.rmdir(nested_dir)
+            wait_for(lambda: nested_dir not in watches)
+            self.assertEqual(watches.stats()['watches'], 6)
+        finally:
+            notifier.stop()
+
+
+class TestProcessOptions(unittest.TestCase):
+
+    def setUp(self):
+        self.config = RawConfigParser({'publish_rate': '10',
+                                       'max_watches': '100'})
+        for name in ['a', 'b']:
+            self.config.add_section(name)
+            self.config.set(name, 'topic', '/' + name)
+            self.config.set(name, 'directory', '/data/' + name)
+
+    def test_shared_defaults(self):
+        items = read_items(self.config, ['a', 'b'])
+        options = trollstalker.get_process_options(items, ['a', 'b'])
+        self.assertEqual(options['publish_rate'], 10)
+        self.assertEqual(options['max_watches'], 100)
+        self.assertIsNone(options['watch_max_age'])
+        self.assertEqual(sorted(options), sorted(trollstalker.PROCESS_OPTIONS))
+
+    def test_disagreement(self):
+        self.config.set('b', 'posttroll_port', '9000')
+        items = read_items(self.config, ['a', 'b'])
+        self.assertRaises(ValueError, trollstalker.get_process_options,
+                          items, ['a', 'b'])
+
+    def test_item_overrides(self):
+        argv = ['trollstalker.py', '-c', 'trollstalker.ini', '-C', 'a']
+        with patch('sys.argv', argv + ['-t', '/c']):
+            self.assertEqual(trollstalker.arg_parse().topic, '/c')
+        with patch('sys.argv', argv + ['b', '-p', '9000']):
+            self.assertEqual(trollstalker.arg_parse().posttroll_port, 9000)
+        with patch('sys.argv', argv + ['b', '-t', '/c']):
+            with patch('sys.stderr', StringIO()) as stderr:
+                self.assertRaises(SystemExit, trollstalker.arg_parse)
+        self.assertIn('--topic', stderr.getvalue())
+
+
+def suite():
+    """The suite for test_trollstalker
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestEventHandler))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestEventDispatcher))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestCreateMultiNotifier))
+    mysuite.addTest(loader.loadTestsFromTestCase(TestProcessOptions))
+
+    return mysuite
+
+if __name__ == '__main__':
+    unittest.main()
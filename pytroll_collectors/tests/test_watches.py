@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Unittests for the watch budget
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pytroll_collectors.watches import WatchBudget, walk_directories
+
+
+class FakeWatchManager(object):
+
+    """Stand-in for the pyinotify WatchManager."""
+
+    def __init__(self):
+        self.watches = {}
+        self._wd = 0
+
+    def add_watch(self, path, mask):
+        self._wd += 1
+        self.watches[path] = self._wd
+        return {path: self._wd}
+
+    def rm_watch(self, wd, quiet=True):
+        for path, other in list(self.watches.items()):
+            if other == wd:
+                del self.watches[path]
+
+
+def _makedir(path, age):
+    os.makedirs(path)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+class TestWatchBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        # Date tree, with one directory per day
+        self.old = os.path.join(self.tmpdir, '2018', '0101')
+        self.recent = os.path.join(self.tmpdir, '2018', '0601')
+        self.newest = os.path.join(self.tmpdir, '2018', '0602')
+        _makedir(self.old, 86400 * 150)
+        _makedir(self.recent, 7200)
+        _makedir(self.newest, 60)
+        self.year = os.path.dirname(self.old)
+        os.utime(self.year, (time.time() - 86400 * 150, ) * 2)
+        _makedir(os.path.join(self.tmpdir, 'tmp'), 60)
+        self.manager = FakeWatchManager()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_walk_directories(self):
+        found = dict((path, activity) for activity, path in
+                     walk_directories(self.tmpdir))
+        self.assertEqual(len(found), 5)
+        # The activity of the subdirectories is propagated
+        self.assertEqual(found[self.year], found[self.newest])
+        self.assertLess(found[self.old], found[self.recent])
+
+    def test_add_tree(self):
+        watches = WatchBudget(self.manager)
+        watches.add_tree(self.tmpdir, 1)
+        self.assertEqual(len(watches), 6)
+        self.assertEqual(sorted(self.manager.watches),
+                         sorted([self.tmpdir, self.year, self.old,
+                                 self.recent, self.newest,
+                                 os.path.join(self.tmpdir, 'tmp')]))
+
+    def test_filter_and_max_age(self):
+        def dir_filter(path):
+            return os.path.basename(path) != 'tmp'
+
+        watches = WatchBudget(self.manager, max_age=86400,
+                              dir_filter=dir_filter)
+        watches.add_tree(self.tmpdir, 1)
+        self.assertEqual(sorted(self.manager.watches),
+                         sorted([self.tmpdir, self.year,
+                                 self.recent, self.newest]))
+        stats = watches.stats()
+        self.assertEqual(stats['watches'], 4)
+        self.assertEqual(stats['skipped'], 1)
+        self.assertFalse(watches.add(os.path.join(self.year, 'tmp'), 1))
+
+        # New files in the newest directory only
+        now = time.time() + 86400 - 3600
+        watches.touch(self.newest, now)
+        self.assertNotIn(self.recent, watches)
+        self.assertIn(self.newest, watches)
+        self.assertIn(self.year, watches)
+        self.assertIn(self.tmpdir, watches)
+        self.assertEqual(watches.stats()['pruned'], 1)
+
+    def test_max_watches(self):
+        watches = WatchBudget(self.manager, max_watches=3)
+        watches.add_tree(self.tmpdir, 1)
+        # The newest ones and their parents
+        self.assertEqual(sorted(self.manager.watches),
+                         sorted([self.tmpdir, self.year, self.newest,
+                                 os.path.join(self.tmpdir, 'tmp')]))
+        new = os.path.join(self.year, '0603')
+        os.mkdir(new)
+        self.assertTrue(watches.add(new, 1))
+        self.assertIn(new, watches)
+        self.assertIn(self.year, watches)
+        self.assertEqual(len(watches), 4)
+        # The least recently active one is dropped
+        self.assertNotIn(self.newest, watches)
+        self.assertIn(os.path.join(self.tmpdir, 'tmp'), watches)
+
+    def test_remove(self):
+        watches = WatchBudget(self.manager)
+        watches.add_tree(self.tmpdir, 1)
+        self.assertEqual(sorted(watches.remove(self.year)),
+                         sorted([self.old, self.recent, self.newest,
+                                 self.year]))
+        self.assertEqual(len(watches), 2)
+        self.assertEqual(len(self.manager.watches), 2)
+        self.assertEqual(watches.remove(self.year), [])
+
+
+def suite():
+    """The suite for test_watches
+    """
+    loader = unittest.TestLoader()
+    mysuite = unittest.TestSuite()
+    mysuite.addTest(loader.loadTestsFromTestCase(TestWatchBudget))
+
+    return mysuite
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,15 +26,23 @@
 
 from pyinotify import (ProcessEvent, Notifier, WatchManager,
                        IN_CLOSE_WRITE, IN_MOVED_TO)
+import heapq
+import itertools
 import logging
 from datetime import datetime, timedelta
-from fnmatch import fnmatch
 import os.path
+import time
+from threading import Lock, RLock, current_thread
 from posttroll.subscriber import NSSubscriber
+from six.moves.queue import Empty
+from pytroll_collectors.path_matcher import PathMatcher
+from pytroll_collectors.queues import WorkQueue
 
 
 LOG = logging.getLogger(__name__)
 
+_MAGICK = 'pytroll:/'
+
 
 def total_seconds(tdef):
     """Calculate total time in seconds."""
@@ -67,15 +75,164 @@ def fix_start_end_time(mda):
     return mda
 
 
+class DeadlineHeap(object):
+
+    """Heap of the collector timeouts.
+
+    Each collector has at most one valid entry in the heap. Entries that
+    don't match the current timeout of their collector anymore are dropped
+    when they reach the top of the heap.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = {}
+        self._counter = itertools.count()
+        self._lock = Lock()
+
+    def update(self, collector):
+        """Update the deadline of *collector* from its timeout."""
+        with self._lock:
+            self._update(collector)
+
+    def _update(self, collector):
+        timeout = collector.timeout
+        if timeout is None:
+            self._deadlines.pop(collector, None)
+        elif self._deadlines.get(collector) != timeout:
+            self._deadlines[collector] = timeout
+            heapq.heappush(self._heap,
+                           (timeout, next(self._counter), collector))
+
+    def discard(self, collector):
+        """Forget the deadline of *collector*."""
+        with self._lock:
+            self._deadlines.pop(collector, None)
+
+    def _clean_top(self):
+        """Drop the outdated entries from the top of the heap."""
+        while self._heap:
+            timeout, _, collector = self._heap[0]
+            if (self._deadlines.get(collector) == timeout and
+                    collector.timeout == timeout):
+                return
+            heapq.heappop(self._heap)
+            if self._deadlines.get(collector) == timeout:
+                # The timeout was changed behind our back
+                del self._deadlines[collector]
+                self._update(collector)
+
+    def next(self):
+        """Get the next (deadline, collector), or None."""
+        with self._lock:
+            self._clean_top()
+            if self._heap:
+                return self._heap[0][0], self._heap[0][2]
+            return None
+
+    def pop_expired(self, now):
+        """Remove and return the collectors whose deadline is before *now*.
+        """
+        expired = []
+        with self._lock:
+            self._clean_top()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, collector = heapq.heappop(self._heap)
+                del self._deadlines[collector]
+                expired.append(collector)
+                self._clean_top()
+        return expired
+
+
+class CollectorRouter(object):
+
+    """Route the granules to the collectors that can use them.
+
+    Collectors having an *accepts(platform_names, sensors)* method can
+    restrict the platforms and sensors they collect. The accepting
+    collectors are indexed by platform names and sensors, so that this
+    costs a dictionary lookup per granule. Idle collectors having a
+    *may_overlap(metadata, granule_cache)* method can also reject the
+    granules that can't overlap their region, without computing the actual
+    coverage. The *granule_cache* dictionary is shared by the collectors
+    checking the same granule, to compute its footprint only once.
+    """
+
+    def __init__(self, collectors):
+        self.collectors = collectors
+        self._routes = {}
+
+    def route(self, metadata):
+        """Get the collectors to try for the granule of *metadata*, in order.
+        """
+        platform_names = (metadata.get("platform_name"),
+                          metadata.get("tle_platform_name"))
+        sensors = metadata.get("sensor")
+        if isinstance(sensors, (list, tuple)):
+            sensors = tuple(sensors)
+        else:
+            sensors = (sensors, )
+        key = (platform_names, sensors)
+        try:
+            candidates = self._routes[key]
+        except KeyError:
+            candidates = [collector for collector in self.collectors
+                          if self._accepts(collector, platform_names,
+                                           sensors)]
+            self._routes[key] = candidates
+        except TypeError:
+            # Unhashable sensor names
+            candidates = [collector for collector in self.collectors
+                          if self._accepts(collector, platform_names,
+                                           sensors)]
+        granule_cache = {}
+        return [collector for collector in candidates
+                if collector.timeout is not None or
+                self._may_overlap(collector, metadata, granule_cache)]
+
+    @staticmethod
+    def _accepts(collector, platform_names, sensors):
+        try:
+            accepts = collector.accepts
+        except AttributeError:
+            return True
+        return accepts(platform_names, sensors)
+
+    @staticmethod
+    def _may_overlap(collector, metadata, granule_cache):
+        try:
+            may_overlap = collector.may_overlap
+        except AttributeError:
+            return True
+        return may_overlap(metadata, granule_cache)
+
+
 class Trigger(object):
 
     """Abstract trigger class.
+
+    With *publish_message_after_each_reception*, the collection of each
+    collector receiving a granule is published right away, and not at
+    timeout. With *publish_new_granule_only* (which implies the former),
+    only the new granule is published, with its *sequence_number* in the
+    collection, instead of the whole collection so far.
+
+    The collectors are used under a lock, so they can be replaced with
+    *set_collectors* from any thread.
     """
 
-    def __init__(self, collectors, terminator, publish_topic=None):
+    def __init__(self, collectors, terminator, publish_topic=None,
+                 publish_message_after_each_reception=False,
+                 publish_new_granule_only=False):
         self.collectors = collectors
         self.terminator = terminator
         self.publish_topic = publish_topic
+        self.publish_new_granule_only = publish_new_granule_only
+        self.publish_message_after_each_reception = \
+            publish_message_after_each_reception or publish_new_granule_only
+        self.deadlines = DeadlineHeap()
+        self.router = CollectorRouter(collectors)
+        self._collectors_lock = RLock()
 
     def _do(self, metadata):
         """Execute the collectors and terminator.
@@ -83,10 +240,75 @@ class Trigger(object):
         if not metadata:
             LOG.warning("No metadata")
             return
-        for collector in self.collectors:
+        with self._collectors_lock:
+            self._collect(metadata)
+
+    def _collect(self, metadata):
+        for collector in self.router.route(metadata):
+            old_timeout = collector.timeout
             res = collector(metadata.copy())
+            if collector.timeout != old_timeout:
+                self.timeout_changed(collector)
             if res:
-                return self.terminator(res, publish_topic=self.publish_topic)
+                self.publish(collector, res)
+            elif (self.publish_message_after_each_reception and
+                  collector.is_last_file_added()):
+                # Publish the collection so far, but don't clean up the
+                # collector as new files will be added until timeout
+                self.publish(collector, collector.finish_without_reset())
+
+    def publish(self, collector, granules):
+        """Publish the collection *granules* of *collector*."""
+        if not self.publish_new_granule_only:
+            self.terminator(granules, publish_topic=self.publish_topic)
+        elif collector.is_last_file_added():
+            # The granules are in order of reception
+            granule = granules[-1].copy()
+            granule['sequence_number'] = len(granules)
+            self.terminator([granule], publish_topic=self.publish_topic)
+
+    def timeout_changed(self, collector):
+        """Reschedule *collector* when its timeout has changed."""
+        self.deadlines.update(collector)
+
+    def set_collectors(self, collectors, migrate=None):
+        """Replace the collectors of the trigger.
+
+        If given, *migrate(current_collectors, collectors)* is called to get
+        the collectors to use, while no granule is being collected. The
+        collectors that are kept also keep their deadlines, updated from
+        their timeouts.
+        """
+        with self._collectors_lock:
+            if migrate is not None:
+                collectors = migrate(self.collectors, collectors)
+            for collector in self.collectors:
+                if collector not in collectors:
+                    self.deadlines.discard(collector)
+            self.collectors = collectors
+            self.router = CollectorRouter(collectors)
+            for collector in collectors:
+                self.deadlines.update(collector)
+
+    def finish_expired(self, now):
+        """Finish the collectors that have timed out before *now*."""
+        with self._collectors_lock:
+            self._finish_expired(now)
+
+    def _finish_expired(self, now):
+        for collector in self.deadlines.pop_expired(now):
+            LOG.warning("Timeout detected, terminating collector")
+            LOG.debug("Area: %s, timeout: %s",
+                      collector.region, str(collector.timeout))
+            if self.publish_message_after_each_reception:
+                # If this options is given:
+                # Dont send message as it is assumed this was send
+                # when the last message was received.
+                # Only clean up the collector.
+                collector.finish()
+            else:
+                self.terminator(collector.finish(),
+                                publish_topic=self.publish_topic)
 
 
 from threading import Thread, Event
@@ -95,28 +317,66 @@ from threading import Thread, Event
 class FileTrigger(Trigger, Thread):
 
     """File trigger, acting upon inotify events.
+
+    If a *work_queue* is given, the files are queued on arrival and
+    processed in the trigger thread, so the reception is not held back by
+    the collectors.
     """
 
-    def __init__(self, collectors, terminator, decoder, publish_topic=None, publish_message_after_each_reception=False):
+    def __init__(self, collectors, terminator, decoder, publish_topic=None,
+                 publish_message_after_each_reception=False,
+                 work_queue=None, publish_new_granule_only=False):
         Thread.__init__(self)
         Trigger.__init__(self, collectors, terminator,
-                         publish_topic=publish_topic)
+                         publish_topic=publish_topic,
+                         publish_message_after_each_reception=publish_message_after_each_reception,
+                         publish_new_granule_only=publish_new_granule_only)
         self.decoder = decoder
+        self.work_queue = work_queue
         self._running = True
         self.new_file = Event()
-        self.publish_message_after_each_reception = publish_message_after_each_reception
 
-    def _do(self, pathname):
-        mda = self.decoder(pathname)
+    def _do(self, pathname, fields=None):
+        if fields is None:
+            mda = self.decoder(pathname)
+        else:
+            mda = self.decoder(pathname, fields)
         LOG.debug("mda: %s", str(mda))
         Trigger._do(self, mda)
 
+    def get_key(self, pathname):
+        """Get the key for coalescing *pathname* in the work queue."""
+        return pathname
+
     def add_file(self, pathname):
         """On arrival of a file.
         """
-        self._do(pathname)
+        if self.work_queue is None:
+            self._do(pathname)
+        else:
+            self.work_queue.put(pathname, key=self.get_key(pathname))
         self.new_file.set()
 
+    def set_collectors(self, collectors, migrate=None):
+        """Replace the collectors of the trigger."""
+        Trigger.set_collectors(self, collectors, migrate)
+        # Wake up to wait for the new deadlines
+        self.new_file.set()
+
+    def process_queue(self):
+        """Process the files waiting in the work queue."""
+        if self.work_queue is None:
+            return
+        while self._running:
+            try:
+                pathname = self.work_queue.get_nowait()
+            except Empty:
+                return
+            try:
+                self._do(pathname)
+            except Exception:
+                LOG.exception("Something wrong happened in the processing!")
+
     def run(self):
         """The timeouts are handled here.
         """
@@ -126,51 +386,31 @@ class FileTrigger(Trigger, Thread):
         # - then the new timeouts are computed
         # - if a timeout occurs during the wait, the wait is interrupted and
         #   the timeout is handled.
+        for collector in self.collectors:
+            self.deadlines.update(collector)
         while self._running:
-            timeouts = [(collector, collector.timeout)
-                        for collector in self.collectors
-                        if collector.timeout is not None]
-
-            if timeouts:
-                next_timeout = min(timeouts, key=(lambda x: x[1]))
-                if next_timeout[1] and (next_timeout[1] < datetime.utcnow()):
-                    LOG.warning("Timeout detected, terminating collector")
-                    LOG.debug("Area: %s, timeout: %s",
-                              next_timeout[0].region,
-                              str(next_timeout[1]))
-                    if self.publish_message_after_each_reception:
-                        # If this options is given:
-                        # Dont send message as it is assumed this was send
-                        # when the last message was received.
-                        # Only clean up the collector.
-                        next_timeout[0].finish()
-                    else:
-                        self.terminator(next_timeout[0].finish(),
-                                        publish_topic=self.publish_topic)
-                else:
-                    LOG.debug("Waiting %s seconds until timeout",
-                              str(total_seconds(next_timeout[1] -
-                                                datetime.utcnow())))
-                    LOG.debug("Is last file added: {}".format(next_timeout[0].is_last_file_added()))
-                    if self.publish_message_after_each_reception and next_timeout[0].is_last_file_added():
-                        # If this option is given:
-                        # Publish message after each new file is reveived
-                        # and added to the collection
-                        # but don't clean up the collection as new files will be added until timeout
-                        self.terminator(next_timeout[0].finish_without_reset(),
-                                        publish_topic=self.publish_topic)
-                    self.new_file.wait(total_seconds(next_timeout[1] -
-                                                     datetime.utcnow()))
-                    self.new_file.clear()
-            else:
+            self.new_file.clear()
+            self.process_queue()
+            self.finish_expired(datetime.utcnow())
+
+            next_timeout = self.deadlines.next()
+            if next_timeout is None:
                 self.new_file.wait()
-                self.new_file.clear()
+                continue
+
+            deadline, collector = next_timeout
+            wait = total_seconds(deadline - datetime.utcnow())
+            LOG.debug("Waiting %s seconds until timeout", str(wait))
+            if wait > 0:
+                self.new_file.wait(wait)
 
     def stop(self):
         """Stopping everything.
         """
         self._running = False
         self.new_file.set()
+        if self.work_queue is not None:
+            LOG.debug("Work queue: %s", str(self.work_queue.stats()))
 
 
 class InotifyTrigger(ProcessEvent, FileTrigger):
@@ -187,25 +427,22 @@ class InotifyTrigger(ProcessEvent, FileTrigger):
         for pattern in patterns:
             self.input_dirs.append(os.path.dirname(pattern))
         self.patterns = patterns
+        self.matcher = PathMatcher(patterns)
         self.new_file = Event()
 
     def process_IN_CLOSE_WRITE(self, event):
         """On closing a file.
         """
-        for pattern in self.patterns:
-            if fnmatch(event.src_path, pattern):
-                LOG.debug("New file detected (close write): %s",
-                          event.pathname)
-                self.add_file(event.pathname)
+        if self.matcher.match(event.pathname) is not None:
+            LOG.debug("New file detected (close write): %s", event.pathname)
+            self.add_file(event.pathname)
 
     def process_IN_MOVED_TO(self, event):
         """On moving a file into the directory.
         """
-        for pattern in self.patterns:
-            if fnmatch(event.src_path, pattern):
-                LOG.debug("New file detected (moved to): %s",
-                          event.pathname)
-                self.add_file(event.pathname)
+        if self.matcher.match(event.pathname) is not None:
+            LOG.debug("New file detected (moved to): %s", event.pathname)
+            self.add_file(event.pathname)
 
     def loop(self):
         """The main function.
@@ -233,6 +470,7 @@ try:
     from watchdog.events import FileSystemEventHandler
     from watchdog.observers.polling import PollingObserver
     from watchdog.observers import Observer
+    from pytroll_collectors.observers import ScandirPollingObserver
 
     class WatchDogTriggerOld(FileSystemEventHandler, FileTrigger):
 
@@ -240,6 +478,7 @@ try:
         """
 
         cases = {"PollingObserver": PollingObserver,
+                 "ScandirPollingObserver": ScandirPollingObserver,
                  "Observer": Observer}
 
         def __init__(self, collectors, terminator, decoder, patterns,
@@ -251,6 +490,7 @@ try:
             for pattern in patterns:
                 self.input_dirs.append(os.path.dirname(pattern))
             self.patterns = patterns
+            self.matcher = PathMatcher(patterns)
 
             self.new_file = Event()
             self.observer = self.cases.get(observer_class_name, Observer)()
@@ -259,13 +499,11 @@ try:
             """On creating a file.
             """
             try:
-                for pattern in self.patterns:
-                    if fnmatch(event.src_path, pattern):
-                        LOG.debug("New file detected (created): %s",
-                                  event.src_path)
-                        self.add_file(event.src_path)
-                        LOG.debug("Done adding")
-                        return
+                if self.matcher.match(event.src_path) is not None:
+                    LOG.debug("New file detected (created): %s",
+                              event.src_path)
+                    self.add_file(event.src_path)
+                    LOG.debug("Done adding")
             except Exception as e:
                 LOG.exception(
                     "Something wrong happened in the event processing: %s",
@@ -291,18 +529,30 @@ try:
     class AbstractWatchDogProcessor(FileSystemEventHandler):
 
         """File trigger, acting upon file system events.
+
+        The paths are filtered with *matcher*, a registry of patterns with
+        a *lookup* method giving the index of the matching pattern (None if
+        none) and the fields parsed from the path, by default a PathMatcher
+        of the glob *patterns*, which parses nothing. A PatternTable can be
+        given to match and parse the paths only once, the fields being
+        passed to *process_match*.
         """
 
         cases = {"PollingObserver": PollingObserver,
+                 "ScandirPollingObserver": ScandirPollingObserver,
                  "Observer": Observer}
 
-        def __init__(self, patterns, observer_class_name="Observer"):
+        def __init__(self, patterns, observer_class_name="Observer",
+                     matcher=None):
             FileSystemEventHandler.__init__(self)
             self.input_dirs = []
             for pattern in patterns:
                 self.input_dirs.append(os.path.dirname(pattern))
                 LOG.debug("watching " + str(os.path.dirname(pattern)))
             self.patterns = patterns
+            if matcher is None:
+                matcher = PathMatcher(patterns)
+            self.matcher = matcher
 
             self.new_file = Event()
             self.observer = self.cases.get(observer_class_name, Observer)()
@@ -319,16 +569,24 @@ try:
 
         def _process(self, pathname):
             try:
-                for pattern in self.patterns:
-                    if fnmatch(pathname, pattern):
-                        LOG.debug("New file detected : " + pathname)
-                        self.process(pathname)
-                        LOG.debug("Done processing file")
-                        return
+                pattern_index, fields = self.matcher.lookup(pathname)
+                if pattern_index is None:
+                    return
+                LOG.debug("New file detected : " + pathname)
+                self.process_match(pathname, pattern_index, fields)
+                LOG.debug("Done processing file")
             except:
                 LOG.exception(
                     "Something wrong happened in the event processing!")
 
+        def process_match(self, pathname, pattern_index, fields=None):
+            """Process *pathname*, matching the pattern at *pattern_index*,
+            with the *fields* parsed by the matcher (None if not parsed).
+
+            Override this to use the matching pattern without re-matching.
+            """
+            self.process(pathname)
+
         def process(self, pathname):
             raise NotImplementedError
 
@@ -349,14 +607,33 @@ try:
     class WatchDogTrigger(FileTrigger):
 
         """File trigger, acting upon filesystem events.
+
+        If the *matcher* of the paths parses them, the parsed fields are
+        passed on to the *decoder* after the path, so the paths are not
+        matched again.
         """
 
         def __init__(self, collectors, terminator, decoder,
-                     patterns, observer_class_name, publish_topic=None):
-            self.wdp = AbstractWatchDogProcessor(patterns, observer_class_name)
+                     patterns, observer_class_name, publish_topic=None,
+                     publish_message_after_each_reception=False,
+                     publish_new_granule_only=False, matcher=None):
+            self.wdp = AbstractWatchDogProcessor(patterns, observer_class_name,
+                                                 matcher=matcher)
             FileTrigger.__init__(self, collectors, terminator, decoder,
-                                 publish_topic=publish_topic)
+                                 publish_topic=publish_topic,
+                                 publish_message_after_each_reception=publish_message_after_each_reception,
+                                 publish_new_granule_only=publish_new_granule_only)
             self.wdp.process = self.add_file
+            self.wdp.process_match = self.add_match
+
+        def add_match(self, pathname, pattern_index, fields=None):
+            """On arrival of a file, with the *fields* parsed by the matcher.
+            """
+            if fields is None:
+                self.add_file(pathname)
+                return
+            self._do(pathname, fields)
+            self.new_file.set()
 
         def start(self):
 
@@ -377,21 +654,187 @@ except ImportError:
     WatchDogTrigger = None
 
 
+def _to_prefix(topic):
+    """Get the prefix of the encoded messages matching *topic*."""
+    if topic.startswith(_MAGICK):
+        return topic
+    if topic.startswith("/"):
+        return _MAGICK + topic
+    return _MAGICK + "/" + topic
+
+
+class SubscriptionMultiplexer(object):
+
+    """Share one posttroll subscriber between several message consumers.
+
+    The subscriber is opened for the union of the topics of the consumers,
+    so each message is received and decoded only once, and then passed to
+    the callback of every consumer with a matching topic. *start* and *stop*
+    are reference counted, so the subscriber runs as long as one of its
+    users is running.
+
+    The subscribers are only used by the reader thread: when the topics
+    change, it opens the new subscriber and closes the old one itself.
+    """
+
+    def __init__(self, services, nameserver="localhost"):
+        self.services = services
+        self.nameserver = nameserver
+        self._consumers = ()
+        self._prefixes = set()
+        self._users = 0
+        self._lock = Lock()
+        self._topics_changed = False
+        self._thread = None
+
+    def add(self, topics, callback):
+        """Pass the messages matching *topics* to *callback*."""
+        prefixes = tuple(_to_prefix(topic) for topic in topics)
+        with self._lock:
+            self._consumers += ((prefixes, callback), )
+            if not _covered(prefixes, self._prefixes):
+                LOG.debug("New topics %s", str(topics))
+                self._topics_changed = True
+            self._prefixes.update(prefixes)
+
+    def remove(self, callback):
+        """Stop passing messages to *callback*."""
+        with self._lock:
+            self._consumers = tuple(consumer for consumer in self._consumers
+                                    if consumer[1] != callback)
+            prefixes = set(prefix for consumer in self._consumers
+                           for prefix in consumer[0])
+            if prefixes and not _covered(self._prefixes, prefixes):
+                LOG.debug("Topics removed")
+                self._topics_changed = True
+            self._prefixes = prefixes
+
+    def start(self):
+        """Start receiving, if not already done."""
+        with self._lock:
+            self._users += 1
+            if self._thread is None:
+                self._topics_changed = True
+                self._thread = Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def _subscribe(self, old_nssub):
+        """Subscribe to the current topics, and close *old_nssub*."""
+        with self._lock:
+            topics = sorted(self._prefixes)
+            self._topics_changed = False
+        LOG.debug("Subscribing to %s on %s", str(topics), self.nameserver)
+        nssub = NSSubscriber(self.services, topics, True,
+                             nameserver=self.nameserver)
+        sub = nssub.start()
+        if old_nssub is not None:
+            old_nssub.stop()
+        return nssub, sub
+
+    def _run(self):
+        reader = current_thread()
+        nssub = None
+        sub = None
+        try:
+            while self._thread is reader:
+                try:
+                    if self._topics_changed or sub is None:
+                        nssub, sub = self._subscribe(nssub)
+                    for msg in sub.recv(2):
+                        if msg is not None:
+                            self.dispatch(msg)
+                        if (self._thread is not reader or
+                                self._topics_changed):
+                            break
+                except Exception:
+                    LOG.exception("Reception failed, resubscribing")
+                    sub = None
+                    time.sleep(1)
+        finally:
+            if nssub is not None:
+                nssub.stop()
+
+    def dispatch(self, msg):
+        """Pass *msg* to the consumers with a matching topic."""
+        encoded_subject = _MAGICK + msg.subject
+        for prefixes, callback in self._consumers:
+            if any(encoded_subject.startswith(prefix)
+                   for prefix in prefixes):
+                try:
+                    callback(msg)
+                except Exception:
+                    LOG.exception("Can't process %s", str(msg))
+
+    def is_alive(self):
+        """Check if messages are received."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        """Stop receiving when the last user stops."""
+        with self._lock:
+            self._users -= 1
+            if self._users > 0 or self._thread is None:
+                return
+            thread = self._thread
+            self._thread = None
+        if thread is not current_thread():
+            thread.join()
+
+
+def _covered(prefixes, known):
+    """Check if all the *prefixes* start with one of the *known* ones."""
+    return all(any(prefix.startswith(other) for other in known)
+               for prefix in prefixes)
+
+
+_MULTIPLEXERS = {}
+_MULTIPLEXERS_LOCK = Lock()
+
+
+def get_subscription_multiplexer(services, nameserver="localhost"):
+    """Get the process-wide multiplexer for *services* and *nameserver*."""
+    if isinstance(services, (list, tuple)):
+        key = (nameserver, tuple(sorted(services)))
+    else:
+        key = (nameserver, services)
+    with _MULTIPLEXERS_LOCK:
+        if key not in _MULTIPLEXERS:
+            _MULTIPLEXERS[key] = SubscriptionMultiplexer(services,
+                                                         nameserver)
+        return _MULTIPLEXERS[key]
+
+
 class AbstractMessageProcessor(Thread):
 
     """Process Messages
+
+    If a *multiplexer* is given, the messages are received through it
+    instead of a dedicated subscriber, and *process* is called directly in
+    the thread of the multiplexer, so it should return quickly.
     """
 
-    def __init__(self, services, topics, nameserver="localhost"):
+    def __init__(self, services, topics, nameserver="localhost",
+                 multiplexer=None):
         Thread.__init__(self)
         LOG.debug("Nameserver: {}".format(nameserver))
-        self.nssub = NSSubscriber(services, topics, True, nameserver=nameserver)
+        self.multiplexer = multiplexer
+        if multiplexer is None:
+            self.nssub = NSSubscriber(services, topics, True,
+                                      nameserver=nameserver)
+        else:
+            self.nssub = None
+            multiplexer.add(topics, self._deliver)
         self.sub = None
         self.loop = True
 
     def start(self):
-        self.sub = self.nssub.start()
-        Thread.start(self)
+        if self.multiplexer is None:
+            self.sub = self.nssub.start()
+            Thread.start(self)
+        else:
+            # No thread of our own, the multiplexer delivers the messages
+            self.multiplexer.start()
 
     def process(self, msg):
         """Process the message.
@@ -399,6 +842,11 @@ class AbstractMessageProcessor(Thread):
         del msg
         raise NotImplementedError("process is not implemented!")
 
+    def _deliver(self, msg):
+        """Process *msg*, passed by the multiplexer."""
+        if self.loop:
+            self.process(msg)
+
     def run(self):
         """Run the trigger.
         """
@@ -415,23 +863,56 @@ class AbstractMessageProcessor(Thread):
     def stop(self):
         """Stop the trigger.
         """
-        self.nssub.stop()
+        if self.multiplexer is None:
+            self.nssub.stop()
+        elif self.loop:
+            self.multiplexer.remove(self._deliver)
+            self.multiplexer.stop()
         self.loop = False
 
 
 class PostTrollTrigger(FileTrigger):
 
     """Get posttroll messages.
+
+    The messages are queued in a work queue of *queue_size* messages
+    (0, the default, for no limit), where messages with the same uid are
+    coalesced. When the queue is full, the reception blocks for at most
+    *queue_timeout* seconds (None for no limit) before dropping the
+    message. With a *multiplexer*, the messages
+    are queued from its thread, so a full queue also holds back the other
+    triggers sharing it.
     """
 
     def __init__(self, collectors, terminator, services, topics,
                  publish_topic=None, nameserver="localhost",
-                 publish_message_after_each_reception=False):
-        self.msgproc = AbstractMessageProcessor(services, topics, nameserver=nameserver)
+                 publish_message_after_each_reception=False,
+                 multiplexer=None, queue_size=0, queue_timeout=None,
+                 publish_new_granule_only=False):
+        self.msgproc = AbstractMessageProcessor(services, topics,
+                                                nameserver=nameserver,
+                                                multiplexer=multiplexer)
         self.msgproc.process = self.add_file
+        self.queue_timeout = queue_timeout
         FileTrigger.__init__(self, collectors, terminator, self.decode_message,
                              publish_topic=publish_topic,
-                             publish_message_after_each_reception=publish_message_after_each_reception)
+                             publish_message_after_each_reception=publish_message_after_each_reception,
+                             work_queue=WorkQueue(queue_size),
+                             publish_new_granule_only=publish_new_granule_only)
+
+    def add_file(self, message):
+        """On arrival of a message.
+        """
+        self.work_queue.put(message, key=self.get_key(message),
+                            timeout=self.queue_timeout)
+        self.new_file.set()
+
+    def get_key(self, message):
+        """Get the uid of *message*, if any."""
+        try:
+            return message.data.get("uid")
+        except AttributeError:
+            return None
 
     def start(self):
         """Start the posttroll trigger."""
@@ -441,7 +922,8 @@ class PostTrollTrigger(FileTrigger):
     @staticmethod
     def decode_message(message):
         """Return the message data."""
-        return fix_start_end_time(message.data)
+        # The message can be shared with other triggers
+        return fix_start_end_time(message.data.copy())
 
     def stop(self):
         """Stop the posttroll trigger."""
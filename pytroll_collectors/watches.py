@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2026 PyTroll Community
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Keep the inotify watches of large directory trees within bounds.
+
+Watching a date-partitioned archive recursively takes one watch per
+directory, ever growing, while only the last few directories receive
+files. The WatchBudget registers only the directories accepted by a
+filter, skips and drops the directories without recent activity, and
+caps the number of watches by dropping the least recently active
+directories first.
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from threading import RLock
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+LOG = logging.getLogger(__name__)
+
+MAX_USER_WATCHES = '/proc/sys/fs/inotify/max_user_watches'
+
+
+def get_max_user_watches():
+    """Get the number of watches allowed by the kernel, None if unknown."""
+    try:
+        with open(MAX_USER_WATCHES) as fd:
+            return int(fd.read())
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def walk_directories(path, dir_filter=None):
+    """Get the activity time of the subdirectories of *path* accepted by
+    *dir_filter*, recursively.
+
+    The activity time of a directory is the latest mtime of itself and of
+    its accepted subdirectories. Return a list of (activity, path), the
+    parents before their subdirectories.
+    """
+    found = []
+    parents = {}
+    level = [path]
+    while level:
+        next_level = []
+        for parent in level:
+            try:
+                entries = list(scandir(parent))
+            except OSError as err:
+                LOG.warning("Can't scan %s: %s", parent, str(err))
+                continue
+            for entry in entries:
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    if dir_filter is not None and not dir_filter(entry.path):
+                        continue
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                except OSError:
+                    # The directory disappeared in the meantime
+                    continue
+                parents[entry.path] = parent
+                found.append([mtime, entry.path])
+                next_level.append(entry.path)
+        level = next_level
+    # Propagate the activity of the subdirectories to their parents
+    activity = dict((subdir, mtime) for mtime, subdir in found)
+    for mtime, subdir in reversed(found):
+        parent = parents[subdir]
+        if parent in activity:
+            activity[parent] = max(activity[parent], activity[subdir])
+    return [(activity[subdir], subdir) for mtime, subdir in found]
+
+
+class WatchBudget(object):
+
+    """Manage the watches of the pyinotify WatchManager *manager*.
+
+    The directories given to *add_tree* are always watched. Their
+    subdirectories are watched if accepted by *dir_filter* (a function
+    taking the path of the directory, None to accept all of them), and if
+    they were active within *max_age* seconds (None for no limit). At most
+    *max_watches* subdirectories are watched (None for no limit), the least
+    recently active ones are dropped first. The activity of a directory is
+    refreshed with *touch*, and also refreshes its parents.
+    """
+
+    def __init__(self, manager, max_watches=None, max_age=None,
+                 dir_filter=None):
+        self.manager = manager
+        self.max_watches = max_watches
+        self.max_age = max_age
+        self.dir_filter = dir_filter
+        # path: watch descriptor, of the directories given to add_tree
+        self._roots = {}
+        # path: [watch descriptor, activity time], least recently active
+        # first
+        self._dirs = OrderedDict()
+        self._counts = {'added': 0, 'failed': 0, 'skipped': 0, 'pruned': 0}
+        self._lock = RLock()
+
+    def __len__(self):
+        return len(self._roots) + len(self._dirs)
+
+    def __contains__(self, path):
+        return path in self._roots or path in self._dirs
+
+    def stats(self):
+        """Get the number of watches, and of directories added, failed,
+        skipped and pruned since the start.
+        """
+        stats = dict(self._counts)
+        stats['watches'] = len(self)
+        return stats
+
+    def add_tree(self, path, mask):
+        """Watch *path* and its subdirectories for the events of *mask*.
+
+        The subdirectories that are already given to *add_tree* are left to
+        their own watches.
+        """
+        with self._lock:
+            self._add_tree(path, mask)
+
+    def _add_tree(self, path, mask):
+        tic = time.time()
+        self._dirs.pop(path, None)
+        wd = self._add_watch(path, mask)
+        if wd is not None:
+            self._roots[path] = wd
+        limit = None
+        if self.max_age is not None:
+            limit = time.time() - self.max_age
+
+        def dir_filter(subdir):
+            if subdir in self._roots:
+                return False
+            return self.dir_filter is None or self.dir_filter(subdir)
+
+        subdirs = walk_directories(path, dir_filter)
+        recent = [(activity, subdir) for activity, subdir in subdirs
+                  if limit is None or activity >= limit]
+        self._counts['skipped'] += len(subdirs) - len(recent)
+        if self.max_watches is not None:
+            # Keep the most recent ones, and the subdirectories before
+            # their parents among the directories of same activity
+            recent = [(activity, -subdir.count(os.sep), subdir)
+                      for activity, subdir in recent]
+            recent.sort()
+            dropped = len(recent) - self.max_watches + len(self._dirs)
+            if dropped > 0:
+                self._counts['skipped'] += dropped
+                recent = recent[dropped:]
+            recent = [(activity, subdir) for activity, _, subdir in recent]
+        for activity, subdir in recent:
+            self._add_dir(subdir, mask, activity)
+        LOG.info("Watching %d directories in %s, in %.3f seconds",
+                 1 + len(recent), path, time.time() - tic)
+        self._check_kernel_limit()
+
+    def add(self, path, mask):
+        """Watch the new directory *path* for the events of *mask*, if
+        accepted by the filter. Return True if watched.
+        """
+        with self._lock:
+            if path in self:
+                return True
+            if self.dir_filter is not None and not self.dir_filter(path):
+                self._counts['skipped'] += 1
+                LOG.debug("Not watching %s", path)
+                return False
+            if not self._add_dir(path, mask, time.time()):
+                return False
+            LOG.debug("Added watch on dir: %s", path)
+            self.touch(os.path.dirname(path))
+            self._evict()
+            return True
+
+    def _add_dir(self, path, mask, activity):
+        wd = self._add_watch(path, mask)
+        if wd is None:
+            return False
+        self._dirs.pop(path, None)
+        self._dirs[path] = [wd, activity]
+        self._counts['added'] += 1
+        return True
+
+    def _add_watch(self, path, mask):
+        wd = self.manager.add_watch(path, mask).get(path, -1)
+        if wd < 0:
+            self._counts['failed'] += 1
+            LOG.warning("Can't watch %s", path)
+            return None
+        return wd
+
+    def touch(self, path, now=None):
+        """Mark the directory *path* and its watched parents as active."""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            while path in self._dirs:
+                entry = self._dirs.pop(path)
+                entry[1] = now
+                self._dirs[path] = entry
+                path = os.path.dirname(path)
+            self.prune(now)
+
+    def remove(self, path):
+        """Forget the deleted directory *path* and its subdirectories.
+
+        Return the paths of the directories that were watched.
+        """
+        prefix = os.path.join(path, '')
+        with self._lock:
+            paths = [subdir for subdir in self._dirs
+                     if subdir == path or subdir.startswith(prefix)]
+            for subdir in paths:
+                wd, _ = self._dirs.pop(subdir)
+                # The kernel already removed the watches of the deleted
+                # directories, so the errors are ignored
+                self.manager.rm_watch(wd, quiet=True)
+            if path in self._roots:
+                self.manager.rm_watch(self._roots.pop(path), quiet=True)
+                paths.append(path)
+            return paths
+
+    def prune(self, now=None):
+        """Drop the watches of the directories inactive for more than
+        *max_age* seconds.
+        """
+        if self.max_age is None:
+            return
+        if now is None:
+            now = time.time()
+        limit = now - self.max_age
+        with self._lock:
+            while self._dirs:
+                path = next(iter(self._dirs))
+                if self._dirs[path][1] >= limit:
+                    break
+                self._drop(path)
+
+    def _evict(self):
+        if self.max_watches is None:
+            return
+        while len(self._dirs) > self.max_watches:
+            self._drop(next(iter(self._dirs)))
+
+    def _drop(self, path):
+        wd, _ = self._dirs.pop(path)
+        self.manager.rm_watch(wd, quiet=True)
+        self._counts['pruned'] += 1
+        LOG.debug("Removed watch on dir: %s", path)
+
+    def _check_kernel_limit(self):
+        limit = get_max_user_watches()
+        if limit is not None and len(self) > limit * 0.9:
+            LOG.warning("Using %d inotify watches, out of %d allowed by %s",
+                        len(self), limit, MAX_USER_WATCHES)
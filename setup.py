@@ -76,7 +76,8 @@ setup(name="pytroll_collectors",
       install_requires=['pykdtree', 'pyinotify', 'posttroll>=1.3.0',
                         'trollsift', 'netifaces',
                         'pytroll-schedule', 'pyresample',
-                        'pillow', 'pycoast', 'six'],
+                        'pillow', 'pycoast', 'six',
+                        'scandir; python_version < "3.5"'],
       tests_require=['mock', 'scipy', 'trollsift', 'pillow', 'six'],
       test_suite='pytroll_collectors.tests.suite',
       extras_require=extras_require,